@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark Script
+
+Compare an approximate or quantized vector index backend against the
+exact NumPy backend: recall@k, query latency and resident vector memory.
+
+Vectors are read from MongoDB, or generated with --synthetic N.
+Queries are stored vectors with a little Gaussian noise added.
+"""
+
+import sys
+import time
+import click
+import numpy as np
+from rag_journal.index.factory import create_vector_index
+from rag_journal.index.numpy_index import NumpyVectorIndex
+from rag_journal.utils.config import CONFIG
+
+
+def load_vectors(synthetic: int, dimension: int):
+  """Get (ids, matrix) from MongoDB or a synthetic clustered dataset"""
+  if synthetic:
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(1, synthetic // 100), dimension))
+    matrix = centers[rng.integers(0, len(centers), synthetic)] + rng.normal(scale=0.5, size=(synthetic, dimension))
+    return [str(i) for i in range(synthetic)], matrix.astype(np.float32)
+
+  from rag_journal.database.mongodb_client import MongoDBClient
+  index = NumpyVectorIndex().build_from_database(MongoDBClient())
+  return index.ids, index.matrix
+
+
+def time_queries(index, queries: np.ndarray, top_k: int):
+  """Run all queries, returning results and per-query latencies in ms"""
+  results = []
+  latencies = []
+  for query in queries:
+    start = time.perf_counter()
+    results.append([item_id for item_id, _ in index.search(query, top_k)])
+    latencies.append((time.perf_counter() - start) * 1000)
+  return results, np.array(latencies)
+
+
+@click.command()
+@click.option('--backend', default = None, help = 'Backend to compare (default: retrieval.index_backend in config.yaml)')
+@click.option('--queries', 'n_queries', default = 200, help = 'Number of queries')
+@click.option('--top-k', default = 10, help = 'Results per query')
+@click.option('--synthetic', default = 0, help = 'Use N synthetic vectors instead of MongoDB')
+@click.option('--dimension', default = 384, help = 'Dimension of synthetic vectors')
+@click.option('--ef-search', multiple = True, type = int, help = 'HNSW efSearch values to sweep (repeatable)')
+@click.option('--rerank-candidates', multiple = True, type = int, help = 'Quantized re-ranking candidates to sweep (repeatable)')
+def main(backend, n_queries, top_k, synthetic, dimension, ef_search, rerank_candidates):
+  """Benchmark recall and latency of a vector index backend"""
+
+  print("="*80)
+  print("VECTOR INDEX BENCHMARK")
+  print("="*80)
+
+  config = {**CONFIG, 'retrieval': dict(CONFIG['retrieval'])}
+  if backend:
+    config['retrieval']['index_backend'] = backend
+
+  ids, matrix = load_vectors(synthetic, dimension)
+  if not len(ids):
+    print("\n✗ No vectors to index")
+    sys.exit(1)
+
+  rng = np.random.default_rng(1)
+  sample = matrix[rng.integers(0, len(ids), n_queries)]
+  queries = sample + rng.normal(scale=0.05 * np.abs(sample).mean(), size=sample.shape).astype(np.float32)
+
+  print(f"\n{len(ids)} vectors, dimension {matrix.shape[1]}, {n_queries} queries, top-{top_k}")
+
+  exact = NumpyVectorIndex()
+  exact.build(ids, matrix)
+  truth, exact_latency = time_queries(exact, queries, top_k)
+  exact_memory = exact.matrix.nbytes / 2**20
+  print(f"\n{'backend':<28}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}{'build s':>10}{'mem MB':>10}")
+  print(f"{'numpy (exact)':<28}{1.0:>10.3f}{np.percentile(exact_latency, 50):>10.3f}{np.percentile(exact_latency, 95):>10.3f}{'-':>10}{exact_memory:>10.1f}")
+
+  start = time.perf_counter()
+  index = create_vector_index(config)
+  index.build(ids, matrix)
+  build_time = time.perf_counter() - start
+
+  memory = f"{index.memory_stats()['quantized_mb']:.1f}" if hasattr(index, 'memory_stats') else '-'
+
+  if ef_search:
+    sweep = [(f"{index.backend} ef={ef}", 'ef_search', ef) for ef in ef_search]
+  elif rerank_candidates:
+    sweep = [(f"{index.backend} rerank={n}", 'rerank_candidates', n) for n in rerank_candidates]
+  else:
+    sweep = [(index.backend, None, None)]
+
+  for label, attr, value in sweep:
+    if attr is not None:
+      setattr(index, attr, value)
+
+    results, latency = time_queries(index, queries, top_k)
+    recall = np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth) if t])
+    print(f"{label:<28}{recall:>10.3f}{np.percentile(latency, 50):>10.3f}{np.percentile(latency, 95):>10.3f}{build_time:>10.2f}{memory:>10}")
+
+if __name__ == "__main__":
+  main()
@@ -27,35 +27,50 @@ content: |-
 
 import sys
 import yaml
+import hashlib
+import multiprocessing
 import click
 from datetime import datetime
 from dateutil import parser
 from pathlib import Path
 from tqdm import tqdm
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from rag_journal.database.mongodb_client import MongoDBClient
 from rag_journal.embeddings.embedder import ArticleEmbedder
+from rag_journal.embeddings.embedding_store import EmbeddingStore
+from rag_journal.index.factory import create_vector_index, create_lexical_index
+from rag_journal.ingestion.chunking import chunk_text
 from rag_journal.models.article import Article, ArticleMetadata, ArticleContent
+from rag_journal.utils.config import CONFIG
 
 
 class ArticleIngestor:
   """Handle article ingestion with embedding generation"""
   
-  def __init__(self):
+  def __init__(self, workers: int = 1):
     """Initialize ingestor"""
     self.db = MongoDBClient()
     self.embedder = ArticleEmbedder()
-  
-  def load_article_from_yaml(self, yaml_path: str) -> Dict[str, Any]:
-    """Load article from YAML file"""
-    with open(yaml_path, 'r', encoding='utf-8') as f:
-      return yaml.safe_load(f)
-  
-  def create_article_from_yaml(self, article_id: str, yaml_path: str) -> Article:
-    """Create Article object from YAML file"""
     
-    # Load YAML data
-    data = self.load_article_from_yaml(yaml_path)
+    # Number of articles embedded and written together
+    self.batch_size = CONFIG.get('ingestion', {}).get('batch_size', 256)
+    
+    # Number of processes parsing YAML files
+    self.workers = max(1, workers)
+    
+    # Content-addressed embedding store, consulted before calling the model
+    store_path = CONFIG.get('ingestion', {}).get('embedding_store_path')
+    self.embedding_store = EmbeddingStore(store_path, self.embedder.model_name) if store_path else None
+    
+    # Chunk-level embeddings for passage retrieval
+    passages_config = CONFIG['retrieval'].get('passages', {})
+    self.passages_enabled = passages_config.get('enabled', False)
+    self.chunk_size = passages_config.get('chunk_size', 200)
+    self.chunk_overlap = passages_config.get('chunk_overlap', 40)
+  
+  @staticmethod
+  def create_article_from_data(article_id: str, data: Dict[str, Any]) -> Article:
+    """Create Article object from parsed YAML data"""
     
     # Parse publication date (TODO: handle both publication_date_source and publication_date_resistenze ?)
     try:
@@ -115,45 +130,162 @@ class ArticleIngestor:
     
     return article
   
-  def ingest_article(self, article: Article, skip_if_exists: bool = True) -> bool:
-    """Ingest single article with embedding"""
-    
-    # Check if exists
-    if skip_if_exists and self.db.article_exists(article.article_id):
-      return False
-    
-    # Generate embedding
-    text_to_embed = self.embedder.prepare_article_text(
-      article.metadata.title,
-      article.content.full_text
-    )
-    embedding = self.embedder.embed_text(text_to_embed)
-    
-    # Add embedding to article
-    article.embedding = embedding
-    article.created_at = datetime.now()
-    
-    # Convert to dict and add extra fields
-    article_dict = article.to_dict()
+  def article_to_document(self, article: Article) -> Dict[str, Any]:
+    """Convert an embedded article to a MongoDB document, with extra fields"""
+    article_dict = article.to_dict(self.db.embedding_format)
     if hasattr(article, 'url'):
       article_dict['url'] = article.url
     if hasattr(article, 'source'):
       article_dict['source'] = article.source
     if hasattr(article, 'number'):
       article_dict['number'] = article.number
+    return article_dict
+  
+  def embed_texts(self, texts: List[str]) -> List:
+    """Embed texts with batched model calls, through the embedding store if enabled"""
+    if self.embedding_store is None:
+      return self.embedder.embed_batch(texts, show_progress_bar = False)
+    
+    # Only texts never embedded before go through the model
+    keys = [EmbeddingStore.text_key(t) for t in texts]
+    stored = self.embedding_store.get_many(keys)
+    missing = [i for i, key in enumerate(keys) if key not in stored]
+    if missing:
+      computed = self.embedder.embed_batch([texts[i] for i in missing], show_progress_bar = False)
+      self.embedding_store.put_many([keys[i] for i in missing], computed)
+      stored.update(zip((keys[i] for i in missing), computed))
+    return [stored[key] for key in keys]
+  
+  def embed_articles(self, articles: List[Article]):
+    """Generate embeddings for a list of articles with one batched model call"""
+    texts = [
+      self.embedder.prepare_article_text(a.metadata.title, a.content.full_text)
+      for a in articles
+    ]
+    embeddings = self.embed_texts(texts)
+    
+    now = datetime.now()
+    for article, embedding in zip(articles, embeddings):
+      article.embedding = embedding
+      article.created_at = now
+  
+  def ingest_passages(self, articles: List[Article]) -> int:
+    """Chunk articles into passages, embed them and replace their stored passages"""
+    return self.ingest_passage_texts([
+      (a.article_id, a.metadata.title, a.content.full_text) for a in articles
+    ])
+  
+  def ingest_passage_texts(self, articles: List[Tuple[str, str, str]]) -> int:
+    """Chunk (article_id, title, full text) triples into passages, embed them and replace their stored passages"""
+    passages = []
+    titles = {}
+    for article_id, title, full_text in articles:
+      titles[article_id] = title
+      for chunk in chunk_text(full_text, self.chunk_size, self.chunk_overlap):
+        chunk['passage_id'] = f"{article_id}#{chunk['position']}"
+        chunk['article_id'] = article_id
+        passages.append(chunk)
+    
+    embeddings = self.embed_texts([
+      self.embedder.prepare_article_text(titles[p['article_id']], p['text'], max_length = len(p['text']))
+      for p in passages
+    ]) if passages else []
+    for passage, embedding in zip(passages, embeddings):
+      passage['embedding'] = embedding
+    
+    return self.db.replace_passages([article_id for article_id, _, _ in articles], passages)
+  
+  def backfill_passages(self, rechunk_all: bool = False) -> Dict[str, int]:
+    """
+    Chunk and embed the passages of articles already in MongoDB: those
+    ingested before passages were enabled, or all of them with rechunk_all
+    (e.g. after changing chunk_size or chunk_overlap).
+    """
+    article_ids = sorted(self.db.get_existing_article_ids())
+    if not rechunk_all:
+      with_passages = self.db.get_article_ids_with_passages()
+      article_ids = [article_id for article_id in article_ids if article_id not in with_passages]
+    
+    stats = {"articles": 0, "passages": 0}
+    print(f"\n{len(article_ids)} articles to chunk into passages")
+    
+    for offset in tqdm(range(0, len(article_ids), self.batch_size), desc = "Backfilling passages"):
+      documents = self.db.find_by_filter(
+        {"article_id": {"$in": article_ids[offset:offset + self.batch_size]}},
+        projection = {"_id": 0, "article_id": 1, "metadata.title": 1, "content.full_text": 1}
+      )
+      stats['passages'] += self.ingest_passage_texts([
+        (doc['article_id'], doc.get('metadata', {}).get('title') or '', doc.get('content', {}).get('full_text') or '')
+        for doc in documents
+      ])
+      stats['articles'] += len(documents)
     
-    # Insert to database
-    #try:
-    result = self.db.insert_article(article_dict)
-    return True
+    return stats
+  
+  def ingest_articles(self, articles: List[Article]) -> int:
+    """Embed a batch of articles in one model call and upsert them with one bulk write"""
+    if not articles:
+      return 0
+    
+    self.embed_articles(articles)
+    result = self.db.upsert_articles_bulk(
+      [self.article_to_document(a) for a in articles]
+    )
+    
+    if self.passages_enabled:
+      self.ingest_passages(articles)
+    return result['inserted'] + result['updated']
+  
+  def parse_articles(self, article_files: List[Path], stats: Dict[str, int]) -> Iterator[Article]:
+    """
+    Parse article files, counting parse errors in stats.
+    With more than one worker, files are parsed in a process pool and
+    articles are streamed back in order as they are ready.
+    """
+    if self.workers > 1:
+      # Spawned, not forked: the parent already holds the model threads and the MongoDB pool
+      pool = multiprocessing.get_context("spawn").Pool(self.workers)
+      results = pool.imap(parse_article_file, article_files, chunksize = 16)
+    else:
+      pool = None
+      results = map(parse_article_file, article_files)
+    
+    try:
+      for article, error in tqdm(results, total = len(article_files), desc = "Ingesting articles"):
+        if error:
+          print(f"\n✗ {error}")
+          stats['errors'] += 1
+        else:
+          yield article
+    finally:
+      if pool is not None:
+        pool.terminate()
+        pool.join()
 
-  def ingest_batch(
-    self, 
-    articles_dir: str,
-    skip_existing: bool = True
-  ) -> Dict[str, int]:
-    """Ingest all articles from directory"""
+  def refresh_indexes(self):
+    """
+    Atomically rebuild the persisted indexes, then bump the corpus version.
+    The version changes only once the new indexes are published, so query
+    processes never memoize results of an old index under the new version;
+    the indexes are stamped with the version about to be set.
+    """
+    corpus_version = self.db.get_corpus_version() + 1
     
+    index_path = CONFIG['retrieval'].get('index_path', 'data/index')
+    indexes = [(create_vector_index(CONFIG).build_from_database(self.db), Path(index_path))]
+    if self.passages_enabled:
+      indexes.append((create_vector_index(CONFIG).build_from_database(self.db, passages = True), Path(index_path) / 'passages'))
+    if CONFIG['retrieval'].get('lexical', {}).get('enabled', False):
+      indexes.append((create_lexical_index(CONFIG).build_from_database(self.db), Path(index_path) / 'bm25'))
+    
+    for index, path in indexes:
+      index.meta['corpus_version'] = corpus_version
+      index.save(path)
+    
+    self.db.bump_corpus_version()
+  
+  def find_article_files(self, articles_dir: str) -> List[Path]:
+    """List article files in a directory"""
     articles_path = Path(articles_dir)
     
     if not articles_path.exists():
@@ -162,10 +294,23 @@ class ArticleIngestor:
     # Find all files (no extension filter)
     # Exclude common non-article files
     exclude_patterns = {'.DS_Store', 'README', '.gitkeep', '.gitignore'}
-    article_files = [
+    return [
       f for f in sorted(articles_path.iterdir()) 
       if f.is_file() and f.name not in exclude_patterns and not f.name.startswith('.')
     ]
+
+  def ingest_batch(
+    self, 
+    articles_dir: str,
+    skip_existing: bool = True
+  ) -> Dict[str, int]:
+    """
+    Ingest all articles from directory.
+    Pipeline: parse YAML files -> collect batches -> embed each batch with
+    one embed_batch call -> write each batch with one bulk insert.
+    """
+    
+    article_files = self.find_article_files(articles_dir)
     
     stats = {
       "total": len(article_files),
@@ -176,34 +321,95 @@ class ArticleIngestor:
     
     print(f"\nFound {stats['total']} article files in {articles_dir}")
     
-    # Process each article
-    for article_file in tqdm(article_files, desc = "Ingesting articles"):
-      try:
-        # Use filename as article ID
-        article_id = article_file.name
-        
-        # Create article from YAML
-        article = self.create_article_from_yaml(
-          article_id,
-          str(article_file)
-        )
-        
-        # Ingest
-        ingested = self.ingest_article(article, skip_if_exists = skip_existing)
+    # Skip existing articles before parsing, with one query for all ids
+    if skip_existing:
+      existing_ids = self.db.get_existing_article_ids()
+      new_files = [f for f in article_files if f.name not in existing_ids]
+      stats['skipped'] = len(article_files) - len(new_files)
+      article_files = new_files
+    
+    self._ingest_files(article_files, stats)
+    
+    return stats
+  
+  def ingest_incremental(self, articles_dir: str) -> Dict[str, int]:
+    """
+    Ingest only new and changed articles, and remove deleted ones.
+    Files whose mtime and size match the manifest are skipped without being
+    read; files whose content hash matches are skipped without being parsed.
+    """
+    
+    article_files = self.find_article_files(articles_dir)
+    manifest = self.db.get_manifest()
+    
+    stats = {
+      "total": len(article_files),
+      "ingested": 0,
+      "skipped": 0,
+      "deleted": 0,
+      "errors": 0
+    }
+    
+    print(f"\nFound {stats['total']} article files in {articles_dir}")
+    
+    changed_files = []
+    touched_entries = []
+    for article_file in article_files:
+      entry = manifest.get(article_file.name)
+      if entry is not None:
+        stat = article_file.stat()
+        if entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+          stats['skipped'] += 1
+          continue
         
-        if ingested:
-          stats['ingested'] += 1
-        else:
+        # Touched but possibly not edited: compare content hash
+        fingerprint = file_fingerprint(article_file)
+        if fingerprint['sha256'] == entry['sha256']:
+          touched_entries.append(fingerprint)
           stats['skipped'] += 1
-          
-      except yaml.YAMLError as e:
-        print(f"\n✗ YAML Error in {article_file.name}: {e}")
-        stats['errors'] += 1
-      except Exception as e:
-        print(f"\n✗ Error processing {article_file.name}: {e}")
-        stats['errors'] += 1
+          continue
+      
+      changed_files.append(article_file)
+    
+    self.db.upsert_manifest_entries(touched_entries)
+    
+    print(f"{len(changed_files)} new or changed, {stats['skipped']} unchanged")
+    
+    self._ingest_files(changed_files, stats)
+    
+    # Remove articles whose files are gone
+    deleted_ids = set(manifest) - {f.name for f in article_files}
+    if deleted_ids:
+      stats['deleted'] = self.db.delete_articles(list(deleted_ids))
+      self.db.delete_manifest_entries(list(deleted_ids))
     
     return stats
+  
+  def _ingest_files(self, article_files: List[Path], stats: Dict[str, int]):
+    """Run the parse -> embed -> write pipeline over article files"""
+    batch = []
+    for article in self.parse_articles(article_files, stats):
+      batch.append(article)
+      if len(batch) >= self.batch_size:
+        self._flush_batch(batch, stats)
+        batch = []
+    
+    self._flush_batch(batch, stats)
+  
+  def _flush_batch(self, batch: List[Article], stats: Dict[str, int]):
+    """Embed and write one batch of articles, updating stats and manifest"""
+    if not batch:
+      return
+    try:
+      ingested = self.ingest_articles(batch)
+      stats['ingested'] += ingested
+      stats['skipped'] += len(batch) - ingested
+      self.db.upsert_manifest_entries([
+        a.fingerprint for a in batch if hasattr(a, 'fingerprint')
+      ])
+    except Exception as e:
+      print(f"\n✗ Error ingesting batch of {len(batch)} articles: {e}")
+      stats['errors'] += len(batch)
 
 def load_config(ctx, param, value):
   """Eager callback to load config.yaml defaults"""
@@ -216,6 +422,46 @@ def load_config(ctx, param, value):
   return value  # Allow --config override if added later
 
 
+# Use the libyaml C loader when available (much faster than the pure-Python one)
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def parse_article_file(article_file: Path) -> Tuple[Optional[Article], Optional[str]]:
+  """
+  Read, parse and validate one article file.
+  Top-level function, so it can run in worker processes.
+  Returns (article, None) on success, (None, error message) on failure.
+  """
+  try:
+    raw = article_file.read_bytes()
+    
+    # Use filename as article ID
+    article = ArticleIngestor.create_article_from_data(
+      article_file.name,
+      yaml.load(raw, Loader = YamlLoader)
+    )
+    article.fingerprint = file_fingerprint(article_file, raw)
+    return article, None
+  except yaml.YAMLError as e:
+    return None, f"YAML Error in {article_file.name}: {e}"
+  except Exception as e:
+    return None, f"Error processing {article_file.name}: {e}"
+
+
+def file_fingerprint(article_file: Path, raw: bytes = None) -> Dict[str, Any]:
+  """Build the ingestion manifest entry of an article file"""
+  stat = article_file.stat()
+  if raw is None:
+    raw = article_file.read_bytes()
+  return {
+    "article_id": article_file.name,
+    "path": str(article_file),
+    "mtime": stat.st_mtime,
+    "size": stat.st_size,
+    "sha256": hashlib.sha256(raw).hexdigest()
+  }
+
+
 def fuzzy_parse_date(date_str):
   try:
     return parser.parse(date_str, fuzzy = True).date()
@@ -233,8 +479,16 @@ def fuzzy_parse_date(date_str):
         help = 'Skip articles that already exist in DB')
 @click.option('--clear-db', is_flag = True,
         help = 'Clear database before ingestion (DANGEROUS!)')
+@click.option('--incremental', is_flag = True,
+        help = 'Only ingest new or changed files and remove deleted ones, using the ingestion manifest')
+@click.option('--workers', default = 1, type = click.IntRange(min = 1),
+        help = 'Number of processes parsing YAML files')
+@click.option('--backfill-passages', is_flag = True,
+        help = 'Also chunk into passages the articles in DB that have none (ingested before passages were enabled)')
+@click.option('--rechunk-passages', is_flag = True,
+        help = 'Re-chunk the passages of all articles in DB (e.g. after changing chunk_size)')
 
-def main(articles_dir, skip_existing, clear_db):
+def main(articles_dir, skip_existing, clear_db, incremental, workers, backfill_passages, rechunk_passages):
   """Ingest articles from YAML files into MongoDB"""
   
   print("="*80)
@@ -242,7 +496,11 @@ def main(articles_dir, skip_existing, clear_db):
   print("="*80)
   
   # Initialize ingestor
-  ingestor = ArticleIngestor()
+  ingestor = ArticleIngestor(workers = workers)
+  
+  if (backfill_passages or rechunk_passages) and not ingestor.passages_enabled:
+    print("✗ Passages are disabled: set retrieval.passages.enabled in config.yaml")
+    sys.exit(1)
   
   # Clear database if requested
   if clear_db:
@@ -255,7 +513,10 @@ def main(articles_dir, skip_existing, clear_db):
   
   # Ingest articles
   try:
-    stats = ingestor.ingest_batch(articles_dir, skip_existing)
+    if incremental:
+      stats = ingestor.ingest_incremental(articles_dir)
+    else:
+      stats = ingestor.ingest_batch(articles_dir, skip_existing)
     
     # Print statistics
     print("\n" + "="*80)
@@ -264,8 +525,21 @@ def main(articles_dir, skip_existing, clear_db):
     print(f"Total files: {stats['total']}")
     print(f"✓ Ingested: {stats['ingested']}")
     print(f"⊘ Skipped: {stats['skipped']}")
+    if 'deleted' in stats:
+      print(f"⌫ Deleted: {stats['deleted']}")
     print(f"✗ Errors: {stats['errors']}")
     
+    # Passages of the articles ingested before passages were enabled
+    if backfill_passages or rechunk_passages:
+      passage_stats = ingestor.backfill_passages(rechunk_all = rechunk_passages)
+      stats['backfilled'] = passage_stats['articles']
+      print(f"✓ Passages: {passage_stats['passages']} from {passage_stats['articles']} articles")
+    
+    # Rebuild the vector indexes used by the query processes
+    if stats['ingested'] or stats.get('deleted') or stats.get('backfilled'):
+      print("\nRebuilding vector indexes...")
+      ingestor.refresh_indexes()
+    
     # Show database statistics
     db_stats = ingestor.db.get_statistics()
     print("\nDatabase Statistics:")
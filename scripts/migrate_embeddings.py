@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Embedding Migration Script
+
+Convert the embeddings stored in MongoDB to another storage format
+(e.g. legacy BSON arrays of doubles to packed float32 Binary blobs),
+for both the articles and the passages collections
+"""
+
+import sys
+import click
+from rag_journal.database.mongodb_client import MongoDBClient
+from rag_journal.database.embedding_codec import EMBEDDING_FORMATS
+
+
+@click.command()
+@click.option('--format', 'embedding_format', type = click.Choice(EMBEDDING_FORMATS), default = None,
+              help = 'Target storage format (default: database.embedding_format in config.yaml)')
+@click.option('--batch-size', default = 1000, help = 'Documents per bulk write')
+def main(embedding_format, batch_size):
+  """Convert stored embeddings to a new storage format"""
+  
+  print("="*80)
+  print("EMBEDDING MIGRATION")
+  print("="*80)
+  
+  try:
+    db = MongoDBClient()
+    embedding_format = embedding_format or db.embedding_format
+    
+    print(f"\nConverting embeddings to '{embedding_format}'...")
+    converted = db.migrate_embeddings(embedding_format, batch_size = batch_size)
+    
+    print(f"\n✓ Converted {converted['articles']} articles and {converted['passages']} passages")
+  
+  except Exception as e:
+    print(f"\n✗ Fatal error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -4,9 +4,11 @@ Query Script for Agentic RAG System
 """
 
 import click
+from typing import Optional
 from dotenv import load_dotenv
 from rag_journal.utils.logger import setup_logger, logger
 from rag_journal.rag.agentic_rag import AgenticRAG
+from rag_journal.rag.query_router import QueryRouter
 
 
 load_dotenv('.env')
@@ -15,13 +17,42 @@ setup_logger(
   level="INFO" # or DEBUG for more details
 )
 
+class StreamPrinter:
+  """on_delta callback printing the answer as it is generated"""
+  
+  def __init__(self, prefix: str):
+    self.prefix = prefix
+    self.started = False
+  
+  def __call__(self, text: Optional[str]):
+    if text is None:
+      # The text was a preamble to tool calls: the answer starts on a new line
+      if self.started:
+        print("\n")
+        self.started = False
+      return
+    if not self.started:
+      print(self.prefix, end="", flush=True)
+      self.started = True
+    print(text, end="", flush=True)
+  
+  def finish(self, answer: str):
+    """End the streamed answer, or print it whole if nothing was streamed"""
+    if self.started:
+      print("\n")
+    else:
+      print(f"{self.prefix}{answer}\n")
+
+
 @click.command()
 @click.option('--mode', type=click.Choice(['single', 'chat']), default='chat', 
               help='Query mode: single question or chat conversation')
 @click.option('--debug', is_flag=True, help='Enable debug logging')
+@click.option('--no-stream', is_flag=True, help='Print the answer only when complete')
+@click.option('--no-router', is_flag=True, help='Send every single question to the agent')
 @click.argument('query', required=False)
 
-def main(mode, debug, query):
+def main(mode, debug, no_stream, no_router, query):
   """Query the Agentic RAG system"""
   
   if debug:
@@ -33,11 +64,15 @@ def main(mode, debug, query):
   # Initialize system
   rag = AgenticRAG()
   
+  # Single questions: simple structured ones are answered without the LLM
+  single = rag if no_router else QueryRouter(rag)
+  
   if query:
     # Single query from command line
     logger.info("Query singola da riga comando - Modalità batch")
-    result = rag.query(query)
-    print(f"\nAnswer: {result['answer']}")
+    printer = StreamPrinter("\nAnswer: ")
+    result = single.query(query, on_delta=None if no_stream else printer)
+    printer.finish(result['answer'])
     logger.info(f"Richiesta completata ({result['iterations']} iterazioni)")
     logger.info(f"Strumenti utilizzati: {len(result['tool_calls'])}")
     return
@@ -73,12 +108,14 @@ def main(mode, debug, query):
       continue
     
     try:
+      printer = StreamPrinter("\nAssistente: ")
+      on_delta = None if no_stream else printer
       if mode == 'chat':
-        result = rag.chat(user_query)
+        result = rag.chat(user_query, on_delta=on_delta)
       else:
-        result = rag.query(user_query)
+        result = single.query(user_query, on_delta=on_delta)
       
-      print(f"\nAssistente: {result['answer']}\n")
+      printer.finish(result['answer'])
       
       if mode == 'single':
         logger.info(f"[Statistiche: {result['iterations']} iterazioni, {len(result['tool_calls'])} tools]")
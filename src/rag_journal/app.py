@@ -0,0 +1,127 @@
+"""
+HTTP query service for the Agentic RAG system.
+
+One AsyncAgenticRAG per worker process: the embedding model, the vector
+indexes and the MongoDB connection pool are loaded once at startup and
+shared by all requests. Single questions go through the query router,
+which answers simple structured ones from MongoDB without the LLM. Chat
+histories live in the configured session store (server.session_store in
+config.yaml).
+
+The /stream variants send the answer while it is generated, as NDJSON
+lines: {"delta": "..."} for each text fragment, then {"result": {...}}
+with the same content of the non-streaming endpoint. {"reset": true}
+means that the text sent so far was a preamble to tool calls, not part
+of the answer: clients discard it.
+
+Run with:
+  uvicorn rag_journal.app:app --workers 2
+"""
+
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from rag_journal.rag.async_agentic_rag import AsyncAgenticRAG
+from rag_journal.rag.async_query_router import AsyncQueryRouter
+from rag_journal.utils.logger import setup_logger
+
+
+load_dotenv('.env')
+setup_logger(
+  log_file="logs/rag.log",
+  level="INFO"
+)
+
+
+class QueryRequest(BaseModel):
+  query: str
+  max_iterations: Optional[int] = 10
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  """Load the RAG system once per process"""
+  app.state.rag = AsyncAgenticRAG()
+  app.state.router = AsyncQueryRouter(app.state.rag)
+  yield
+  await app.state.rag.close()
+
+
+app = FastAPI(title="RAG Journal", lifespan=lifespan)
+
+
+def _ndjson_stream(run: Callable[[Callable[[Optional[str]], None]], Awaitable[Dict]]) -> StreamingResponse:
+  """Run an agent call in a task, sending its text deltas and then its result"""
+  done = object()
+
+  async def events():
+    queue = asyncio.Queue()
+    task = asyncio.create_task(run(lambda text: queue.put_nowait(text)))
+    task.add_done_callback(lambda _: queue.put_nowait(done))
+    try:
+      while (text := await queue.get()) is not done:
+        event = {"reset": True} if text is None else {"delta": text}
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+      yield json.dumps({"result": task.result()}, ensure_ascii=False, default=str) + "\n"
+    finally:
+      # Client gone: stop the agent
+      task.cancel()
+
+  return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.get("/health")
+async def health(request: Request):
+  """Liveness, index size and cache hit rates"""
+  rag = request.app.state.rag
+  return {
+    "status": "ok",
+    "articles_indexed": len(rag.index),
+    **rag.cache_stats()
+  }
+
+
+@app.post("/query")
+async def query(body: QueryRequest, request: Request):
+  """Single question, without conversation history"""
+  return await request.app.state.router.query(body.query, max_iterations=body.max_iterations)
+
+
+@app.post("/query/stream")
+async def query_stream(body: QueryRequest, request: Request):
+  """Single question, streaming the answer"""
+  router = request.app.state.router
+  return _ndjson_stream(lambda on_delta: router.query(body.query, max_iterations=body.max_iterations, on_delta=on_delta))
+
+
+@app.post("/chat/{session_id}")
+async def chat(session_id: str, body: QueryRequest, request: Request):
+  """One chat turn in a session"""
+  return await request.app.state.rag.chat(session_id, body.query, max_iterations=body.max_iterations)
+
+
+@app.post("/chat/{session_id}/stream")
+async def chat_stream(session_id: str, body: QueryRequest, request: Request):
+  """One chat turn in a session, streaming the answer"""
+  rag = request.app.state.rag
+  return _ndjson_stream(
+    lambda on_delta: rag.chat(session_id, body.query, max_iterations=body.max_iterations, on_delta=on_delta)
+  )
+
+
+@app.get("/chat/{session_id}")
+async def chat_history(session_id: str, request: Request):
+  """Conversation history of a session"""
+  return {"session_id": session_id, "history": await request.app.state.rag.get_chat_history(session_id)}
+
+
+@app.delete("/chat/{session_id}")
+async def reset_chat(session_id: str, request: Request):
+  """Forget a session"""
+  await request.app.state.rag.reset_chat(session_id)
+  return {"session_id": session_id, "reset": True}
@@ -0,0 +1,79 @@
+import pymongo
+from typing import Dict, List, Any, Optional
+from rag_journal.utils.config import CONFIG
+
+try:
+  from pymongo import AsyncMongoClient # pymongo >= 4.10
+except ImportError:
+  from motor.motor_asyncio import AsyncIOMotorClient as AsyncMongoClient
+
+
+class AsyncMongoDBClient:
+  """
+  Asyncio MongoDB client for the read queries of the agent tools and the query router.
+  Index creation, ingestion and maintenance stay on MongoDBClient.
+  """
+
+  def __init__(self):
+    """Initialize MongoDB client"""
+    db_config = CONFIG['database']
+    self.db_config = db_config
+
+    # Connect to MongoDB
+    self.client = AsyncMongoClient(db_config['mongodb_uri'])
+    self.db = self.client[db_config['database_name']]
+    self.collection = self.db[db_config['collection_name']]
+    self.meta = self.db[db_config.get('meta_collection_name', 'meta')]
+    self.passages = self.db[db_config.get('passages_collection_name', 'passages')]
+
+  async def find_by_filter(
+      self,
+      filter_dict: Dict[str, Any],
+      projection: Optional[Dict[str, int]] = None,
+      limit: int = 0) -> List[Dict[str, Any]]:
+    """Find articles by filter"""
+    cursor = self.collection.find(filter_dict, projection)
+    if limit > 0:
+      cursor = cursor.limit(limit)
+    return await cursor.to_list(length=None)
+
+  async def find_latest(
+      self,
+      filter_dict: Dict[str, Any],
+      projection: Optional[Dict[str, int]] = None,
+      limit: int = 10) -> List[Dict[str, Any]]:
+    """Find the most recent articles matching a filter (uses the publication_date index)"""
+    cursor = self.collection.find(filter_dict, projection).sort("metadata.publication_date", pymongo.DESCENDING)
+    return await cursor.limit(limit).to_list(length=None)
+
+  async def get_authors(self) -> List[str]:
+    """Get the distinct author names"""
+    return [author for author in await self.collection.distinct("metadata.author") if author]
+
+  async def find_article_ids(self, filter_dict: Dict[str, Any]) -> List[str]:
+    """Get the ids of the articles matching a filter, without fetching the documents"""
+    cursor = self.collection.find(filter_dict, {"_id": 0, "article_id": 1})
+    return [doc['article_id'] async for doc in cursor if 'article_id' in doc]
+
+  async def count_by_filter(self, filter_dict: Dict[str, Any]) -> int:
+    """Count articles matching filter"""
+    return await self.collection.count_documents(filter_dict)
+
+  async def find_passages(self, passage_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get passages by id, without embeddings"""
+    cursor = self.passages.find(
+      {"passage_id": {"$in": list(passage_ids)}},
+      {"_id": 0, "embedding": 0}
+    )
+    return await cursor.to_list(length=None)
+
+  async def get_corpus_version(self) -> int:
+    """Get the corpus version counter, bumped by every ingestion that changes articles"""
+    doc = await self.meta.find_one({"_id": "corpus_version"})
+    return doc['value'] if doc else 0
+
+  async def close(self):
+    """Close the connection pool"""
+    result = self.client.close()
+    if result is not None: # AsyncMongoClient.close is a coroutine, motor's is not
+      await result
@@ -0,0 +1,60 @@
+import numpy as np
+from bson.binary import Binary
+from typing import List, Optional, Union
+
+# Storage formats for the "embedding" field:
+#  - list: BSON array of doubles (legacy, ~3x the size of float32)
+#  - float32 / float16: packed little-endian Binary blob
+EMBEDDING_FORMATS = ("list", "float32", "float16")
+
+# BSON user-defined binary subtypes (0x80-0xFF) tag the packed dtype
+_SUBTYPES = {"float32": 0x80, "float16": 0x81}
+_DTYPES = {0x80: np.dtype('<f4'), 0x81: np.dtype('<f2')}
+
+
+def encode_embedding(
+    embedding: Union[List[float], np.ndarray, Binary, None],
+    embedding_format: str = "float32") -> Union[List[float], Binary, None]:
+  """Convert an embedding to its MongoDB storage representation"""
+  if embedding is None:
+    return None
+  if embedding_format not in EMBEDDING_FORMATS:
+    raise ValueError(f"Unknown embedding format: {embedding_format}. Use one of {EMBEDDING_FORMATS}")
+
+  if isinstance(embedding, Binary):
+    if embedding_format != "list" and embedding.subtype == _SUBTYPES[embedding_format]:
+      return embedding # Already encoded
+    embedding = decode_embedding(embedding)
+
+  if embedding_format == "list":
+    return np.asarray(embedding, dtype=np.float64).tolist()
+
+  subtype = _SUBTYPES[embedding_format]
+  packed = np.asarray(embedding, dtype=_DTYPES[subtype]).tobytes()
+  return Binary(packed, subtype)
+
+
+def decode_embedding(value: Union[List[float], Binary, None]) -> Optional[np.ndarray]:
+  """
+  Convert a stored embedding to a numpy array.
+  Packed blobs are decoded zero-copy, so the result is read-only.
+  """
+  if value is None:
+    return None
+
+  if isinstance(value, Binary):
+    dtype = _DTYPES.get(value.subtype)
+    if dtype is None:
+      raise ValueError(f"Unsupported embedding binary subtype: {value.subtype}")
+    return np.frombuffer(value, dtype=dtype)
+
+  return np.asarray(value, dtype=np.float32)
+
+
+def embedding_format_of(value: Union[List[float], Binary, None]) -> Optional[str]:
+  """Return the storage format of a stored embedding"""
+  if value is None:
+    return None
+  if isinstance(value, Binary):
+    return {subtype: name for name, subtype in _SUBTYPES.items()}.get(value.subtype)
+  return "list"
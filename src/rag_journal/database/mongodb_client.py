@@ -1,6 +1,11 @@
 import pymongo
+import numpy as np
+from pymongo import ReturnDocument, UpdateOne
 from datetime import datetime, date
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Set, Tuple
+from rag_journal.database.embedding_codec import (
+  encode_embedding, decode_embedding, embedding_format_of
+)
 from rag_journal.utils.logger import logger
 from rag_journal.utils.config import CONFIG
 
@@ -18,6 +23,20 @@ class MongoDBClient:
     self.db = self.client[db_config['database_name']]
     self.collection = self.db[db_config['collection_name']]
     
+    # Ingestion manifest: path, mtime, size and content hash per article file
+    self.manifest = self.db[db_config.get(
+      'manifest_collection_name', f"{db_config['collection_name']}_manifest"
+    )]
+    
+    # Service documents, e.g. the corpus version counter
+    self.meta = self.db[db_config.get('meta_collection_name', 'meta')]
+    
+    # Passages (chunks) of articles with their own embeddings
+    self.passages = self.db[db_config.get('passages_collection_name', 'passages')]
+    
+    # Storage format for embeddings: "list", "float32" or "float16"
+    self.embedding_format = db_config.get('embedding_format', 'float32')
+    
     # Create indexes
     self._create_indexes()
   
@@ -59,6 +78,18 @@ class MongoDBClient:
       ], name = "text_search_index")
       created += 1
 
+    if "article_id_1" not in {idx["name"] for idx in self.manifest.list_indexes()}:
+      self.manifest.create_index("article_id", unique=True)
+      created += 1
+
+    passage_indexes = {idx["name"] for idx in self.passages.list_indexes()}
+    if "passage_id_1" not in passage_indexes:
+      self.passages.create_index("passage_id", unique=True)
+      created += 1
+    if "article_id_1" not in passage_indexes:
+      self.passages.create_index("article_id")
+      created += 1
+
     if created > 0:
       logger.info(f"✓ creati {created} indici nel database")
     # else:
@@ -74,10 +105,17 @@ class MongoDBClient:
       return datetime.combine(doc, datetime.min.time())
     return doc
   
+  def _encode_document(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Pack the embedding of a document in the configured storage format"""
+    if doc.get('embedding') is not None:
+      doc = dict(doc)
+      doc['embedding'] = encode_embedding(doc['embedding'], self.embedding_format)
+    return doc
+  
   def insert_article(self, article_data: Dict[str, Any]) -> str:
     """Insert a single article"""
     try:
-      article_data_clean = self.mongo_clean(article_data)
+      article_data_clean = self.mongo_clean(self._encode_document(article_data))
       result = self.collection.insert_one(article_data_clean)
       #logger.info("✓ Articolo inserito")
     except pymongo.errors.DuplicateKeyError:
@@ -92,9 +130,44 @@ class MongoDBClient:
 
   
   def insert_articles_batch(self, articles: List[Dict[str, Any]]) -> List[str]:
-    """Insert multiple articles"""
-    result = self.collection.insert_many(articles)
-    return [str(id) for id in result.inserted_ids]
+    """Insert multiple articles with one unordered bulk insert, ignoring duplicates"""
+    if not articles:
+      return []
+    
+    documents = [self.mongo_clean(self._encode_document(a)) for a in articles]
+    try:
+      result = self.collection.insert_many(documents, ordered=False)
+      return [str(id) for id in result.inserted_ids]
+    except pymongo.errors.BulkWriteError as e:
+      errors = e.details.get('writeErrors', [])
+      failed = {err['index'] for err in errors if err.get('code') == 11000}
+      if len(failed) < len(errors):
+        logger.error(f"✗ Errore MongoDB: {e}")
+        raise # Rethrow for caller to handle
+      logger.info(f"ℹ {len(failed)} articoli esistono già (ignorati)")
+      # insert_many sets _id on each document before sending it
+      return [str(doc['_id']) for i, doc in enumerate(documents) if i not in failed]
+  
+  def upsert_articles_bulk(self, articles: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Insert or replace multiple articles (by article_id) with one unordered bulk write"""
+    if not articles:
+      return {"inserted": 0, "updated": 0}
+    
+    operations = []
+    for article in articles:
+      document = self.mongo_clean(self._encode_document(article))
+      document.pop('_id', None)
+      operations.append(UpdateOne(
+        {"article_id": document['article_id']},
+        {"$set": document},
+        upsert=True
+      ))
+    
+    result = self.collection.bulk_write(operations, ordered=False)
+    return {
+      "inserted": result.upserted_count,
+      "updated": result.matched_count
+    }
   
   def find_by_filter(
       self, 
@@ -107,6 +180,24 @@ class MongoDBClient:
       cursor = cursor.limit(limit)
     return list(cursor)
   
+  def find_latest(
+      self,
+      filter_dict: Dict[str, Any],
+      projection: Optional[Dict[str, int]] = None,
+      limit: int = 10) -> List[Dict[str, Any]]:
+    """Find the most recent articles matching a filter (uses the publication_date index)"""
+    cursor = self.collection.find(filter_dict, projection).sort("metadata.publication_date", pymongo.DESCENDING)
+    return list(cursor.limit(limit))
+  
+  def get_authors(self) -> List[str]:
+    """Get the distinct author names"""
+    return [author for author in self.collection.distinct("metadata.author") if author]
+  
+  def find_article_ids(self, filter_dict: Dict[str, Any]) -> List[str]:
+    """Get the ids of the articles matching a filter, without fetching the documents"""
+    cursor = self.collection.find(filter_dict, {"_id": 0, "article_id": 1})
+    return [doc['article_id'] for doc in cursor if 'article_id' in doc]
+  
   def count_by_filter(self, filter_dict: Dict[str, Any]) -> int:
     """Count articles matching filter"""
     return self.collection.count_documents(filter_dict)
@@ -117,6 +208,112 @@ class MongoDBClient:
     """Get all articles (use with caution on large datasets)"""
     return list(self.collection.find({}, projection))
   
+  def iter_embeddings(self, batch_size: int = 1000) -> Iterator[Tuple[str, np.ndarray]]:
+    """Stream (article_id, embedding) pairs for all articles having an embedding"""
+    cursor = self.collection.find(
+      {"embedding": {"$exists": True, "$ne": None}},
+      {"_id": 0, "article_id": 1, "embedding": 1}
+    ).batch_size(batch_size)
+    for doc in cursor:
+      embedding = decode_embedding(doc.get('embedding'))
+      if embedding is not None and len(embedding):
+        yield doc['article_id'], embedding
+  
+  def iter_article_texts(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+    """Stream (article_id, title and full text) pairs for all articles"""
+    cursor = self.collection.find(
+      {},
+      {"_id": 0, "article_id": 1, "metadata.title": 1, "content.full_text": 1}
+    ).batch_size(batch_size)
+    for doc in cursor:
+      title = doc.get('metadata', {}).get('title') or ''
+      full_text = doc.get('content', {}).get('full_text') or ''
+      yield doc['article_id'], f"{title}\n{full_text}"
+  
+  def migrate_embeddings(self, embedding_format: Optional[str] = None, batch_size: int = 1000) -> Dict[str, int]:
+    """Re-encode all stored embeddings (articles and passages) in the given format, with bulk writes"""
+    embedding_format = embedding_format or self.embedding_format
+    return {
+      "articles": self._migrate_collection_embeddings(self.collection, embedding_format, batch_size),
+      "passages": self._migrate_collection_embeddings(self.passages, embedding_format, batch_size)
+    }
+  
+  @staticmethod
+  def _migrate_collection_embeddings(collection, embedding_format: str, batch_size: int) -> int:
+    """Re-encode the embeddings of one collection, returning the number of converted documents"""
+    cursor = collection.find(
+      {"embedding": {"$exists": True, "$ne": None}},
+      {"_id": 1, "embedding": 1}
+    ).batch_size(batch_size)
+    
+    converted = 0
+    operations = []
+    for doc in cursor:
+      if embedding_format_of(doc['embedding']) == embedding_format:
+        continue
+      operations.append(UpdateOne(
+        {"_id": doc['_id']},
+        {"$set": {"embedding": encode_embedding(doc['embedding'], embedding_format)}}
+      ))
+      if len(operations) >= batch_size:
+        converted += collection.bulk_write(operations, ordered=False).modified_count
+        operations = []
+    
+    if operations:
+      converted += collection.bulk_write(operations, ordered=False).modified_count
+    
+    return converted
+  
+  def replace_passages(self, article_ids: List[str], passages: List[Dict[str, Any]]) -> int:
+    """Replace all passages of the given articles"""
+    if article_ids:
+      self.passages.delete_many({"article_id": {"$in": list(article_ids)}})
+    if not passages:
+      return 0
+    result = self.passages.insert_many(
+      [self._encode_document(p) for p in passages],
+      ordered=False
+    )
+    return len(result.inserted_ids)
+  
+  def find_passages(self, passage_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get passages by id, without embeddings"""
+    return list(self.passages.find(
+      {"passage_id": {"$in": list(passage_ids)}},
+      {"_id": 0, "embedding": 0}
+    ))
+  
+  def get_article_ids_with_passages(self) -> Set[str]:
+    """Get the ids of the articles having passages, with one query covered by the article_id index"""
+    cursor = self.passages.find(
+      {},
+      {"_id": 0, "article_id": 1}
+    ).hint([("article_id", pymongo.ASCENDING)])
+    return {doc['article_id'] for doc in cursor if 'article_id' in doc}
+  
+  def count_passages(self) -> int:
+    """Count stored passages"""
+    return self.passages.count_documents({})
+  
+  def iter_passage_embeddings(self, batch_size: int = 1000) -> Iterator[Tuple[str, np.ndarray]]:
+    """Stream (passage_id, embedding) pairs for all passages"""
+    cursor = self.passages.find(
+      {"embedding": {"$exists": True, "$ne": None}},
+      {"_id": 0, "passage_id": 1, "embedding": 1}
+    ).batch_size(batch_size)
+    for doc in cursor:
+      embedding = decode_embedding(doc.get('embedding'))
+      if embedding is not None and len(embedding):
+        yield doc['passage_id'], embedding
+  
+  def get_existing_article_ids(self) -> Set[str]:
+    """Get all article ids with one query covered by the article_id index"""
+    cursor = self.collection.find(
+      {},
+      {"_id": 0, "article_id": 1}
+    ).hint([("article_id", pymongo.ASCENDING)])
+    return {doc['article_id'] for doc in cursor if 'article_id' in doc}
+  
   def article_exists(self, article_id: str) -> bool:
     """Check if article exists"""
     return self.collection.count_documents({"article_id": article_id}) > 0
@@ -134,9 +331,56 @@ class MongoDBClient:
     result = self.collection.delete_one({"article_id": article_id})
     return result.deleted_count > 0
   
+  def delete_articles(self, article_ids: List[str]) -> int:
+    """Delete multiple articles"""
+    if not article_ids:
+      return 0
+    result = self.collection.delete_many({"article_id": {"$in": list(article_ids)}})
+    self.passages.delete_many({"article_id": {"$in": list(article_ids)}})
+    return result.deleted_count
+  
+  def get_manifest(self) -> Dict[str, Dict[str, Any]]:
+    """Get the ingestion manifest, keyed by article_id"""
+    return {
+      entry['article_id']: entry
+      for entry in self.manifest.find({}, {"_id": 0})
+    }
+  
+  def upsert_manifest_entries(self, entries: List[Dict[str, Any]]):
+    """Insert or replace ingestion manifest entries with one bulk write"""
+    if not entries:
+      return
+    self.manifest.bulk_write([
+      UpdateOne({"article_id": entry['article_id']}, {"$set": entry}, upsert=True)
+      for entry in entries
+    ], ordered=False)
+  
+  def delete_manifest_entries(self, article_ids: List[str]):
+    """Delete ingestion manifest entries"""
+    if article_ids:
+      self.manifest.delete_many({"article_id": {"$in": list(article_ids)}})
+  
+  def get_corpus_version(self) -> int:
+    """Get the corpus version counter, bumped by every ingestion that changes articles"""
+    doc = self.meta.find_one({"_id": "corpus_version"})
+    return doc['value'] if doc else 0
+  
+  def bump_corpus_version(self) -> int:
+    """Increment the corpus version counter, returning the new version"""
+    doc = self.meta.find_one_and_update(
+      {"_id": "corpus_version"},
+      {"$inc": {"value": 1}},
+      upsert=True,
+      return_document=ReturnDocument.AFTER
+    )
+    return doc['value']
+  
   def clear_collection(self):
     """Clear all articles (use with caution!)"""
     self.collection.delete_many({})
+    self.manifest.delete_many({})
+    self.passages.delete_many({})
+    self.bump_corpus_version()
     logger.info("⚠ Tutti gli articoli cancellati dalla collezione")
   
   def get_statistics(self) -> Dict[str, Any]:
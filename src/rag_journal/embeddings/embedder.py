@@ -1,8 +1,10 @@
 from sentence_transformers import SentenceTransformer
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 import numpy as np
 import os
 from pathlib import Path
+from rag_journal.embeddings.query_cache import QueryEmbeddingCache
+from rag_journal.index.similarity import normalize_rows, top_k_similarity
 from rag_journal.utils.logger import logger
 from rag_journal.utils.config import CONFIG
 
@@ -17,6 +19,15 @@ class ArticleEmbedder:
     self.batch_size = embedding_config['batch_size']
     self.dimension = embedding_config['dimension']
     
+    # Cache for query embeddings
+    cache_config = embedding_config.get('query_cache', {})
+    self.query_cache = QueryEmbeddingCache(
+      size=cache_config.get('size', 1024),
+      ttl=cache_config.get('ttl_seconds'),
+      disk_path=cache_config.get('disk_path'),
+      disk_max_entries=cache_config.get('disk_max_entries', 100000)
+    ) if cache_config.get('enabled', True) else None
+    
     logger.info(f"Si carica il modello di embedding: {self.model_name}")
     
     # Try to load from cache first
@@ -58,12 +69,25 @@ class ArticleEmbedder:
     embedding = self.model.encode(text, convert_to_tensor=False)
     return embedding.tolist()
   
-  def embed_batch(self, texts: List[str]) -> List[List[float]]:
+  def embed_query(self, query: str) -> np.ndarray:
+    """Generate embedding for a search query, through the query cache"""
+    if self.query_cache is not None:
+      embedding = self.query_cache.get(query, self.model_name)
+      if embedding is not None:
+        return embedding
+    
+    embedding = np.asarray(self.model.encode(query, convert_to_tensor=False), dtype=np.float32)
+    
+    if self.query_cache is not None:
+      self.query_cache.put(query, self.model_name, embedding)
+    return embedding
+  
+  def embed_batch(self, texts: List[str], show_progress_bar: bool = True) -> List[List[float]]:
     """Generate embeddings for multiple texts"""
     embeddings = self.model.encode(
       texts, 
       batch_size=self.batch_size,
-      show_progress_bar=True,
+      show_progress_bar=show_progress_bar,
       convert_to_tensor=False
     )
     return embeddings.tolist()
@@ -81,29 +105,58 @@ class ArticleEmbedder:
   def cosine_similarity(embedding1: Union[List[float], np.ndarray], 
              embedding2: Union[List[float], np.ndarray]) -> float:
     """Calculate cosine similarity between two embeddings"""
-    a = np.array(embedding1)
-    b = np.array(embedding2)
+    a = np.asarray(embedding1, dtype=np.float32)
+    b = np.asarray(embedding2, dtype=np.float32)
     return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
   
+  @staticmethod
+  def normalize_embeddings(embeddings: Union[List[List[float]], np.ndarray]) -> np.ndarray:
+    """Stack embeddings into a row-normalized float32 matrix, for top_k_similarity"""
+    return normalize_rows(embeddings)
+  
+  @staticmethod
+  def top_k_similarity(query_embeddings: Union[List, np.ndarray],
+             embedding_matrix: np.ndarray,
+             top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score one or more queries against a pre-normalized embedding matrix.
+    
+    Args:
+      query_embeddings: A single query vector, or a (q, d) matrix of queries
+      embedding_matrix: (n, d) matrix from normalize_embeddings
+      top_k: Number of results to keep per query
+    
+    Returns:
+      Tuple (indices, scores) of (q, k) arrays, best match first
+    """
+    return top_k_similarity(query_embeddings, embedding_matrix, top_k)
+  
   @staticmethod
   def rank_by_similarity(query_embedding: List[float], 
-              article_embeddings: List[tuple]) -> List[tuple]:
+              article_embeddings: List[tuple],
+              top_k: Optional[int] = None) -> List[tuple]:
     """
     Rank articles by similarity to query.
     
     Args:
       query_embedding: Query embedding vector
       article_embeddings: List of tuples (article_data, embedding)
+      top_k: Keep only the best top_k articles (default: all)
     
     Returns:
       Sorted list of tuples (article_data, embedding, similarity_score)
     """
-    scored = []
-    for article_data, embedding in article_embeddings:
-      score = ArticleEmbedder.cosine_similarity(query_embedding, embedding)
-      scored.append((article_data, embedding, score))
-    
-    # Sort by score descending
-    scored.sort(key=lambda x: x[2], reverse=True)
-    return scored
-    
\ No newline at end of file
+    if not article_embeddings:
+      return []
+    
+    matrix = normalize_rows([embedding for _, embedding in article_embeddings])
+    indices, scores = top_k_similarity(
+      query_embedding,
+      matrix,
+      top_k or len(article_embeddings)
+    )
+    
+    return [
+      (article_embeddings[i][0], article_embeddings[i][1], float(score))
+      for i, score in zip(indices[0], scores[0])
+    ]
@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from rag_journal.utils.logger import logger
+
+
+class EmbeddingStore:
+  """
+  Persistent content-addressed embedding store.
+
+  Embeddings are keyed by the sha256 of the embedded text, one directory
+  per model. Each directory holds an append-only raw float32 matrix
+  (memory-mapped for reads) and an index file with one key per row.
+  """
+
+  VECTORS_FILE = "vectors.f32"
+  KEYS_FILE = "keys.txt"
+  META_FILE = "meta.json"
+
+  def __init__(self, root: Union[str, Path], model_name: str):
+    """Open (or create) the store of a model"""
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '--', model_name)
+    self.path = Path(root) / slug
+    self.path.mkdir(parents=True, exist_ok=True)
+    self.model_name = model_name
+
+    self.dimension: Optional[int] = None
+    meta_path = self.path / self.META_FILE
+    if meta_path.exists():
+      with open(meta_path, 'r', encoding='utf-8') as f:
+        self.dimension = json.load(f)['dimension']
+
+    self._rows: Dict[str, int] = {}
+    self._matrix: Optional[np.memmap] = None
+    self._lock = threading.Lock()
+    self._load_keys()
+
+  @staticmethod
+  def text_key(text: str) -> str:
+    """Content address of a text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+  def __len__(self) -> int:
+    return len(self._rows)
+
+  def _load_keys(self):
+    """Read the key index, ignoring keys whose vectors were not fully written"""
+    keys_path = self.path / self.KEYS_FILE
+    vectors_path = self.path / self.VECTORS_FILE
+    if not self.dimension:
+      return
+
+    keys = []
+    if keys_path.exists():
+      with open(keys_path, 'r', encoding='ascii') as f:
+        keys = f.read().split()
+
+    row_bytes = self.dimension * 4
+    rows_on_disk = vectors_path.stat().st_size // row_bytes if vectors_path.exists() else 0
+    if len(keys) > rows_on_disk:
+      logger.info(f"⚠ Store degli embedding incompleto, ignorate {len(keys) - rows_on_disk} chiavi")
+      keys = keys[:rows_on_disk]
+      with open(keys_path, 'w', encoding='ascii') as f:
+        f.write(''.join(f"{key}\n" for key in keys))
+    if rows_on_disk > len(keys):
+      # Drop vectors written without their key, so rows stay aligned
+      os.truncate(vectors_path, len(keys) * row_bytes)
+
+    self._rows = {key: row for row, key in enumerate(keys)}
+
+  def _vectors(self) -> np.memmap:
+    """Memory-map the vectors file (re-mapped after appends)"""
+    if self._matrix is None or self._matrix.shape[0] < len(self._rows):
+      self._matrix = np.memmap(
+        self.path / self.VECTORS_FILE,
+        dtype=np.float32,
+        mode='r',
+        shape=(len(self._rows), self.dimension)
+      )
+    return self._matrix
+
+  def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+    """Get the stored embeddings for the given keys (missing keys are left out)"""
+    with self._lock:
+      found = [(key, self._rows[key]) for key in keys if key in self._rows]
+      if not found:
+        return {}
+      vectors = self._vectors()[[row for _, row in found]]
+    return {key: vector for (key, _), vector in zip(found, vectors)}
+
+  def put_many(self, keys: List[str], embeddings: Union[List[List[float]], np.ndarray]):
+    """Append new embeddings (keys already stored are skipped)"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if not len(keys):
+      return
+
+    with self._lock:
+      if self.dimension is None:
+        self.dimension = matrix.shape[1]
+        with open(self.path / self.META_FILE, 'w', encoding='utf-8') as f:
+          json.dump({"model_name": self.model_name, "dimension": self.dimension}, f)
+      elif matrix.shape[1] != self.dimension:
+        raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store dimension {self.dimension}")
+
+      new = {}
+      for key, vector in zip(keys, matrix):
+        if key not in self._rows and key not in new:
+          new[key] = vector
+      if not new:
+        return
+
+      # Vectors first, then keys: a crash in between leaves no dangling key
+      with open(self.path / self.VECTORS_FILE, 'ab') as f:
+        f.write(np.ascontiguousarray(list(new.values()), dtype=np.float32).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+      with open(self.path / self.KEYS_FILE, 'a', encoding='ascii') as f:
+        f.write(''.join(f"{key}\n" for key in new))
+
+      for key in new:
+        self._rows[key] = len(self._rows)
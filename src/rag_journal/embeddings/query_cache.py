@@ -0,0 +1,145 @@
+import time
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Optional
+from rag_journal.utils.lru_cache import LRUCache
+from rag_journal.utils.logger import logger
+
+
+class QueryEmbeddingCache:
+  """
+  Two-tier cache of query embeddings, keyed by model name and normalized text.
+  The memory tier is a bounded LRU; the optional disk tier (SQLite) lets
+  hot queries survive restarts, and is pruned to its least recently used
+  entries when it grows past disk_max_entries.
+  """
+
+  def __init__(
+      self,
+      size: int = 1024,
+      ttl: Optional[float] = None,
+      disk_path: Optional[str] = None,
+      disk_max_entries: int = 100000):
+    """
+    Args:
+      size: Maximum number of embeddings kept in memory
+      ttl: Entry lifetime in seconds, for both tiers (None: no expiry)
+      disk_path: SQLite file for the disk tier (None: memory only)
+      disk_max_entries: Maximum number of embeddings kept on disk
+    """
+    self.ttl = ttl
+    self.memory = LRUCache(maxsize=size, ttl=ttl)
+    self.disk_hits = 0
+    self.disk_max_entries = disk_max_entries
+    
+    # Pruning runs every tenth of the disk capacity of writes, not on every write
+    self._prune_every = max(1, disk_max_entries // 10)
+    self._writes_since_prune = 0
+
+    self._disk = None
+    self._disk_lock = threading.Lock()
+    if disk_path:
+      try:
+        Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+        self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+        self._disk.execute(
+          "CREATE TABLE IF NOT EXISTS query_embeddings ("
+          "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._disk.execute("PRAGMA table_info(query_embeddings)")}
+        if "last_used" not in columns:
+          self._disk.execute("ALTER TABLE query_embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+        self._disk.execute("CREATE INDEX IF NOT EXISTS query_embeddings_last_used ON query_embeddings (last_used)")
+        self._prune_disk()
+        self._disk.commit()
+      except sqlite3.Error as e:
+        logger.info(f"⚠ Cache su disco degli embedding non disponibile: {e}")
+        self._disk = None
+
+  @staticmethod
+  def make_key(text: str, model_name: str) -> str:
+    """Cache key: model name plus Unicode-normalized, whitespace-collapsed text"""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return f"{model_name}\x00{normalized}"
+
+  def get(self, text: str, model_name: str) -> Optional[np.ndarray]:
+    """Get a cached embedding, from memory first and then from disk"""
+    key = self.make_key(text, model_name)
+
+    embedding = self.memory.get(key)
+    if embedding is not None:
+      return embedding
+
+    if self._disk is None:
+      return None
+
+    with self._disk_lock:
+      row = self._disk.execute(
+        "SELECT embedding, created_at FROM query_embeddings WHERE key = ?", (key,)
+      ).fetchone()
+      if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+        return None
+      try:
+        self._disk.execute("UPDATE query_embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._disk.commit()
+      except sqlite3.Error:
+        pass # Recency is best effort
+
+    self.disk_hits += 1
+    embedding = np.frombuffer(row[0], dtype=np.float32)
+    self.memory.put(key, embedding)
+    return embedding
+
+  def put(self, text: str, model_name: str, embedding: np.ndarray):
+    """Store an embedding in both tiers"""
+    key = self.make_key(text, model_name)
+    embedding = np.asarray(embedding, dtype=np.float32)
+    self.memory.put(key, embedding)
+
+    if self._disk is None:
+      return
+
+    with self._disk_lock:
+      try:
+        now = time.time()
+        self._disk.execute(
+          "INSERT OR REPLACE INTO query_embeddings (key, embedding, created_at, last_used) VALUES (?, ?, ?, ?)",
+          (key, embedding.tobytes(), now, now)
+        )
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= self._prune_every:
+          self._prune_disk()
+        self._disk.commit()
+      except sqlite3.Error as e:
+        logger.info(f"⚠ Scrittura della cache su disco fallita: {e}")
+
+  def _prune_disk(self):
+    """Drop expired entries, then the least recently used ones beyond disk_max_entries (caller holds the lock)"""
+    if self.ttl:
+      self._disk.execute("DELETE FROM query_embeddings WHERE created_at < ?", (time.time() - self.ttl,))
+    self._disk.execute(
+      "DELETE FROM query_embeddings WHERE key IN ("
+      "SELECT key FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+      (self.disk_max_entries,)
+    )
+    self._writes_since_prune = 0
+
+  def disk_size(self) -> int:
+    """Number of embeddings in the disk tier"""
+    if self._disk is None:
+      return 0
+    with self._disk_lock:
+      return self._disk.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+
+  def stats(self) -> Dict[str, Any]:
+    """Get hit/miss counters; misses are queries that needed the model"""
+    stats = self.memory.stats()
+    stats["disk_hits"] = self.disk_hits
+    stats["misses"] -= self.disk_hits
+    lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+    stats["disk_size"] = self.disk_size()
+    return stats
@@ -0,0 +1,108 @@
+import time
+import hashlib
+from sentence_transformers import CrossEncoder
+from typing import Any, Dict, List, Optional, Tuple
+from rag_journal.utils.lru_cache import LRUCache
+from rag_journal.utils.logger import logger
+
+
+class CrossEncoderReranker:
+  """
+  Second-stage re-ranking of retrieved articles with a cross-encoder.
+
+  Candidates are scored in batches, best first-stage candidates first,
+  until the latency budget would be exceeded: candidates left unscored
+  are dropped. (query, text) scores are cached.
+  """
+
+  def __init__(
+      self,
+      model_name: str,
+      top_n: int = 30,
+      batch_size: int = 16,
+      latency_budget_ms: Optional[float] = 800,
+      min_score: float = 0.2,
+      max_length: int = 512,
+      max_chars: int = 2000,
+      cache_size: int = 4096):
+    """
+    Args:
+      model_name: Cross-encoder model (runs on CPU)
+      top_n: First-stage candidates re-scored
+      batch_size: Candidates scored per model call
+      latency_budget_ms: Scoring time budget per query (None: no budget)
+      min_score: Candidates scoring below this (0-1) are dropped
+      max_length: Max (query, text) tokens seen by the model
+      max_chars: Article text is cut to this many characters before tokenization
+      cache_size: Max cached (query, text) scores
+    """
+    self.model_name = model_name
+    self.top_n = top_n
+    self.batch_size = batch_size
+    self.latency_budget_ms = latency_budget_ms
+    self.min_score = min_score
+    self.max_chars = max_chars
+    self.cache = LRUCache(maxsize=cache_size)
+
+    self.budget_exceeded = 0
+    self.last_latency_ms = 0.0
+
+    logger.info(f"Si carica il modello di re-ranking: {model_name}")
+    self.model = CrossEncoder(model_name, device='cpu', max_length=max_length)
+
+  def _cache_key(self, query: str, text: str) -> Tuple[str, str]:
+    return " ".join(query.lower().split()), hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+  def rerank(self, query: str, candidates: List[Tuple[str, str]]) -> List[Tuple[str, float]]:
+    """
+    Re-score (id, text) candidates, given best first.
+
+    Returns:
+      (id, score in 0-1) pairs above min_score, best first
+    """
+    start = time.perf_counter()
+    candidates = [(item_id, text[:self.max_chars]) for item_id, text in candidates[:self.top_n]]
+
+    scores: Dict[str, float] = {}
+    pending = []
+    for item_id, text in candidates:
+      score = self.cache.get(self._cache_key(query, text))
+      if score is None:
+        pending.append((item_id, text))
+      else:
+        scores[item_id] = score
+
+    batches = 0
+    for offset in range(0, len(pending), self.batch_size):
+      elapsed_ms = (time.perf_counter() - start) * 1000
+      if batches and self.latency_budget_ms is not None:
+        # Stop if one more batch (at the average batch time so far) would not fit
+        if elapsed_ms + elapsed_ms / batches > self.latency_budget_ms:
+          self.budget_exceeded += 1
+          logger.info(f"  ⚠ Budget di re-ranking esaurito: {len(pending) - offset} candidati non valutati")
+          break
+
+      batch = pending[offset:offset + self.batch_size]
+      # Single-label cross-encoders output sigmoid scores in 0-1
+      predicted = self.model.predict([(query, text) for _, text in batch], batch_size=self.batch_size, show_progress_bar=False)
+      for (item_id, text), score in zip(batch, predicted):
+        score = float(score)
+        self.cache.put(self._cache_key(query, text), score)
+        scores[item_id] = score
+      batches += 1
+
+    self.last_latency_ms = (time.perf_counter() - start) * 1000
+
+    ranked = sorted(
+      ((item_id, scores[item_id]) for item_id, _ in candidates if item_id in scores),
+      key=lambda item: item[1],
+      reverse=True
+    )
+    return [(item_id, score) for item_id, score in ranked if score >= self.min_score]
+
+  def stats(self) -> Dict[str, Any]:
+    """Get cache counters and budget overruns"""
+    stats = self.cache.stats()
+    stats["budget_exceeded"] = self.budget_exceeded
+    stats["last_latency_ms"] = round(self.last_latency_ms, 1)
+    return stats
@@ -0,0 +1,8 @@
+from .vector_index import VectorIndex
+from .numpy_index import NumpyVectorIndex
+from .quantized_index import QuantizedVectorIndex
+from .bm25_index import BM25Index
+from .fusion import reciprocal_rank_fusion
+from .factory import create_vector_index, create_lexical_index
+
+__all__ = ['VectorIndex', 'NumpyVectorIndex', 'QuantizedVectorIndex', 'BM25Index', 'reciprocal_rank_fusion', 'create_vector_index', 'create_lexical_index']
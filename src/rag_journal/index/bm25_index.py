@@ -0,0 +1,201 @@
+import re
+import json
+import unicodedata
+import numpy as np
+import scipy.sparse as sp
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Collection, Dict, Iterator, List, Optional, Tuple
+from rag_journal.index.persisted_index import PersistedIndex
+from rag_journal.utils.logger import logger
+
+try:
+  import snowballstemmer
+  _STEMMER = snowballstemmer.stemmer('italian')
+except ImportError:
+  _STEMMER = None
+
+
+ITALIAN_STOPWORDS = frozenset("""
+a ad agli ai al alla alle allo anche avere aveva avevano c che chi ci come con contro cui da dagli dai dal dalla
+dalle dallo degli dei del della delle dello di dove e ed era erano essere gli ha hanno ho i il in io la le lei lo
+loro lui ma mi mia mie miei mio ne negli nei nel nella nelle nello noi non nostra nostre nostri nostro o per perche
+piu quale quali quando quanto quella quelle quelli quello questa queste questi questo se sei si sia siamo sono
+sua sue sui sul sulla sulle sullo suo suoi ti tra tu tua tue tuo tuoi tutti tutto un una uno vi voi gia
+ancora cosi dopo fra fino molto poi prima proprio pure sempre senza solo stato stata stati state tanto tutta
+tutte ogni altri altro altra altre essa esso essi esse
+""".split())
+
+# Light (inflectional) Italian stemmer, used when snowballstemmer is not installed
+_LIGHT_SUFFIXES = ("issimi", "issime", "issimo", "issima", "che", "chi", "ghe", "ghi", "i", "e", "a", "o")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _strip_accents(text: str) -> str:
+  return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def _light_stem(word: str) -> str:
+  for suffix in _LIGHT_SUFFIXES:
+    if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+      # Keep the hard c/g sound: "politiche" -> "politic", like "politico"
+      return word[:-len(suffix)] + (suffix[0] if suffix in ("che", "chi", "ghe", "ghi") else "")
+  return word
+
+
+def tokenize(text: str) -> List[str]:
+  """Lowercase, split (also on elisions: "l'Ucraina"), drop stopwords, stem and strip accents"""
+  tokens = []
+  for word in _WORD.findall(text.lower()):
+    plain = _strip_accents(word)
+    if len(plain) < 2 or plain in ITALIAN_STOPWORDS:
+      continue
+    if plain.isdigit():
+      tokens.append(plain)
+      continue
+    stem = _STEMMER.stemWord(word) if _STEMMER is not None else _light_stem(plain)
+    tokens.append(_strip_accents(stem))
+  return tokens
+
+
+class BM25Index(PersistedIndex):
+  """
+  In-process BM25 index over article title and full text.
+
+  BM25 term weights are computed once at build time into a sparse
+  (documents x terms) matrix, so scoring a query is the sum of the
+  matrix columns of its terms.
+  """
+
+  backend = "bm25"
+
+  WEIGHTS_FILE = "weights.npz"
+  VOCABULARY_FILE = "vocabulary.json"
+
+  def __init__(self, k1: float = 1.5, b: float = 0.75):
+    """
+    Args:
+      k1: Term frequency saturation
+      b: Document length normalization (0: none, 1: full)
+    """
+    super().__init__()
+    self.k1 = k1
+    self.b = b
+    self.clear()
+
+  def clear(self):
+    """Remove all documents"""
+    self.ids = []
+    self.vocabulary: Dict[str, int] = {}
+    self.weights = sp.csc_matrix((0, 0), dtype=np.float32)
+
+  def build(self, documents: Iterator[Tuple[str, str]], total: int = 0) -> 'BM25Index':
+    """Build the index from a stream of (id, text) pairs, of about `total` items"""
+    self.clear()
+    ids = []
+    rows, cols, counts = [], [], []
+    lengths = []
+    for item_id, text in documents:
+      terms = Counter(tokenize(text))
+      row = len(ids)
+      for term, count in terms.items():
+        rows.append(row)
+        cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+        counts.append(count)
+      ids.append(item_id)
+      lengths.append(sum(terms.values()))
+
+    n = len(ids)
+    self.ids = ids
+    self.meta = {
+      "total_documents": total,
+      "created_at": datetime.now().isoformat()
+    }
+    if not n:
+      return self
+
+    rows = np.asarray(rows, dtype=np.int32)
+    cols = np.asarray(cols, dtype=np.int32)
+    tf = np.asarray(counts, dtype=np.float32)
+    lengths = np.asarray(lengths, dtype=np.float32)
+
+    df = np.bincount(cols, minlength=len(self.vocabulary))
+    idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+    norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+    weights = idf[cols] * tf * (self.k1 + 1) / (tf + norm[rows])
+
+    # Column-compressed: a query reads only the columns of its terms
+    self.weights = sp.csc_matrix((weights, (rows, cols)), shape=(n, len(self.vocabulary)), dtype=np.float32)
+
+    logger.info(f"✓ Indice BM25 costruito: {n} documenti, {len(self.vocabulary)} termini")
+    return self
+
+  def build_from_database(self, db) -> 'BM25Index':
+    """Build the index with one pass over title and full text of all articles in MongoDB"""
+    corpus_version = db.get_corpus_version()
+    self.build(db.iter_article_texts(), db.count_by_filter({}))
+    self.meta['corpus_version'] = corpus_version
+    return self
+
+  def search(
+      self,
+      query: str,
+      top_k: int = 10,
+      allowed_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+    """
+    Return the top_k (id, BM25 score) pairs, best first, for documents matching at least one query term.
+    With allowed_ids, only those documents are ranked.
+    """
+    if not self.ids or top_k <= 0:
+      return []
+
+    cols = sorted({self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary})
+    if not cols:
+      return []
+
+    scores = np.asarray(self.weights[:, cols].sum(axis=1)).ravel()
+    if allowed_ids is not None:
+      mask = np.zeros(len(self.ids), dtype=bool)
+      mask[self._allowed_rows(allowed_ids)] = True
+      scores[~mask] = 0.0
+
+    matching = np.flatnonzero(scores > 0)
+    k = min(top_k, len(matching))
+    if k < len(matching):
+      matching = matching[np.argpartition(-scores[matching], k - 1)[:k]]
+    order = matching[np.argsort(-scores[matching], kind='stable')]
+    return [(self.ids[row], float(scores[row])) for row in order]
+
+  def _save_files(self, path: Path):
+    """Write the index files into an empty directory"""
+    path.mkdir(parents=True, exist_ok=True)
+    sp.save_npz(path / self.WEIGHTS_FILE, self.weights, compressed=False)
+    terms = sorted(self.vocabulary, key=self.vocabulary.get)
+    with open(path / self.VOCABULARY_FILE, 'w', encoding='utf-8') as f:
+      json.dump(terms, f, ensure_ascii=False)
+    self._write_meta(path, k1=self.k1, b=self.b)
+
+  def _load_files(self, path: Path) -> bool:
+    """Read the index files from a directory, returning False if missing or not compatible"""
+    stored = self._read_meta(path, self.WEIGHTS_FILE, self.VOCABULARY_FILE)
+    if stored is None:
+      return False
+
+    ids, meta = stored
+    if (meta.pop('k1', None), meta.pop('b', None)) != (self.k1, self.b):
+      return False
+
+    weights = sp.load_npz(path / self.WEIGHTS_FILE).tocsc()
+    with open(path / self.VOCABULARY_FILE, 'r', encoding='utf-8') as f:
+      terms = json.load(f)
+    if weights.shape != (len(ids), len(terms)) and len(ids):
+      logger.info(f"⚠ Indice BM25 in {path} non coerente, verrà ricostruito")
+      return False
+
+    self.ids = ids
+    self.meta = meta
+    self.weights = weights
+    self.vocabulary = {term: col for col, term in enumerate(terms)}
+    return True
@@ -0,0 +1,39 @@
+from typing import Dict
+from rag_journal.index.vector_index import VectorIndex
+from rag_journal.index.bm25_index import BM25Index
+from rag_journal.index.numpy_index import NumpyVectorIndex
+from rag_journal.index.quantized_index import QuantizedVectorIndex
+
+
+def create_vector_index(config: Dict) -> VectorIndex:
+  """Factory function to create an empty vector index of the configured backend"""
+  retrieval_config = config['retrieval']
+  backend = retrieval_config.get('index_backend', 'numpy')
+  
+  if backend == "numpy":
+    return NumpyVectorIndex(mmap=retrieval_config.get('mmap', True))
+  
+  elif backend == "faiss_hnsw":
+    from rag_journal.index.faiss_index import FaissHNSWIndex
+    hnsw_config = retrieval_config.get('hnsw', {})
+    return FaissHNSWIndex(
+      m=hnsw_config.get('m', 32),
+      ef_construction=hnsw_config.get('ef_construction', 200),
+      ef_search=hnsw_config.get('ef_search', 128)
+    )
+  
+  elif backend == "quantized":
+    quantization_config = retrieval_config.get('quantization', {})
+    return QuantizedVectorIndex(
+      dtype=quantization_config.get('dtype', 'int8'),
+      rerank_candidates=quantization_config.get('rerank_candidates', 200)
+    )
+  
+  else:
+    raise ValueError(f"Unknown index backend: {backend}. Use 'numpy', 'faiss_hnsw' or 'quantized'")
+
+
+def create_lexical_index(config: Dict) -> BM25Index:
+  """Factory function to create an empty BM25 index with the configured parameters"""
+  lexical_config = config['retrieval'].get('lexical', {})
+  return BM25Index(k1=lexical_config.get('k1', 1.5), b=lexical_config.get('b', 0.75))
@@ -0,0 +1,190 @@
+import numpy as np
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Set, Tuple, Union
+from rag_journal.index.similarity import normalize_rows, top_k_similarity
+from rag_journal.index.vector_index import VectorIndex
+from rag_journal.utils.logger import logger
+
+
+class FaissHNSWIndex(VectorIndex):
+  """
+  Approximate nearest-neighbour index on a FAISS HNSW graph.
+
+  Vectors are L2-normalized and compared by inner product (cosine).
+  HNSW graphs do not support deletion, so removed vectors are tombstoned
+  and filtered out of results; the graph is rebuilt when tombstones exceed
+  a quarter of the rows.
+  """
+
+  backend = "faiss_hnsw"
+
+  INDEX_FILE = "index.faiss"
+
+  # Filtered searches over at most this many rows are exact, without the graph
+  EXACT_SUBSET_ROWS = 20000
+
+  def __init__(self, m: int = 32, ef_construction: int = 200, ef_search: int = 128):
+    """
+    Args:
+      m: Graph degree (higher: better recall, more memory)
+      ef_construction: Candidate list size while building
+      ef_search: Candidate list size while searching (higher: better recall, slower)
+    """
+    import faiss
+
+    super().__init__()
+    self.faiss = faiss
+    self.m = m
+    self.ef_construction = ef_construction
+    self.ef_search = ef_search
+    self.clear()
+
+  def __len__(self) -> int:
+    return len(self._rows)
+
+  def clear(self):
+    """Remove all vectors"""
+    self.index = None
+    self.ids = [] # one id per graph row, including removed ones
+    self._rows: Dict[str, int] = {}
+    self._deleted: Set[int] = set()
+
+  def _new_index(self, dimension: int):
+    index = self.faiss.IndexHNSWFlat(dimension, self.m, self.faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = self.ef_construction
+    return index
+
+  def add(self, ids: List[str], embeddings: Union[List, np.ndarray]):
+    """Add vectors (an id already present is replaced)"""
+    vectors = normalize_rows(embeddings)
+    if vectors.shape[0] != len(ids):
+      raise ValueError(f"Got {len(ids)} ids for {vectors.shape[0]} embeddings")
+
+    self.remove(ids)
+    if self.index is None:
+      self.index = self._new_index(vectors.shape[1])
+
+    first_row = len(self.ids)
+    self.index.add(vectors)
+    self.ids.extend(ids)
+    for offset, item_id in enumerate(ids):
+      self._rows[item_id] = first_row + offset
+
+  def remove(self, ids: List[str]) -> int:
+    """Remove vectors by id, returning how many were removed"""
+    removed = 0
+    for item_id in ids:
+      row = self._rows.pop(item_id, None)
+      if row is not None:
+        self._deleted.add(row)
+        removed += 1
+
+    if self._deleted and len(self._deleted) > len(self.ids) / 4:
+      self._compact()
+    return removed
+
+  def _compact(self):
+    """Rebuild the graph without tombstoned rows"""
+    live = sorted(self._rows.values())
+    vectors = self.index.reconstruct_n(0, self.index.ntotal)[live] if live else None
+    ids = [self.ids[row] for row in live]
+
+    dimension = self.index.d
+    self.clear()
+    if ids:
+      self.index = self._new_index(dimension)
+      self.index.add(vectors)
+      self.ids = ids
+      self._rows = {item_id: row for row, item_id in enumerate(ids)}
+
+  def search(
+      self,
+      query_embedding: Union[List[float], np.ndarray],
+      top_k: int = 10,
+      allowed_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+    """
+    Return the top_k (id, cosine similarity) pairs, best first.
+    With allowed_ids, only those vectors are ranked (ids not in the index are ignored).
+    """
+    if not len(self) or top_k <= 0:
+      return []
+
+    if allowed_ids is not None:
+      return self._search_subset(query_embedding, top_k, allowed_ids)
+
+    # Over-fetch to make up for tombstoned rows
+    k = min(top_k + len(self._deleted), self.index.ntotal)
+    self.index.hnsw.efSearch = max(self.ef_search, k)
+    scores, rows = self.index.search(normalize_rows(query_embedding), k)
+
+    results = []
+    for row, score in zip(rows[0], scores[0]):
+      if row < 0 or row in self._deleted:
+        continue
+      results.append((self.ids[row], float(score)))
+      if len(results) >= top_k:
+        break
+    return results
+
+  def _allowed_rows(self, allowed_ids: Collection[str]) -> np.ndarray:
+    """Sorted row numbers of the given ids, leaving out removed ones"""
+    return np.unique(np.fromiter(
+      (self._rows[item_id] for item_id in allowed_ids if item_id in self._rows),
+      dtype=np.int64
+    ))
+
+  def _search_subset(
+      self,
+      query_embedding: Union[List[float], np.ndarray],
+      top_k: int,
+      allowed_ids: Collection[str]) -> List[Tuple[str, float]]:
+    """
+    Top-k restricted to some ids: exact over the reconstructed vectors for
+    small subsets (where graph search loses recall), graph search with an
+    id selector otherwise
+    """
+    rows = self._allowed_rows(allowed_ids)
+    if not len(rows):
+      return []
+
+    if len(rows) <= self.EXACT_SUBSET_ROWS:
+      indices, scores = top_k_similarity(query_embedding, self.index.reconstruct_batch(rows), top_k)
+      return [(self.ids[rows[i]], float(score)) for i, score in zip(indices[0], scores[0])]
+
+    k = min(top_k, len(rows))
+    params = self.faiss.SearchParametersHNSW(
+      sel=self.faiss.IDSelectorBatch(rows),
+      efSearch=max(self.ef_search, k)
+    )
+    scores, found = self.index.search(normalize_rows(query_embedding), k, params=params)
+    return [(self.ids[row], float(score)) for row, score in zip(found[0], scores[0]) if row >= 0]
+
+  def _save_files(self, path: Path):
+    """Write the index files into an empty directory"""
+    path.mkdir(parents=True, exist_ok=True)
+    if self.index is not None:
+      self.faiss.write_index(self.index, str(path / self.INDEX_FILE))
+    self._write_meta(path, deleted=sorted(self._deleted))
+
+  def _load_files(self, path: Path) -> bool:
+    """Read the index files from a directory, returning False if missing or not compatible"""
+    stored = self._read_meta(path)
+    if stored is None:
+      return False
+
+    ids, meta = stored
+    self.clear()
+    if ids:
+      if not (path / self.INDEX_FILE).exists():
+        return False
+      self.index = self.faiss.read_index(str(path / self.INDEX_FILE))
+      if self.index.ntotal != len(ids):
+        logger.info(f"⚠ Indice vettoriale in {path} non coerente, verrà ricostruito")
+        self.clear()
+        return False
+
+    self._deleted = set(meta.pop('deleted', []))
+    self.ids = ids
+    self._rows = {item_id: row for row, item_id in enumerate(ids) if row not in self._deleted}
+    self.meta = meta
+    return True
@@ -0,0 +1,16 @@
+from typing import Dict, List, Tuple
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[str, float]]], k: int = 60) -> List[Tuple[str, float]]:
+  """
+  Merge rankings of (id, score) pairs with reciprocal rank fusion.
+
+  Each id scores sum(1 / (k + rank)) over the rankings it appears in, so
+  only ranks matter and scores on different scales (cosine, BM25) can be
+  combined. Returns (id, fused score) pairs, best first.
+  """
+  fused: Dict[str, float] = {}
+  for ranking in rankings:
+    for rank, (item_id, _) in enumerate(ranking, start=1):
+      fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+  return sorted(fused.items(), key=lambda item: item[1], reverse=True)
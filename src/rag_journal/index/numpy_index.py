@@ -0,0 +1,102 @@
+import numpy as np
+from pathlib import Path
+from typing import Collection, List, Optional, Tuple, Union
+from rag_journal.index.similarity import normalize_rows, top_k_similarity
+from rag_journal.index.vector_index import VectorIndex
+from rag_journal.utils.logger import logger
+
+
+class NumpyVectorIndex(VectorIndex):
+  """
+  Exact in-process vector index.
+
+  All embeddings live in one contiguous float32 matrix, L2-normalized at
+  build time, so a top-k query is a single matrix-vector product.
+  """
+
+  backend = "numpy"
+
+  MATRIX_FILE = "embeddings.npy"
+
+  def __init__(self, mmap: bool = False):
+    """
+    Args:
+      mmap: Memory-map the matrix file on load instead of reading it, so
+        processes loading the same index share one page-cache copy
+    """
+    super().__init__()
+    self.mmap = mmap
+    self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+  def clear(self):
+    """Remove all vectors"""
+    self.ids = []
+    self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+  def add(self, ids: List[str], embeddings: Union[List, np.ndarray]):
+    """Add vectors (an id already present is replaced)"""
+    vectors = normalize_rows(embeddings)
+    if vectors.shape[0] != len(ids):
+      raise ValueError(f"Got {len(ids)} ids for {vectors.shape[0]} embeddings")
+
+    self.remove(ids)
+    if len(self.ids):
+      self.matrix = np.concatenate([self.matrix, vectors])
+    else:
+      self.matrix = np.ascontiguousarray(vectors)
+    self.ids = self.ids + list(ids)
+
+  def remove(self, ids: List[str]) -> int:
+    """Remove vectors by id, returning how many were removed"""
+    to_remove = set(ids)
+    keep = [i for i, item_id in enumerate(self.ids) if item_id not in to_remove]
+    removed = len(self.ids) - len(keep)
+    if removed:
+      self.matrix = self.matrix[keep]
+      self.ids = [self.ids[i] for i in keep]
+    return removed
+
+  def search(
+      self,
+      query_embedding: Union[List[float], np.ndarray],
+      top_k: int = 10,
+      allowed_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+    """
+    Return the top_k (id, cosine similarity) pairs, best first.
+    With allowed_ids, only those vectors are ranked (ids not in the index are ignored).
+    """
+    if not self.ids or top_k <= 0:
+      return []
+
+    if allowed_ids is None:
+      indices, scores = top_k_similarity(query_embedding, self.matrix, top_k)
+      rows = indices[0]
+    else:
+      subset = self._allowed_rows(allowed_ids)
+      indices, scores = top_k_similarity(query_embedding, self.matrix[subset], top_k)
+      rows = subset[indices[0]]
+
+    return [(self.ids[i], float(score)) for i, score in zip(rows, scores[0])]
+
+  def _save_files(self, path: Path):
+    """Write the index files into an empty directory"""
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / self.MATRIX_FILE, np.ascontiguousarray(self.matrix, dtype=np.float32))
+    self._write_meta(path)
+
+  def _load_files(self, path: Path) -> bool:
+    """Read the index files from a directory, returning False if missing or not compatible"""
+    stored = self._read_meta(path, self.MATRIX_FILE)
+    if stored is None:
+      return False
+
+    ids, meta = stored
+    matrix = np.load(path / self.MATRIX_FILE, mmap_mode='r' if self.mmap else None)
+    if matrix.shape[0] != len(ids):
+      logger.info(f"⚠ Indice vettoriale in {path} non coerente, verrà ricostruito")
+      return False
+
+    self.ids = ids
+    self.meta = meta
+    self.matrix = matrix
+    return True
@@ -0,0 +1,121 @@
+import os
+import json
+import shutil
+import numpy as np
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Tuple, Union
+
+
+class PersistedIndex(ABC):
+  """
+  Base class for indexes persisted to disk.
+
+  An index holds one row per string id (article_id, passage_id). Saved
+  indexes live in generation directories under a CURRENT pointer, so a
+  rebuild never disturbs processes reading the previous one.
+  """
+
+  backend: str = None
+
+  IDS_FILE = "ids.json"
+  META_FILE = "meta.json"
+  CURRENT_FILE = "CURRENT"
+
+  def __init__(self):
+    """Initialize an empty index"""
+    self.ids: List[str] = []
+    self.meta: Dict = {}
+    self.generation: Optional[str] = None
+    self._positions_of: Optional[List[str]] = None
+    self._positions: Dict[str, int] = {}
+
+  def __len__(self) -> int:
+    return len(self.ids)
+
+  def _allowed_rows(self, allowed_ids: Collection[str]) -> np.ndarray:
+    """Sorted row numbers of the given ids"""
+    if self._positions_of is not self.ids:
+      # Rebuilt only when the ids list is replaced
+      self._positions = {item_id: row for row, item_id in enumerate(self.ids)}
+      self._positions_of = self.ids
+
+    rows = np.fromiter(
+      (self._positions[item_id] for item_id in allowed_ids if item_id in self._positions),
+      dtype=np.intp
+    )
+    return np.unique(rows)
+
+  @abstractmethod
+  def _save_files(self, path: Path):
+    """Write the index files into an empty directory"""
+    pass
+
+  @abstractmethod
+  def _load_files(self, path: Path) -> bool:
+    """Read the index files from a directory, returning False if missing or not compatible"""
+    pass
+
+  def save(self, path: Union[str, Path]):
+    """
+    Persist the index to a directory, atomically.
+    Files go to a new generation subdirectory, then the CURRENT pointer is
+    swapped with a rename: readers see either the old or the new index,
+    never a mix. Processes still mapping an old generation keep working.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    generation = f"gen-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}"
+    self._save_files(path / generation)
+    
+    tmp_pointer = path / f"{self.CURRENT_FILE}.{os.getpid()}.tmp"
+    tmp_pointer.write_text(generation, encoding='utf-8')
+    os.replace(tmp_pointer, path / self.CURRENT_FILE)
+    self.generation = generation
+
+    # Keep the previous generation for readers that are switching over
+    generations = sorted(p for p in path.glob("gen-*") if p.is_dir() and p.name != generation)
+    for old in generations[:-1]:
+      shutil.rmtree(old, ignore_errors=True)
+
+  def load(self, path: Union[str, Path]) -> bool:
+    """Load a persisted index, returning False if missing or not compatible"""
+    path = Path(path)
+    generation = self.current_generation(path)
+    if generation is None:
+      return False
+
+    if not self._load_files(path / generation):
+      return False
+    self.generation = generation
+    return True
+
+  @classmethod
+  def current_generation(cls, path: Union[str, Path]) -> Optional[str]:
+    """Name of the generation the CURRENT pointer refers to, if any"""
+    try:
+      return (Path(path) / cls.CURRENT_FILE).read_text(encoding='utf-8').strip() or None
+    except OSError:
+      return None
+
+  def _write_meta(self, path: Path, **extra):
+    """Write ids and metadata files"""
+    with open(path / self.IDS_FILE, 'w', encoding='utf-8') as f:
+      json.dump(self.ids, f)
+    with open(path / self.META_FILE, 'w', encoding='utf-8') as f:
+      json.dump({**self.meta, **extra, "backend": self.backend}, f)
+
+  def _read_meta(self, path: Path, *required: str) -> Optional[Tuple[List[str], Dict]]:
+    """Read ids and metadata files, or None if missing or from another backend"""
+    if not all((path / name).exists() for name in (self.IDS_FILE, self.META_FILE) + required):
+      return None
+
+    with open(path / self.META_FILE, 'r', encoding='utf-8') as f:
+      meta = json.load(f)
+    if meta.get('backend', 'numpy') != self.backend:
+      return None
+    with open(path / self.IDS_FILE, 'r', encoding='utf-8') as f:
+      ids = json.load(f)
+    return ids, meta
@@ -0,0 +1,184 @@
+import numpy as np
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Tuple, Union
+from rag_journal.index.numpy_index import NumpyVectorIndex
+from rag_journal.index.similarity import normalize_rows
+from rag_journal.utils.logger import logger
+
+
+class QuantizedVectorIndex(NumpyVectorIndex):
+  """
+  Exact-reranked vector index over quantized vectors.
+
+  The first pass scans int8 (per-row scalar quantized) or float16 copies
+  of the embeddings, held in memory. The best `rerank_candidates` rows are
+  then re-scored against the float32 matrix, which is memory-mapped: only
+  the candidate rows are ever read from disk.
+  """
+
+  backend = "quantized"
+
+  CODES_FILE = "codes.npy"
+  SCALES_FILE = "scales.npy"
+
+  DTYPES = ("int8", "float16")
+
+  # Rows converted to float32 at a time during the first pass
+  BLOCK_ROWS = 16384
+
+  def __init__(self, dtype: str = "int8", rerank_candidates: int = 200):
+    """
+    Args:
+      dtype: Quantized type, "int8" or "float16"
+      rerank_candidates: First-pass candidates re-scored in float32 (0: no re-ranking)
+    """
+    if dtype not in self.DTYPES:
+      raise ValueError(f"Unknown quantization type: {dtype}. Use one of {self.DTYPES}")
+
+    self.dtype = dtype
+    self.rerank_candidates = rerank_candidates
+    super().__init__(mmap=True)
+    self.clear()
+
+  def clear(self):
+    """Remove all vectors"""
+    super().clear()
+    self.codes = np.zeros((0, 0), dtype=self.dtype)
+    self.scales: Optional[np.ndarray] = np.zeros(0, dtype=np.float32) if self.dtype == "int8" else None
+
+  def quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Quantize normalized rows, returning (codes, per-row scales or None)"""
+    if self.dtype == "float16":
+      return vectors.astype(np.float16), None
+
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+  def add(self, ids: List[str], embeddings: Union[List, np.ndarray]):
+    """Add vectors (an id already present is replaced)"""
+    super().add(ids, embeddings)
+
+    codes, scales = self.quantize(np.asarray(self.matrix[len(self.ids) - len(ids):]))
+    if len(self.codes):
+      self.codes = np.concatenate([self.codes, codes])
+      if scales is not None:
+        self.scales = np.concatenate([self.scales, scales])
+    else:
+      self.codes = codes
+      self.scales = scales
+
+  def remove(self, ids: List[str]) -> int:
+    """Remove vectors by id, returning how many were removed"""
+    to_remove = set(ids)
+    keep = [i for i, item_id in enumerate(self.ids) if item_id not in to_remove]
+    if len(keep) < len(self.ids):
+      self.codes = self.codes[keep]
+      if self.scales is not None:
+        self.scales = self.scales[keep]
+    return super().remove(ids)
+
+  def _approximate_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """First-pass similarity of a normalized query with every quantized row (or the given rows)"""
+    n = len(self.ids) if rows is None else len(rows)
+    scores = np.empty(n, dtype=np.float32)
+    for start in range(0, n, self.BLOCK_ROWS):
+      stop = start + self.BLOCK_ROWS
+      codes = self.codes[start:stop] if rows is None else self.codes[rows[start:stop]]
+      scores[start:stop] = codes.astype(np.float32) @ query
+    if self.scales is not None:
+      scores *= self.scales if rows is None else self.scales[rows]
+    return scores
+
+  def search(
+      self,
+      query_embedding: Union[List[float], np.ndarray],
+      top_k: int = 10,
+      allowed_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+    """
+    Return the top_k (id, cosine similarity) pairs, best first.
+    With allowed_ids, only those vectors are ranked (ids not in the index are ignored).
+    """
+    if not self.ids or top_k <= 0:
+      return []
+
+    rows = self._allowed_rows(allowed_ids) if allowed_ids is not None else np.arange(len(self.ids))
+    if not len(rows):
+      return []
+
+    query = normalize_rows(query_embedding)[0]
+    scores = self._approximate_scores(query, rows if allowed_ids is not None else None)
+
+    k = min(max(self.rerank_candidates, top_k), len(rows))
+    candidates = rows[np.argpartition(-scores, k - 1)[:k]] if k < len(rows) else rows
+
+    if self.rerank_candidates:
+      # Sorted rows: sequential reads from the memory-mapped matrix
+      candidates = np.sort(candidates)
+      scores = np.asarray(self.matrix[candidates]) @ query
+    else:
+      scores = scores[np.searchsorted(rows, candidates)]
+
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    return [(self.ids[candidates[i]], float(scores[i])) for i in order]
+
+  def memory_stats(self) -> Dict[str, float]:
+    """Resident size of the first-pass vectors compared to a float32 matrix"""
+    float32_bytes = len(self.ids) * (self.codes.shape[1] if self.codes.ndim == 2 else 0) * 4
+    quantized_bytes = self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+    return {
+      "vectors": len(self.ids),
+      "float32_mb": round(float32_bytes / 2**20, 2),
+      "quantized_mb": round(quantized_bytes / 2**20, 2),
+      "saved_mb": round((float32_bytes - quantized_bytes) / 2**20, 2),
+      "compression": round(float32_bytes / quantized_bytes, 2) if quantized_bytes else 0.0
+    }
+
+  def _log_memory(self):
+    stats = self.memory_stats()
+    logger.info(
+      f"✓ Indice quantizzato ({self.dtype}): {stats['quantized_mb']} MB in memoria "
+      f"invece di {stats['float32_mb']} MB ({stats['saved_mb']} MB risparmiati)"
+    )
+
+  def build_from_stream(self, embeddings, total: int) -> 'QuantizedVectorIndex':
+    """Build the index from a stream of (id, embedding) pairs, of about `total` items"""
+    super().build_from_stream(embeddings, total)
+    self._log_memory()
+    return self
+
+  def _save_files(self, path: Path):
+    """Write the index files into an empty directory"""
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / self.MATRIX_FILE, np.ascontiguousarray(self.matrix, dtype=np.float32))
+    np.save(path / self.CODES_FILE, self.codes)
+    if self.scales is not None:
+      np.save(path / self.SCALES_FILE, self.scales)
+    self._write_meta(path, quantization=self.dtype)
+
+    # Drop the in-memory float32 copy: re-ranking reads the saved file from now on
+    self.matrix = np.load(path / self.MATRIX_FILE, mmap_mode='r')
+
+  def _load_files(self, path: Path) -> bool:
+    """Read the index files from a directory, returning False if missing or not compatible"""
+    required = (self.MATRIX_FILE, self.CODES_FILE) + ((self.SCALES_FILE,) if self.dtype == "int8" else ())
+    stored = self._read_meta(path, *required)
+    if stored is None or stored[1].get('quantization') != self.dtype:
+      return False
+
+    ids, meta = stored
+    matrix = np.load(path / self.MATRIX_FILE, mmap_mode='r')
+    codes = np.load(path / self.CODES_FILE)
+    if matrix.shape[0] != len(ids) or codes.shape[0] != len(ids):
+      logger.info(f"⚠ Indice vettoriale in {path} non coerente, verrà ricostruito")
+      return False
+
+    meta.pop('quantization')
+    self.ids = ids
+    self.meta = meta
+    self.matrix = matrix
+    self.codes = codes
+    self.scales = np.load(path / self.SCALES_FILE) if self.dtype == "int8" else None
+    self._log_memory()
+    return True
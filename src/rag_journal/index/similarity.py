@@ -0,0 +1,48 @@
+import numpy as np
+from typing import List, Tuple, Union
+
+
+def normalize_rows(vectors: Union[List, np.ndarray]) -> np.ndarray:
+  """Return a float32, L2 row-normalized 2D copy of vectors"""
+  matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+  norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+  norms[norms == 0] = 1.0
+  matrix /= norms
+  return matrix
+
+
+def top_k_similarity(
+    query_embeddings: Union[List, np.ndarray],
+    embedding_matrix: np.ndarray,
+    top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  Batched cosine similarity top-k.
+
+  Args:
+    query_embeddings: One query vector or a (q, d) matrix of query vectors
+    embedding_matrix: (n, d) matrix, already row-normalized
+    top_k: Number of results per query
+
+  Returns:
+    (indices, scores), both shaped (q, k) and sorted by score descending
+  """
+  queries = normalize_rows(query_embeddings)
+  n = embedding_matrix.shape[0]
+  k = min(top_k, n)
+
+  if k <= 0:
+    empty = np.zeros((queries.shape[0], 0))
+    return empty.astype(np.intp), empty.astype(np.float32)
+
+  # One BLAS call for all queries
+  scores = queries @ embedding_matrix.T
+
+  if k < n:
+    indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+  else:
+    indices = np.broadcast_to(np.arange(n), scores.shape)
+  top_scores = np.take_along_axis(scores, indices, axis=1)
+
+  # Sort only the k selected entries
+  order = np.argsort(-top_scores, axis=1, kind='stable')
+  return np.take_along_axis(indices, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
@@ -0,0 +1,82 @@
+import numpy as np
+from abc import abstractmethod
+from datetime import datetime
+from typing import Collection, Iterator, List, Optional, Tuple, Union
+from rag_journal.index.persisted_index import PersistedIndex
+from rag_journal.utils.logger import logger
+
+
+class VectorIndex(PersistedIndex):
+  """
+  Base class for vector indexes.
+
+  An index maps string ids (article_id, passage_id) to embeddings and
+  answers top-k queries by cosine similarity.
+  """
+
+  @abstractmethod
+  def clear(self):
+    """Remove all vectors"""
+    pass
+
+  @abstractmethod
+  def add(self, ids: List[str], embeddings: Union[List, np.ndarray]):
+    """Add vectors (an id already present is replaced)"""
+    pass
+
+  @abstractmethod
+  def remove(self, ids: List[str]) -> int:
+    """Remove vectors by id, returning how many were removed"""
+    pass
+
+  @abstractmethod
+  def search(
+      self,
+      query_embedding: Union[List[float], np.ndarray],
+      top_k: int = 10,
+      allowed_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+    """
+    Return the top_k (id, cosine similarity) pairs, best first.
+    With allowed_ids, only those vectors are ranked (ids not in the index are ignored).
+    """
+    pass
+
+  def build(self, ids: List[str], embeddings: Union[List, np.ndarray]):
+    """Replace index content with the given ids and embeddings"""
+    self.clear()
+    if len(ids):
+      self.add(ids, embeddings)
+
+  def build_from_stream(self, embeddings: Iterator[Tuple[str, np.ndarray]], total: int) -> 'VectorIndex':
+    """Build the index from a stream of (id, embedding) pairs, of about `total` items"""
+    ids = []
+    matrix = None
+    for item_id, embedding in embeddings:
+      if matrix is None:
+        # Preallocate once the dimension is known, to avoid a list of lists
+        matrix = np.empty((max(total, 1), len(embedding)), dtype=np.float32)
+      if len(ids) >= matrix.shape[0]:
+        # Collection grew while reading
+        matrix = np.concatenate([matrix, np.empty_like(matrix)])
+      matrix[len(ids)] = embedding
+      ids.append(item_id)
+
+    self.build(ids, matrix[:len(ids)] if matrix is not None else [])
+    self.meta = {
+      "total_documents": total,
+      "created_at": datetime.now().isoformat()
+    }
+
+    logger.info(f"✓ Indice vettoriale ({self.backend}) costruito: {len(self)} vettori")
+    return self
+
+  def build_from_database(self, db, passages: bool = False) -> 'VectorIndex':
+    """Build the index with one pass over all article (or passage) embeddings in MongoDB"""
+    # Read the version first: a concurrent ingestion makes the index stale, not silently wrong
+    corpus_version = db.get_corpus_version()
+    if passages:
+      self.build_from_stream(db.iter_passage_embeddings(), db.count_passages())
+    else:
+      self.build_from_stream(db.iter_embeddings(), db.count_by_filter({}))
+    self.meta['corpus_version'] = corpus_version
+    return self
@@ -0,0 +1,3 @@
+from .chunking import chunk_text
+
+__all__ = ['chunk_text']
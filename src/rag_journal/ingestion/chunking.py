@@ -0,0 +1,32 @@
+import re
+from typing import Dict, List
+
+_WORD = re.compile(r'\S+')
+
+
+def chunk_text(text: str, size: int = 200, overlap: int = 40) -> List[Dict]:
+  """
+  Split text into overlapping passages of `size` words.
+  Word windows as in scripts/download_articles.py, but each passage keeps
+  its character offsets in the original text.
+  
+  Returns:
+    List of dicts {"position", "start", "end", "text"}
+  """
+  if overlap >= size:
+    raise ValueError(f"Chunk overlap ({overlap}) must be smaller than chunk size ({size})")
+  
+  words = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+  chunks = []
+  for i in range(0, len(words), size - overlap):
+    window = words[i:i + size]
+    start, end = window[0][0], window[-1][1]
+    chunks.append({
+      "position": len(chunks),
+      "start": start,
+      "end": end,
+      "text": text[start:end]
+    })
+    if i + size >= len(words):
+      break
+  return chunks
@@ -0,0 +1,166 @@
+import os
+from typing import Dict, Any, AsyncIterator, List
+from abc import ABC, abstractmethod
+from rag_journal.llm.llm_client import OpenAIClient, AnthropicClient, OpenAIStreamAccumulator
+
+
+class AsyncLLMClient(ABC):
+  """Base class for asyncio LLM clients"""
+
+  @abstractmethod
+  async def generate_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Dict[str, Any]:
+    """Generate response with tool calling support"""
+    pass
+
+  @abstractmethod
+  def stream_with_tools(self, messages: List[Dict], tools: List[Dict]) -> AsyncIterator[Dict[str, Any]]:
+    """Generate response with tool calling support, streaming the text (events as in LLMClient.stream_with_tools)"""
+    pass
+
+  @abstractmethod
+  async def generate(self, prompt: str, max_tokens: int = None) -> str:
+    """Simple text generation"""
+    pass
+
+
+def _api_settings(config: Dict) -> Dict[str, Any]:
+  """Model, limits and API key of the configured provider"""
+  api_config = config['models']['api']
+
+  # Get API key from environment
+  api_key_env_var = api_config['api_key_env']
+  api_key = os.environ.get(api_key_env_var)
+  if not api_key:
+    raise ValueError(f"Missing {api_key_env_var} environment variable")
+
+  return {
+    "api_key": api_key,
+    "model": api_config['model'],
+    "max_tokens": api_config.get('max_tokens', 2000),
+    "temperature": api_config.get('temperature', 0.1),
+    "prompt_caching": api_config.get('prompt_caching', True)
+  }
+
+
+class AsyncOpenAIClient(AsyncLLMClient):
+  """OpenAI API asyncio client"""
+
+  def __init__(self, config: Dict):
+    from openai import AsyncOpenAI
+
+    settings = _api_settings(config)
+    self.config = config
+    self.client = AsyncOpenAI(api_key=settings['api_key'])
+    self.model = settings['model']
+    self.max_tokens = settings['max_tokens']
+    self.temperature = settings['temperature']
+    self.cache_options = OpenAIClient.prompt_cache_options(config['models']['api'])
+
+  async def generate_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Dict[str, Any]:
+    """Generate with function calling"""
+    response = await self.client.chat.completions.create(
+      model=self.model,
+      messages=OpenAIClient.convert_messages(messages),
+      tools=OpenAIClient.convert_tools(tools),
+      tool_choice="auto",
+      max_tokens=self.max_tokens,
+      temperature=self.temperature,
+      **self.cache_options
+    )
+    return OpenAIClient.parse_response(response)
+
+  async def stream_with_tools(self, messages: List[Dict], tools: List[Dict]) -> AsyncIterator[Dict[str, Any]]:
+    """Generate with function calling, streaming the text"""
+    stream = await self.client.chat.completions.create(
+      model=self.model,
+      messages=OpenAIClient.convert_messages(messages),
+      tools=OpenAIClient.convert_tools(tools),
+      tool_choice="auto",
+      max_tokens=self.max_tokens,
+      temperature=self.temperature,
+      stream=True,
+      stream_options={"include_usage": True},
+      **self.cache_options
+    )
+
+    accumulator = OpenAIStreamAccumulator()
+    async for chunk in stream:
+      text = accumulator.add(chunk)
+      if text:
+        yield {"type": "text", "text": text}
+
+    yield {"type": "response", "response": accumulator.response()}
+
+  async def generate(self, prompt: str, max_tokens: int = None) -> str:
+    """Simple generation"""
+    response = await self.client.chat.completions.create(
+      model=self.model,
+      messages=[{"role": "user", "content": prompt}],
+      max_tokens=max_tokens or self.max_tokens,
+      temperature=self.temperature
+    )
+    return response.choices[0].message.content
+
+
+class AsyncAnthropicClient(AsyncLLMClient):
+  """Anthropic API asyncio client"""
+
+  def __init__(self, config: Dict):
+    import anthropic
+
+    settings = _api_settings(config)
+    self.config = config
+    self.client = anthropic.AsyncAnthropic(api_key=settings['api_key'])
+    self.model = settings['model']
+    self.max_tokens = settings['max_tokens']
+    self.temperature = settings['temperature']
+    self.prompt_caching = settings['prompt_caching']
+
+  async def generate_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Dict[str, Any]:
+    """Generate with tool use"""
+    response = await self.client.messages.create(
+      model=self.model,
+      max_tokens=self.max_tokens,
+      temperature=self.temperature,
+      **AnthropicClient.prepare_request(messages, tools, self.prompt_caching)
+    )
+    return AnthropicClient.parse_response(response)
+
+  async def stream_with_tools(self, messages: List[Dict], tools: List[Dict]) -> AsyncIterator[Dict[str, Any]]:
+    """Generate with tool use, streaming the text (tool inputs are assembled by the SDK)"""
+    async with self.client.messages.stream(
+      model=self.model,
+      max_tokens=self.max_tokens,
+      temperature=self.temperature,
+      **AnthropicClient.prepare_request(messages, tools, self.prompt_caching)
+    ) as stream:
+      async for text in stream.text_stream:
+        yield {"type": "text", "text": text}
+      message = await stream.get_final_message()
+
+    yield {"type": "response", "response": AnthropicClient.parse_response(message)}
+
+  async def generate(self, prompt: str, max_tokens: int = None) -> str:
+    """Simple generation"""
+    response = await self.client.messages.create(
+      model=self.model,
+      messages=[{"role": "user", "content": prompt}],
+      max_tokens=max_tokens or self.max_tokens,
+      temperature=self.temperature
+    )
+    return response.content[0].text
+
+
+def create_async_llm_client(config: Dict) -> AsyncLLMClient:
+  """Factory function to create the appropriate asyncio LLM client (API mode only)"""
+  mode = config['models']['mode']
+  if mode != "api":
+    raise ValueError(f"Async clients need models.mode 'api', got '{mode}'")
+
+  provider = config['models']['api']['provider']
+  if provider == "openai":
+    return AsyncOpenAIClient(config)
+  elif provider == "anthropic":
+    return AsyncAnthropicClient(config)
+  else:
+    raise ValueError(f"Unknown API provider: {provider}")
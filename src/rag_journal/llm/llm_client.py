@@ -1,7 +1,7 @@
 import os
 import sys
 import json
-from typing import Dict, Any, List #, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from abc import ABC, abstractmethod
 from rag_journal.utils.logger import logger
 from rag_journal.utils.config import CONFIG
@@ -15,12 +15,78 @@ class LLMClient(ABC):
     """Generate response with tool calling support"""
     pass
   
+  def stream_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Iterator[Dict[str, Any]]:
+    """
+    Generate response with tool calling support, streaming the text.
+    Yields {"type": "text", "text": delta} events as the text is generated,
+    then a last {"type": "response", "response": ...} event with the same
+    content of generate_with_tools. Clients without streaming yield the
+    whole text at once.
+    """
+    response = self.generate_with_tools(messages, tools)
+    if response['content']:
+      yield {"type": "text", "text": response['content']}
+    yield {"type": "response", "response": response}
+  
   @abstractmethod
   def generate(self, prompt: str, max_tokens: int = None) -> str:
     """Simple text generation"""
     pass
 
 
+class OpenAIStreamAccumulator:
+  """Assemble text and tool calls from the chunks of a streamed OpenAI chat completion"""
+  
+  def __init__(self):
+    self.content = []
+    self.tool_calls = {}  # by index: arguments arrive in fragments
+    self.finish_reason = None
+    self.usage = None
+  
+  def add(self, chunk) -> str:
+    """Add a chunk, returning its text delta (empty if none)"""
+    if getattr(chunk, 'usage', None) is not None:
+      # Last chunk, without choices (stream_options include_usage)
+      self.usage = OpenAIClient.parse_usage(chunk.usage)
+    if not chunk.choices:
+      return ""
+    choice = chunk.choices[0]
+    delta = choice.delta
+    
+    for tc in delta.tool_calls or []:
+      call = self.tool_calls.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+      if tc.id:
+        call['id'] = tc.id
+      if tc.function and tc.function.name:
+        call['name'] += tc.function.name
+      if tc.function and tc.function.arguments:
+        call['arguments'] += tc.function.arguments
+    
+    if choice.finish_reason:
+      self.finish_reason = choice.finish_reason
+    
+    if delta.content:
+      self.content.append(delta.content)
+      return delta.content
+    return ""
+  
+  def response(self) -> Dict[str, Any]:
+    """The assembled response, in the format of OpenAIClient.parse_response"""
+    return {
+      "content": "".join(self.content),
+      "tool_calls": [
+        {
+          "id": call['id'],
+          "name": call['name'],
+          "parameters": json.loads(call['arguments'] or "{}")
+        }
+        for _, call in sorted(self.tool_calls.items())
+      ],
+      "finish_reason": self.finish_reason,
+      "usage": self.usage
+    }
+
+
 class OpenAIClient(LLMClient):
   """OpenAI API client"""
   
@@ -47,12 +113,12 @@ class OpenAIClient(LLMClient):
     self.model = models_config['api']['model']
     self.max_tokens = models_config['api'].get('max_tokens', 2000)
     self.temperature = models_config['api'].get('temperature', 0.1)
+    self.cache_options = self.prompt_cache_options(api_config)
   
-  def generate_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Dict[str, Any]:
-    """Generate with function calling"""
-    
-    # Converti tools nel formato OpenAI
-    openai_tools = [
+  @staticmethod
+  def convert_tools(tools: List[Dict]) -> List[Dict]:
+    """Convert tools to the OpenAI format"""
+    return [
       {
         "type": "function",
         "function": {
@@ -68,20 +134,60 @@ class OpenAIClient(LLMClient):
       }
       for tool in tools
     ]
-    
-    try:
-      response = self.client.chat.completions.create(
-        model=self.model,
-        messages=messages,
-        tools=openai_tools,
-        tool_choice="auto",
-        max_tokens=self.max_tokens,
-        temperature=self.temperature
-      )
-    except Exception as e:
-      logger.error(f"✗ Errore nella creazione di un completamento della chat: {e.message}")
-      sys.exit(1)
-    
+  
+  @staticmethod
+  def convert_messages(messages: List[Dict]) -> List[Dict]:
+    """Convert agent messages (tool calls as id/name/parameters) to the OpenAI format"""
+    converted = []
+    for msg in messages:
+      if msg['role'] == 'assistant' and msg.get('tool_calls'):
+        converted.append({
+          "role": "assistant",
+          "content": msg.get('content') or None,
+          "tool_calls": [
+            {
+              "id": tc['id'],
+              "type": "function",
+              "function": {"name": tc['name'], "arguments": json.dumps(tc['parameters'], ensure_ascii=False)}
+            }
+            for tc in msg['tool_calls']
+          ]
+        })
+      elif msg['role'] == 'tool':
+        converted.append({"role": "tool", "tool_call_id": msg['tool_call_id'], "content": msg['content']})
+      else:
+        converted.append(msg)
+    return converted
+  
+  @staticmethod
+  def prompt_cache_options(api_config: Dict) -> Dict[str, Any]:
+    """
+    Request options for prompt caching. OpenAI caches prompt prefixes of
+    1024+ tokens by itself: tools and system prompt come first and do not
+    change between iterations, so only the tail is new. A prompt_cache_key
+    routes the requests sharing that prefix to the same cache.
+    """
+    key = api_config.get('prompt_cache_key')
+    if not api_config.get('prompt_caching', True) or not key:
+      return {}
+    return {"extra_body": {"prompt_cache_key": key}}
+  
+  @staticmethod
+  def parse_usage(usage) -> Optional[Dict[str, int]]:
+    """Token counts of a completion, with the prompt tokens read from cache"""
+    if usage is None:
+      return None
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+      "prompt_tokens": usage.prompt_tokens,
+      "cached_tokens": (getattr(details, 'cached_tokens', None) or 0) if details else 0,
+      "cache_write_tokens": 0,  # no separate charge for cache writes
+      "completion_tokens": usage.completion_tokens
+    }
+  
+  @staticmethod
+  def parse_response(response) -> Dict[str, Any]:
+    """Extract text, tool calls and finish reason from a chat completion"""
     message = response.choices[0].message
     
     return {
@@ -94,9 +200,50 @@ class OpenAIClient(LLMClient):
         }
         for tc in (message.tool_calls or [])
       ],
-      "finish_reason": response.choices[0].finish_reason
+      "finish_reason": response.choices[0].finish_reason,
+      "usage": OpenAIClient.parse_usage(response.usage)
     }
   
+  def generate_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Dict[str, Any]:
+    """Generate with function calling"""
+    try:
+      response = self.client.chat.completions.create(
+        model=self.model,
+        messages=self.convert_messages(messages),
+        tools=self.convert_tools(tools),
+        tool_choice="auto",
+        max_tokens=self.max_tokens,
+        temperature=self.temperature,
+        **self.cache_options
+      )
+    except Exception as e:
+      logger.error(f"✗ Errore nella creazione di un completamento della chat: {e.message}")
+      sys.exit(1)
+    
+    return self.parse_response(response)
+  
+  def stream_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Iterator[Dict[str, Any]]:
+    """Generate with function calling, streaming the text"""
+    stream = self.client.chat.completions.create(
+      model=self.model,
+      messages=self.convert_messages(messages),
+      tools=self.convert_tools(tools),
+      tool_choice="auto",
+      max_tokens=self.max_tokens,
+      temperature=self.temperature,
+      stream=True,
+      stream_options={"include_usage": True},
+      **self.cache_options
+    )
+    
+    accumulator = OpenAIStreamAccumulator()
+    for chunk in stream:
+      text = accumulator.add(chunk)
+      if text:
+        yield {"type": "text", "text": text}
+    
+    yield {"type": "response", "response": accumulator.response()}
+  
   def generate(self, prompt: str, max_tokens: int = None) -> str:
     """Simple generation"""
     response = self.client.chat.completions.create(
@@ -126,15 +273,15 @@ class AnthropicClient(LLMClient):
       raise ValueError(f"Missing {api_key_env_var} environment variable")
     
     self.client = anthropic.Anthropic(api_key=api_key)
-    self.model = self.models_config['api']['model']
-    self.max_tokens = self.models_config['api'].get('max_tokens', 2000)
-    self.temperature = self.models_config['api'].get('temperature', 0.1)
+    self.model = api_config['model']
+    self.max_tokens = api_config.get('max_tokens', 2000)
+    self.temperature = api_config.get('temperature', 0.1)
+    self.prompt_caching = api_config.get('prompt_caching', True)
   
-  def generate_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Dict[str, Any]:
-    """Generate with tool use"""
-    
-    # Converti tools nel formato Anthropic
-    anthropic_tools = [
+  @staticmethod
+  def convert_tools(tools: List[Dict]) -> List[Dict]:
+    """Convert tools to the Anthropic format"""
+    return [
       {
         "name": tool['name'],
         "description": tool['description'],
@@ -147,24 +294,108 @@ class AnthropicClient(LLMClient):
       }
       for tool in tools
     ]
-    
-    # Estract system message if present
-    system_msg = None
-    user_messages = messages
-    if messages and messages[0]['role'] == 'system':
-      system_msg = messages[0]['content']
-      user_messages = messages[1:]
-    
-    response = self.client.messages.create(
-      model=self.model,
-      system=system_msg,
-      messages=user_messages,
-      tools=anthropic_tools,
-      max_tokens=self.max_tokens,
-      temperature=self.temperature
-    )
-    
-    # Estract tool calls
+  
+  @staticmethod
+  def convert_messages(messages: List[Dict]) -> Tuple[Optional[List[Dict]], List[Dict]]:
+    """
+    Convert agent messages to the Anthropic format: system messages are
+    passed apart as text blocks (the system prompt first, then e.g. the
+    history summary), tool calls become tool_use blocks and tool results
+    become tool_result blocks of a user message
+    """
+    system_parts = []
+    converted = []
+    for msg in messages:
+      if msg['role'] == 'system':
+        system_parts.append(msg['content'])
+      
+      elif msg['role'] == 'assistant' and msg.get('tool_calls'):
+        content = [{"type": "text", "text": msg['content']}] if msg.get('content') else []
+        content += [
+          {"type": "tool_use", "id": tc['id'], "name": tc['name'], "input": tc['parameters']}
+          for tc in msg['tool_calls']
+        ]
+        converted.append({"role": "assistant", "content": content})
+      
+      elif msg['role'] == 'tool':
+        block = {"type": "tool_result", "tool_use_id": msg['tool_call_id'], "content": msg['content']}
+        # Results of one turn go together in a single user message
+        if converted and converted[-1]['role'] == 'user' and isinstance(converted[-1]['content'], list):
+          converted[-1]['content'].append(block)
+        else:
+          converted.append({"role": "user", "content": [block]})
+      
+      else:
+        converted.append({"role": msg['role'], "content": msg['content']})
+    
+    system = [{"type": "text", "text": part} for part in system_parts]
+    return system or None, converted
+  
+  @staticmethod
+  def add_cache_control(
+      system: Optional[List[Dict]],
+      tools: List[Dict],
+      messages: List[Dict]) -> Tuple[Optional[List[Dict]], List[Dict], List[Dict]]:
+    """
+    Copies of converted system, tools and messages with cache breakpoints
+    on the last tool, on the system prompt and on the last message. The
+    prefix up to each breakpoint is cached: the next iteration of the
+    agent loop reads tools, system prompt and the previous turns from
+    cache and only pays for the new tool results.
+    """
+    ephemeral = {"type": "ephemeral"}
+    
+    tools = [dict(tool) for tool in tools]
+    if tools:
+      tools[-1]['cache_control'] = ephemeral
+    
+    if system:
+      # Only the system prompt: a history summary after it changes between turns
+      system = [dict(system[0], cache_control=ephemeral)] + system[1:]
+    
+    messages = list(messages)
+    if messages:
+      last = dict(messages[-1])
+      content = last['content']
+      if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+      content = list(content)
+      content[-1] = dict(content[-1], cache_control=ephemeral)
+      last['content'] = content
+      messages[-1] = last
+    
+    return system, tools, messages
+  
+  @staticmethod
+  def parse_usage(usage) -> Optional[Dict[str, int]]:
+    """Token counts of a message, with the prompt tokens read from and written to cache"""
+    if usage is None:
+      return None
+    cached = getattr(usage, 'cache_read_input_tokens', None) or 0
+    written = getattr(usage, 'cache_creation_input_tokens', None) or 0
+    return {
+      "prompt_tokens": usage.input_tokens + cached + written,
+      "cached_tokens": cached,
+      "cache_write_tokens": written,
+      "completion_tokens": usage.output_tokens
+    }
+  
+  @staticmethod
+  def prepare_request(messages: List[Dict], tools: List[Dict], prompt_caching: bool) -> Dict[str, Any]:
+    """System, messages and tools of a tool use request, with cache breakpoints if enabled"""
+    system, converted = AnthropicClient.convert_messages(messages)
+    converted_tools = AnthropicClient.convert_tools(tools)
+    if prompt_caching:
+      system, converted_tools, converted = AnthropicClient.add_cache_control(system, converted_tools, converted)
+    
+    request = {"messages": converted, "tools": converted_tools}
+    if system:
+      request['system'] = system
+    return request
+  
+  @staticmethod
+  def parse_response(response) -> Dict[str, Any]:
+    """Extract text, tool calls and stop reason from a message"""
     tool_calls = []
     text_content = ""
     
@@ -181,9 +412,35 @@ class AnthropicClient(LLMClient):
     return {
       "content": text_content,
       "tool_calls": tool_calls,
-      "finish_reason": response.stop_reason
+      "finish_reason": response.stop_reason,
+      "usage": AnthropicClient.parse_usage(response.usage)
     }
   
+  def generate_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Dict[str, Any]:
+    """Generate with tool use"""
+    response = self.client.messages.create(
+      model=self.model,
+      max_tokens=self.max_tokens,
+      temperature=self.temperature,
+      **self.prepare_request(messages, tools, self.prompt_caching)
+    )
+    
+    return self.parse_response(response)
+  
+  def stream_with_tools(self, messages: List[Dict], tools: List[Dict]) -> Iterator[Dict[str, Any]]:
+    """Generate with tool use, streaming the text (tool inputs are assembled by the SDK)"""
+    with self.client.messages.stream(
+      model=self.model,
+      max_tokens=self.max_tokens,
+      temperature=self.temperature,
+      **self.prepare_request(messages, tools, self.prompt_caching)
+    ) as stream:
+      for text in stream.text_stream:
+        yield {"type": "text", "text": text}
+      message = stream.get_final_message()
+    
+    yield {"type": "response", "response": self.parse_response(message)}
+  
   def generate(self, prompt: str, max_tokens: int = None) -> str:
     """Simple generation"""
     response = self.client.messages.create(
@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+import numpy as np
+from typing import List, Optional, Dict, Any, Union
 from dataclasses import dataclass, asdict
+from rag_journal.database.embedding_codec import encode_embedding, decode_embedding
 from rag_journal.utils.config import CONFIG
 
 
@@ -40,16 +42,24 @@ class Article:
   article_id: str
   metadata: ArticleMetadata
   content: ArticleContent
-  embedding: Optional[List[float]] = None
+  embedding: Optional[Union[List[float], np.ndarray]] = None
   created_at: Optional[datetime] = None
   
-  def to_dict(self) -> Dict[str, Any]:
-    """Convert to dictionary for MongoDB"""
+  def to_dict(self, embedding_format: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert to dictionary for MongoDB.
+    If embedding_format is given ("list", "float32", "float16"), the
+    embedding is encoded in that storage format.
+    """
+    embedding = self.embedding
+    if embedding_format is not None:
+      embedding = encode_embedding(embedding, embedding_format)
+    
     return {
       "article_id": self.article_id,
       "metadata": self.metadata.to_dict(),
       "content": self.content.to_dict(),
-      "embedding": self.embedding,
+      "embedding": embedding,
       "created_at": self.created_at or datetime.now()
     }
   
@@ -74,7 +84,7 @@ class Article:
       article_id = data['article_id'],
       metadata = metadata,
       content = content,
-      embedding = data.get('embedding'),
+      embedding = decode_embedding(data.get('embedding')),
       created_at = data.get('created_at')
     )
   
\ No newline at end of file
@@ -1,3 +1,6 @@
 from .agentic_rag import AgenticRAG
+from .async_agentic_rag import AsyncAgenticRAG
+from .query_router import QueryRouter
+from .async_query_router import AsyncQueryRouter
 
-__all__ = ['AgenticRAG']
\ No newline at end of file
+__all__ = ['AgenticRAG', 'AsyncAgenticRAG', 'QueryRouter', 'AsyncQueryRouter']
\ No newline at end of file
@@ -1,27 +1,99 @@
 import sys
 import json
 from datetime import datetime
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from rag_journal.database.mongodb_client import MongoDBClient
 from rag_journal.embeddings.embedder import ArticleEmbedder
+from rag_journal.embeddings.reranker import CrossEncoderReranker
+from rag_journal.index.factory import create_vector_index, create_lexical_index
+from rag_journal.index.fusion import reciprocal_rank_fusion
+from rag_journal.index.persisted_index import PersistedIndex
 from rag_journal.llm.llm_client import create_llm_client
+from rag_journal.rag.answer_cache import SemanticAnswerCache
+from rag_journal.rag.tool_plan import db_call, cpu_call, run_plan
+from rag_journal.rag.tool_result_serializer import TokenCounter, ToolResultSerializer
 from rag_journal.utils.logger import logger
 from rag_journal.utils.config import CONFIG
+from rag_journal.utils.lru_cache import LRUCache
 
-class AgenticRAG:
-  """Agentic RAG system - LLM decides everything"""
+class BaseAgenticRAG:
+  """
+  Parts shared by AgenticRAG and AsyncAgenticRAG: indexes, caches, tool
+  definitions, prompts and the tool bodies, written once as plans (see
+  tool_plan) that each class runs with its own MongoDB client.
+  """
+  
+  ITERATION_LIMIT_ANSWER = "Ho raggiunto il limite di iterazioni. Prova a riformulare la domanda."
   
   def __init__(self):
-    """Initialize agentic RAG"""
+    """Load the embedder, the indexes and the caches; the LLM client is created by the subclasses"""
     logger.info("Si initializza il sistema RAG agentico...")
     
     self.config = CONFIG
     
     self.db = MongoDBClient()
     self.embedder = ArticleEmbedder()
-    self.llm = create_llm_client(self.config)
     self.max_results = self.config['retrieval']['max_results']
     self.semantic_top_k = self.config['retrieval']['semantic_search_top_k']
+    self.index_path = self.config['retrieval'].get('index_path', 'data/index')
+    
+    # Passage retrieval configuration
+    passages_config = self.config['retrieval'].get('passages', {})
+    self.passages_enabled = passages_config.get('enabled', False)
+    self.passage_top_k = passages_config.get('top_k', 8)
+    
+    # Optional cross-encoder re-ranking of search results
+    reranker_config = self.config['retrieval'].get('reranker', {})
+    self.reranker = CrossEncoderReranker(
+      model_name=reranker_config['model_name'],
+      top_n=reranker_config.get('top_n', 30),
+      batch_size=reranker_config.get('batch_size', 16),
+      latency_budget_ms=reranker_config.get('latency_budget_ms', 800),
+      min_score=reranker_config.get('min_score', 0.2),
+      max_chars=reranker_config.get('max_chars', 2000),
+      cache_size=reranker_config.get('cache_size', 4096)
+    ) if reranker_config.get('enabled', False) else None
+    self.rerank_max_results = reranker_config.get('max_results', 8)
+    
+    # Lexical retrieval configuration
+    lexical_config = self.config['retrieval'].get('lexical', {})
+    self.lexical_enabled = lexical_config.get('enabled', False)
+    self.rrf_k = lexical_config.get('rrf_k', 60)
+    self.fusion_candidates = lexical_config.get('candidates', 50)
+    
+    # Indexes, memory-mapped from disk or built once from MongoDB
+    self.passage_index_path = Path(self.index_path) / 'passages'
+    self.lexical_index_path = Path(self.index_path) / 'bm25'
+    self.index = self._load_index(self.index_path)
+    self.passage_index = self._load_index(self.passage_index_path, kind='passages') if self.passages_enabled else None
+    self.lexical_index = self._load_index(self.lexical_index_path, kind='lexical') if self.lexical_enabled else None
+    
+    # Tool results sent back to the LLM: token budgets and excerpts
+    tool_results_config = self.config.get('tool_results', {})
+    self.result_serializer = ToolResultSerializer(
+      TokenCounter(tool_results_config.get('tokenizer', 'o200k_base'), self.embedder.model.tokenizer),
+      max_tokens_per_call=tool_results_config.get('max_tokens_per_call', 3000),
+      max_tokens_per_conversation=tool_results_config.get('max_tokens_per_conversation', 12000),
+      excerpt_tokens=tool_results_config.get('excerpt_tokens', 400)
+    )
+    
+    # Semantic cache of the answers of single queries
+    answer_cache_config = self.config.get('answer_cache', {})
+    self.answer_cache = SemanticAnswerCache(
+      dimension=self.embedder.model.get_sentence_embedding_dimension(),
+      max_entries=answer_cache_config.get('max_entries', 2000),
+      threshold=answer_cache_config.get('similarity_threshold', 0.95),
+      ttl=answer_cache_config.get('ttl_seconds')
+    ) if answer_cache_config.get('enabled', False) else None
+    
+    # Memoized tool results, shared by all sessions, dropped when the corpus version changes
+    tool_cache_config = self.config.get('tool_cache', {})
+    self.tool_cache = LRUCache(
+      maxsize=tool_cache_config.get('max_entries', 4096),
+      ttl=tool_cache_config.get('ttl_seconds')
+    ) if tool_cache_config.get('enabled', False) else None
+    self._tool_cache_version = None
     
     # Chat configuration
     chat_config = self.config.get('chat', {})
@@ -29,17 +101,84 @@ class AgenticRAG:
     self.auto_compress = chat_config.get('auto_compress', True)
     self.compression_strategy = chat_config.get('compression_strategy', 'summary')
     
-    # Chat history
-    self.conversation_history = []
-    
     # Define available tools
     self.tools = self._define_tools()
+  
+  def _new_index(self, kind: str) -> PersistedIndex:
+    """Empty index of a kind: 'articles' and 'passages' (vector) or 'lexical' (BM25)"""
+    return create_lexical_index(self.config) if kind == 'lexical' else create_vector_index(self.config)
+  
+  def _load_index(self, path, kind: str = 'articles') -> PersistedIndex:
+    """Load a persisted index, rebuilding it if the corpus changed since it was built"""
+    index = self._new_index(kind)
     
-    logger.info("✓ RAG Agentico pronto")
+    if index.load(path) and self._index_is_current(index, kind):
+      logger.info(f"✓ Indice {'BM25' if kind == 'lexical' else 'vettoriale'} caricato: {len(index)} {'passaggi' if kind == 'passages' else 'articoli'}")
+      return index
+    
+    return self._rebuild_index(path, kind)
+  
+  def _index_is_current(self, index: PersistedIndex, kind: str = 'articles') -> bool:
+    """Check an index against the corpus version and the document count"""
+    count = self.db.count_passages() if kind == 'passages' else self.db.count_by_filter({})
+    return (
+      index.meta.get('corpus_version') == self.db.get_corpus_version()
+      and index.meta.get('total_documents') == count
+    )
+  
+  def _rebuild_index(self, path, kind: str = 'articles') -> PersistedIndex:
+    """Rebuild an index from MongoDB and persist it"""
+    index = self._new_index(kind)
+    if kind == 'passages':
+      index.build_from_database(self.db, passages=True)
+    else:
+      index.build_from_database(self.db)
+    try:
+      index.save(path)
+    except OSError as e:
+      logger.info(f"⚠ Impossibile salvare l'indice: {e}")
+    return index
+  
+  def refresh_index(self):
+    """Rebuild the indexes from MongoDB and persist them"""
+    self.index = self._rebuild_index(self.index_path)
+    if self.passages_enabled:
+      self.passage_index = self._rebuild_index(self.passage_index_path, kind='passages')
+    if self.lexical_enabled:
+      self.lexical_index = self._rebuild_index(self.lexical_index_path, kind='lexical')
+  
+  def _sync_tool_cache(self, corpus_version: int):
+    """Drop the memoized tool results when a newer corpus version is seen"""
+    if self.tool_cache is None:
+      return
+    if self._tool_cache_version is None or corpus_version > self._tool_cache_version:
+      self.tool_cache.clear()
+      self._tool_cache_version = corpus_version
+  
+  def _reload_indexes_if_changed(self):
+    """Switch to indexes rebuilt (e.g. by ingestion) since they were loaded"""
+    indexes = (
+      ('index', self.index_path, 'articles'),
+      ('passage_index', self.passage_index_path, 'passages'),
+      ('lexical_index', self.lexical_index_path, 'lexical')
+    )
+    for attr, path, kind in indexes:
+      index = getattr(self, attr)
+      if index is None:
+        continue
+      
+      generation = PersistedIndex.current_generation(path)
+      if generation is None or generation == index.generation:
+        continue
+      
+      fresh = self._new_index(kind)
+      if fresh.load(path):
+        setattr(self, attr, fresh)
+        logger.info(f"✓ Indice ricaricato ({kind}): {len(fresh)} elementi")
   
   def _define_tools(self) -> List[Dict]:
     """Define tools available to the LLM agent"""
-    return [
+    tools = [
       {
         "name": "search_by_content",
         "description": "Cerca articoli per contenuto semantico. Usa questo quando la domanda riguarda COSA dicono gli articoli su un argomento specifico.",
@@ -50,6 +189,36 @@ class AgenticRAG:
           }
         }
       },
+      {
+        "name": "search_hybrid",
+        "description": "Cerca articoli per contenuto semantico SOLO tra quelli che rispettano filtri sui metadati (autore, date, categorie), in una sola chiamata. Usa questo per domande come 'cosa ha scritto X sull'Ucraina nel 2023'.",
+        "parameters": {
+          "query": {
+            "type": "string",
+            "description": "Query di ricerca semantica (es: 'guerra Ucraina')"
+          },
+          "author": {
+            "type": "string",
+            "description": "Nome autore (opzionale)",
+            "optional": True
+          },
+          "date_from": {
+            "type": "string",
+            "description": "Data inizio nel formato YYYY-MM-DD (opzionale)",
+            "optional": True
+          },
+          "date_to": {
+            "type": "string",
+            "description": "Data fine nel formato YYYY-MM-DD (opzionale)",
+            "optional": True
+          },
+          "categories": {
+            "type": "array",
+            "description": "Lista di categorie (opzionale)",
+            "optional": True
+          }
+        }
+      },
       {
         "name": "search_by_author",
         "description": "Trova tutti gli articoli scritti da un autore specifico.",
@@ -123,175 +292,159 @@ class AgenticRAG:
         }
       }
     ]
-  
-  def query(self, user_query: str, max_iterations: int = 10) -> Dict[str, Any]:
-    """Single query mode - no conversation history"""
-    
-    print('='*80)
-    
-    conversation = [
-      {"role": "system", "content": self._get_system_prompt()},
-      {"role": "user", "content": user_query}
-    ]
     
-    tool_results = []
+    if self.lexical_enabled:
+      search_by_content = next(tool for tool in tools if tool["name"] == "search_by_content")
+      search_by_content["parameters"]["mode"] = {
+        "type": "string",
+        "description": "'fused' (default: semantica + parole chiave, meglio per nomi propri e termini rari), 'semantic' o 'lexical' (solo parole chiave)",
+        "optional": True
+      }
     
-    for iteration in range(max_iterations):
-      logger.info(f"[Iterazione {iteration + 1}]")
-      
-      try:
-        response = self.llm.generate_with_tools(conversation, self.tools)
-      except Exception as e:
-        logger.error(f"✗ Errore nel generare una conversazione: {e.message}")
-        sys.exit(1)
-      
-      if not response['tool_calls']:
-        logger.info("✓ Risposta generata")
-        return {
-          "answer": response['content'],
-          "tool_calls": tool_results,
-          "iterations": iteration + 1
+    if self.passages_enabled:
+      tools.append({
+        "name": "search_passages",
+        "description": "Cerca i passaggi più pertinenti all'interno degli articoli. Restituisce solo brevi estratti, non gli articoli interi: usalo per domande sul contenuto al posto di get_article_details quando bastano gli estratti.",
+        "parameters": {
+          "query": {
+            "type": "string",
+            "description": "Query di ricerca semantica (es: 'sanzioni alla Russia')"
+          }
         }
-      
-      for tool_call in response['tool_calls']:
-        logger.info(f"  → Strumento: {tool_call['name']}")
-        logger.info(f"    Parametri: {json.dumps(tool_call['parameters'], ensure_ascii=False)}")
-        
-        result = self._execute_tool(
-          tool_call['name'],
-          tool_call['parameters']
-        )
-        
-        tool_results.append({
-          "tool": tool_call['name'],
-          "parameters": tool_call['parameters'],
-          "result": result
-        })
-        
-        conversation.append({
-          "role": "assistant",
-          "content": response['content'] or "",
-          "tool_calls": response['tool_calls']
-        })
-        
-        conversation.append({
-          "role": "tool",
-          "tool_call_id": tool_call['id'],
-          "name": tool_call['name'],
-          "content": json.dumps(result, ensure_ascii=False, default=str)
-        })
+      })
     
+    return tools
+  
+  def _serialize_tool_result(self, result: Dict, user_query: str, used_tokens: int) -> Tuple[str, int]:
+    """Tool result for the LLM within the token budget left to the question"""
+    content, tokens = self.result_serializer.serialize(
+      result,
+      query=user_query,
+      max_tokens=self.result_serializer.budget(used_tokens)
+    )
+    logger.info(f"    Risultato: {tokens} token")
+    return content, tokens
+  
+  @staticmethod
+  def _log_usage(iteration: int, response: Dict, usage_log: List[Dict]):
+    """Log the token counts of an LLM turn, with the prompt tokens read from and written to the provider cache"""
+    usage = response.get('usage')
+    if not usage:
+      return
+    logger.info(
+      f"  Token: {usage['prompt_tokens']} prompt "
+      f"({usage['cached_tokens']} da cache, {usage['cache_write_tokens']} scritti in cache), "
+      f"{usage['completion_tokens']} output"
+    )
+    usage_log.append(dict(usage, iteration=iteration + 1))
+  
+  def _log_query_cache_stats(self):
+    """Log the hit rate of the query embedding cache since startup"""
+    if self.embedder.query_cache is None:
+      return
+    stats = self.embedder.query_cache.stats()
+    logger.info(
+      f"  Cache embedding delle query: {stats['hits']} in memoria, {stats['disk_hits']} da disco, "
+      f"{stats['misses']} calcolati (hit rate {stats['hit_rate']})"
+    )
+  
+  def cache_stats(self) -> Dict[str, Any]:
+    """Hit/miss counters of the query embedding, tool and answer caches (None if disabled)"""
     return {
-      "answer": "Ho raggiunto il limite di iterazioni. Prova a riformulare la domanda.",
-      "tool_calls": tool_results,
-      "iterations": max_iterations
+      "query_embedding_cache": self.embedder.query_cache.stats() if self.embedder.query_cache is not None else None,
+      "tool_cache": self.tool_cache.stats() if self.tool_cache is not None else None,
+      "answer_cache": self.answer_cache.stats() if self.answer_cache is not None else None
     }
   
-  def chat(self, user_query: str, max_iterations: int = 10) -> Dict[str, Any]:
-    """Chat mode - maintains conversation history"""
-    
-    logger.info(f"Domanda: {user_query}")
-    
-    # Auto-compress history if needed
-    if self.auto_compress and len(self.conversation_history) > self.max_history_turns * 2:
-      logger.info("  Si comprime l'history della chat...")
-      if self.compression_strategy == 'summary':
-        self._compress_history_with_summary()
-      elif self.compression_strategy == 'truncate':
-        self._truncate_history()
-    
-    # Add user message to history
-    self.conversation_history.append({
-      "role": "user",
-      "content": user_query
+  def _log_prompt_size(self, conversation: List[Dict]):
+    """Log the number of messages and tokens sent to the LLM in this iteration"""
+    tokens = sum(
+      self.result_serializer.counter.count(msg.get('content') or "")
+      + (self.result_serializer.counter.count(json.dumps(msg['tool_calls'], ensure_ascii=False)) if msg.get('tool_calls') else 0)
+      for msg in conversation
+    )
+    logger.info(f"  Prompt: {len(conversation)} messaggi, {tokens} token (schemi degli strumenti esclusi)")
+  
+  @staticmethod
+  def _log_tool_calls(tool_calls: List[Dict]):
+    """Log the tools requested by the LLM in one turn"""
+    for tool_call in tool_calls:
+      logger.info(f"  → Strumento: {tool_call['name']}")
+      logger.info(f"    Parametri: {json.dumps(tool_call['parameters'], ensure_ascii=False)}")
+  
+  def _append_tool_turn(
+      self,
+      conversation: List[Dict],
+      response: Dict,
+      results: List[Dict],
+      tool_results: List[Dict],
+      user_query: str,
+      tool_tokens: int) -> int:
+    """Append one assistant message per turn, then one result per tool call; returns the tool tokens used so far"""
+    conversation.append({
+      "role": "assistant",
+      "content": response['content'] or "",
+      "tool_calls": response['tool_calls']
     })
     
-    # Build conversation with system prompt + history
-    conversation = [
-      {"role": "system", "content": self._get_system_prompt()}
-    ] + self.conversation_history
-    
-    tool_results = []
-    
-    for iteration in range(max_iterations):
-      logger.info(f"\n[Iterazione {iteration + 1}]")
-      
-      response = self.llm.generate_with_tools(conversation, self.tools)
+    for tool_call, result in zip(response['tool_calls'], results):
+      tool_results.append({
+        "tool": tool_call['name'],
+        "parameters": tool_call['parameters'],
+        "result": result
+      })
       
-      if not response['tool_calls']:
-        # Save assistant response to history
-        self.conversation_history.append({
-          "role": "assistant",
-          "content": response['content']
-        })
-        
-        logger.info("✓ Risposta generata")
-        return {
-          "answer": response['content'],
-          "tool_calls": tool_results,
-          "iterations": iteration + 1
-        }
+      content, tokens = self._serialize_tool_result(result, user_query, tool_tokens)
+      tool_tokens += tokens
       
-      for tool_call in response['tool_calls']:
-        logger.info(f"  → Strumento: {tool_call['name']}")
-        logger.info(f"    Parametri: {json.dumps(tool_call['parameters'], ensure_ascii=False)}")
-        
-        result = self._execute_tool(
-          tool_call['name'],
-          tool_call['parameters']
-        )
-        
-        tool_results.append({
-          "tool": tool_call['name'],
-          "parameters": tool_call['parameters'],
-          "result": result
-        })
-        
-        # Add to current conversation (not to persistent history yet)
-        conversation.append({
-          "role": "assistant",
-          "content": response['content'] or "",
-          "tool_calls": response['tool_calls']
-        })
-        
-        conversation.append({
-          "role": "tool",
-          "tool_call_id": tool_call['id'],
-          "name": tool_call['name'],
-          "content": json.dumps(result, ensure_ascii=False, default=str)
-        })
-    
-    answer = "Ho raggiunto il limite di iterazioni. Prova a riformulare la domanda."
-    self.conversation_history.append({
-      "role": "assistant",
-      "content": answer
-    })
+      conversation.append({
+        "role": "tool",
+        "tool_call_id": tool_call['id'],
+        "name": tool_call['name'],
+        "content": content
+      })
     
+    return tool_tokens
+  
+  def _loop_result(
+      self,
+      answer: str,
+      tool_results: List[Dict],
+      iterations: int,
+      usage_log: List[Dict],
+      tool_cache_stats: Dict[str, int]) -> Dict[str, Any]:
+    """Result of the agent loop"""
     return {
       "answer": answer,
       "tool_calls": tool_results,
-      "iterations": max_iterations
+      "iterations": iterations,
+      "usage": usage_log,
+      "tool_cache": self._tool_cache_summary(tool_cache_stats)
     }
   
-  def reset_chat(self):
-    """Reset conversation history"""
-    self.conversation_history = []
-    logger.info("✓ History della chat pulita")
+  def _cached_answer(self, user_query: str, query_embedding, corpus_version: int) -> Optional[Dict[str, Any]]:
+    """Cached answer of a similar question, computed on the current corpus version"""
+    found = self.answer_cache.lookup(user_query, query_embedding, corpus_version)
+    if found is None:
+      return None
+    return self._cache_hit_result(*found)
   
-  def get_chat_history(self) -> List[Dict]:
-    """Get current chat history"""
-    return self.conversation_history.copy()
+  @staticmethod
+  def _cache_hit_result(entry: Dict, similarity: float) -> Dict[str, Any]:
+    """Result of a question answered from the answer cache"""
+    logger.info(f"✓ Risposta dalla cache (similarità {similarity:.3f} con \"{entry['question']}\")")
+    return {
+      "answer": entry['answer'],
+      "tool_calls": entry['tool_calls'],
+      "iterations": 0,
+      "usage": [],
+      "cached": True,
+      "cache_similarity": round(similarity, 4)
+    }
   
-  def _compress_history_with_summary(self):
-    """Compress old history with AI summary"""
-    keep_recent = 6  # Keep last 3 turns (6 messages)
-    
-    if len(self.conversation_history) <= keep_recent:
-      return
-    
-    old_messages = self.conversation_history[:-keep_recent]
-    recent_messages = self.conversation_history[-keep_recent:]
-    
+  @staticmethod
+  def _summary_prompt(old_messages: List[Dict]) -> str:
+    """Prompt asking the LLM to summarize older conversation messages"""
     # Create text from old messages
     history_text = "\n".join([
       f"{msg['role']}: {msg['content'][:500]}"
@@ -299,48 +452,31 @@ class AgenticRAG:
       if msg['role'] in ['user', 'assistant']
     ])
     
-    summary_prompt = f"""Riassumi brevemente questa conversazione precedente in 2-3 frasi:
+    return f"""Riassumi brevemente questa conversazione precedente in 2-3 frasi:
 
 {history_text}
 
 Riassunto conciso:"""
-    
-    try:
-      summary = self.llm.generate(summary_prompt, max_tokens=200)
-      
-      self.conversation_history = [
-        {
-          "role": "system",
-          "content": f"[Contesto conversazione precedente: {summary}]"
-        }
-      ] + recent_messages
-      
-      logger.info(f"  ✓ History compressa: {len(old_messages)} messaggi → sommario")
-    
-    except Exception as e:
-      logger.info(f"  ⚠ Compressione fallita: {e}")
-      self.conversation_history = recent_messages
-  
-  def _truncate_history(self):
-    """Simple truncation without AI"""
-    keep = self.max_history_turns * 2
-    if len(self.conversation_history) > keep:
-      removed = len(self.conversation_history) - keep
-      self.conversation_history = self.conversation_history[-keep:]
-      logger.info(f"  ✓ History troncata: rimossi {removed} vecchi messaggi")
   
   def _get_system_prompt(self) -> str:
     """System prompt for the agent"""
-    return """Sei un assistente intelligente che aiuta a rispondere a domande su una collezione di articoli giornalistici politici italiani.
+    passages_strategy = (
+      "- Per domande sul CONTENUTO puoi usare `search_passages`, che restituisce solo i passaggi pertinenti: "
+      "usa `get_article_details` solo se gli estratti non bastano\n"
+    ) if self.passages_enabled else ""
+    
+    return f"""Sei un assistente intelligente che aiuta a rispondere a domande su una collezione di articoli giornalistici politici italiani.
 
 Hai accesso a vari strumenti per cercare e analizzare gli articoli. Usali in modo intelligente e strategico:
 
 **Strategie di ricerca:**
 - Per domande sul CONTENUTO ("cosa dice X su Y?", "qual è il pensiero di Z?"): usa `search_by_content` per trovare articoli rilevanti, poi `get_article_details` per leggere i contenuti completi
+{passages_strategy}- Per domande sul CONTENUTO con vincoli di autore, data o categoria ("cosa ha scritto X su Y nel 2023?"): usa `search_hybrid`
 - Per domande su CHI ha scritto cosa: usa `search_by_author` o `search_by_metadata`
 - Per CONTARE articoli: usa `count_articles`
 - Puoi fare MULTIPLE chiamate agli strumenti se necessario
 - Combina risultati da più strumenti per risposte complete
+- Le liste di articoli arrivano come tabelle (`columns` + `rows`) e i testi lunghi come estratti ("[…]" segna le parti omesse); se un risultato contiene `truncated`, alcune righe sono state omesse: segui `hint` solo se ti servono
 
 **Regole importanti:**
 1. Basa le risposte SOLO sugli articoli trovati - MAI inventare informazioni
@@ -354,85 +490,262 @@ Hai accesso a vari strumenti per cercare e analizzare gli articoli. Usali in mod
 - Usa le informazioni degli articoli per costruire una risposta completa
 - Termina sempre citando le fonti"""
   
-  def _execute_tool(self, tool_name: str, parameters: Dict) -> Dict[str, Any]:
-    """Execute a tool requested by the LLM"""
+  @staticmethod
+  def _canonical_parameters(value: Any) -> Any:
+    """Tool parameters with whitespace collapsed in strings and lists of strings sorted"""
+    if isinstance(value, dict):
+      return {k: BaseAgenticRAG._canonical_parameters(v) for k, v in value.items() if v not in (None, "", [])}
+    if isinstance(value, list):
+      items = [BaseAgenticRAG._canonical_parameters(v) for v in value]
+      return sorted(set(items)) if all(isinstance(v, str) for v in items) else items
+    if isinstance(value, str):
+      return " ".join(value.split())
+    return value
+  
+  def _tool_cache_key(self, tool_name: str, parameters: Dict) -> str:
+    """Memoization key: tool name plus canonical JSON of its parameters"""
+    canonical = json.dumps(self._canonical_parameters(parameters), sort_keys=True, ensure_ascii=False, default=str)
+    return f"{tool_name}\x00{canonical}"
+  
+  @staticmethod
+  def _tool_cache_summary(stats: Dict[str, int]) -> Dict[str, Any]:
+    """Tool cache hits and misses of one question"""
+    lookups = stats['hits'] + stats['misses']
+    return {**stats, "hit_rate": round(stats['hits'] / lookups, 3) if lookups else 0.0}
+  
+  def _tool_plan(
+      self,
+      tool_name: str,
+      parameters: Dict,
+      cache_stats: Optional[Dict[str, int]] = None,
+      corpus_version: Optional[int] = None):
+    """
+    Plan of a tool requested by the LLM, through the tool cache (cache_stats
+    counts hits and misses). Results are memoized only if computed on the
+    corpus version of the cache, read by the request at its start.
+    """
+    if self.tool_cache is None:
+      return (yield from self._run_tool(tool_name, parameters))
     
-    try:
-      if tool_name == "search_by_content":
-        return self._tool_search_by_content(parameters)
-      
-      elif tool_name == "search_by_author":
-        return self._tool_search_by_author(parameters)
-      
-      elif tool_name == "search_by_metadata":
-        return self._tool_search_by_metadata(parameters)
-      
-      elif tool_name == "count_articles":
-        return self._tool_count_articles(parameters)
-      
-      elif tool_name == "get_article_details":
-        return self._tool_get_article_details(parameters)
-      
-      else:
-        return {"error": f"Unknown tool: {tool_name}"}
+    key = self._tool_cache_key(tool_name, parameters)
+    result = self.tool_cache.get(key)
+    if result is not None:
+      logger.info("    (risultato dalla cache)")
+      if cache_stats is not None:
+        cache_stats['hits'] += 1
+      return result
+    
+    if cache_stats is not None:
+      cache_stats['misses'] += 1
+    result = yield from self._run_tool(tool_name, parameters)
+    if 'error' not in result and corpus_version is not None and corpus_version == self._tool_cache_version:
+      self.tool_cache.put(key, result)
+    return result
+  
+  def _run_tool(self, tool_name: str, parameters: Dict):
+    """Plan of a tool requested by the LLM, without the cache"""
+    tools = {
+      "search_by_content": self._tool_search_by_content,
+      "search_hybrid": self._tool_search_hybrid,
+      "search_by_author": self._tool_search_by_author,
+      "search_by_metadata": self._tool_search_by_metadata,
+      "count_articles": self._tool_count_articles,
+      "get_article_details": self._tool_get_article_details
+    }
+    if self.passages_enabled:
+      tools["search_passages"] = self._tool_search_passages
+    
+    if tool_name not in tools:
+      return {"error": f"Unknown tool: {tool_name}"}
     
+    try:
+      return (yield from tools[tool_name](parameters))
     except Exception as e:
       return {"error": str(e)}
   
-  def _tool_search_by_content(self, params: Dict) -> Dict:
-    """Semantic search"""
+  def _tool_search_by_content(self, params: Dict):
+    """Semantic search, optionally fused with BM25 lexical search and re-ranked"""
     query = params['query']
     
-    query_embedding = self.embedder.embed_text(query)
+    mode = params.get('mode') or 'fused'
+    if self.lexical_index is None:
+      mode = 'semantic'
+    
+    if mode != 'lexical' and not len(self.index):
+      return {"articles": [], "message": "No articles with embeddings found"}
+    
+    hits, score_key, min_score = yield cpu_call(self._content_hits, query, mode)
+    
+    if self.reranker is not None:
+      # The cross-encoder replaces the similarity cutoff
+      hits, score_key, min_score = (yield from self._rerank_hits(query, hits)), "rerank_score", None
+    
+    top_articles = yield from self._rank_articles(hits, score_key=score_key, min_score=min_score)
+    
+    return {
+      "total_found": len(top_articles),
+      "mode": mode,
+      "articles": top_articles
+    }
+  
+  def _content_hits(self, query: str, mode: str) -> Tuple[List, str, Optional[float]]:
+    """First-stage (article_id, score) hits of search_by_content, with the score name and cutoff"""
+    # More candidates when the cross-encoder picks the best ones
+    limit = max(self.semantic_top_k, self.reranker.top_n) if self.reranker else self.semantic_top_k
     
-    all_articles = self.db.get_all_articles(
+    if mode == 'lexical':
+      return self.lexical_index.search(query, limit), "bm25_score", None
+    
+    query_embedding = self.embedder.embed_query(query)
+    
+    if mode == 'semantic':
+      return self.index.search(query_embedding, limit), "similarity_score", 0.3
+    
+    # Reciprocal rank fusion: exact names and rare terms found by BM25 join the semantic ranking
+    semantic_hits = [
+      (article_id, score)
+      for article_id, score in self.index.search(query_embedding, self.fusion_candidates)
+      if score > 0.3
+    ]
+    lexical_hits = self.lexical_index.search(query, self.fusion_candidates)
+    return reciprocal_rank_fusion([semantic_hits, lexical_hits], k=self.rrf_k)[:limit], "fusion_score", None
+  
+  def _tool_search_hybrid(self, params: Dict):
+    """Semantic search restricted to the articles matching metadata filters"""
+    query = params['query']
+    filters = self._build_metadata_filter(params)
+    
+    if not len(self.index):
+      return {"articles": [], "message": "No articles with embeddings found"}
+    
+    # Candidate set from the metadata indexes (with the query embedding at the same time), then top-k over that subset only
+    if filters:
+      allowed_ids, query_embedding = yield [
+        db_call('find_article_ids', filters),
+        cpu_call(self.embedder.embed_query, query)
+      ]
+      if not allowed_ids:
+        return {"total_found": 0, "filters_used": params, "articles": []}
+    else:
+      allowed_ids, query_embedding = None, (yield cpu_call(self.embedder.embed_query, query))
+    
+    limit = max(self.semantic_top_k, self.reranker.top_n) if self.reranker else self.semantic_top_k
+    hits = yield cpu_call(self.index.search, query_embedding, limit, allowed_ids=allowed_ids)
+    if self.reranker is not None:
+      hits = yield from self._rerank_hits(query, hits)
+      top_articles = yield from self._rank_articles(hits, score_key="rerank_score", min_score=None)
+    else:
+      top_articles = yield from self._rank_articles(hits)
+    
+    return {
+      "total_found": len(top_articles),
+      "candidates": len(allowed_ids) if allowed_ids is not None else len(self.index),
+      "filters_used": params,
+      "articles": top_articles
+    }
+  
+  def _rerank_hits(self, query: str, hits: List):
+    """Re-score the first-stage (article_id, score) hits with the cross-encoder"""
+    candidate_ids = [article_id for article_id, _ in hits[:self.reranker.top_n]]
+    documents = yield db_call(
+      'find_by_filter',
+      {"article_id": {"$in": candidate_ids}},
+      projection={'article_id': 1, 'metadata.title': 1, 'content.full_text': 1}
+    )
+    texts = {
+      art['article_id']: f"{art['metadata']['title']}\n{art.get('content', {}).get('full_text', '')}"
+      for art in documents
+    }
+    
+    candidates = [(article_id, texts[article_id]) for article_id in candidate_ids if article_id in texts]
+    reranked = yield cpu_call(self.reranker.rerank, query, candidates)
+    return reranked[:self.rerank_max_results]
+  
+  def _rank_articles(self, hits: List, score_key: str = "similarity_score", min_score: Optional[float] = 0.3):
+    """Turn (article_id, score) hits into result rows, dropping matches not above min_score"""
+    if min_score is not None:
+      hits = [(article_id, score) for article_id, score in hits if score > min_score]
+    
+    # Fetch metadata only for the top hits
+    articles = yield db_call(
+      'find_by_filter',
+      {"article_id": {"$in": [article_id for article_id, _ in hits]}},
       projection={
         'article_id': 1,
         'metadata': 1,
-        'embedding': 1,
         'url': 1,
         'source': 1
       }
     )
+    by_id = {art['article_id']: art for art in articles}
+    ranked = [(by_id[article_id], score) for article_id, score in hits if article_id in by_id]
     
-    articles_with_embeddings = [
-      (art, art['embedding'])
-      for art in all_articles
-      if 'embedding' in art and art['embedding']
+    return [
+      {**self._article_row(art), "source": art.get('source', 'N/A'), score_key: round(float(score), 4)}
+      for art, score in ranked
     ]
+  
+  @staticmethod
+  def _article_row(art: Dict) -> Dict:
+    """Id, title, author, date and url of an article document, as returned by the tools"""
+    metadata = art['metadata']
+    return {
+      "article_id": art['article_id'],
+      "title": metadata['title'],
+      "author": metadata['author'],
+      "date": metadata['publication_date'].strftime('%Y-%m-%d') if metadata.get('publication_date') else 'N/A',
+      "url": art.get('url', 'N/A')
+    }
+  
+  def _tool_search_passages(self, params: Dict):
+    """Semantic search over article passages"""
+    query = params['query']
     
-    if not articles_with_embeddings:
-      return {"articles": [], "message": "No articles with embeddings found"}
-    
-    ranked = self.embedder.rank_by_similarity(
-      query_embedding,
-      articles_with_embeddings
-    )
+    if self.passage_index is None or not len(self.passage_index):
+      return {"passages": [], "message": "No passages found"}
     
-    top_articles = [
-      {
-        "article_id": art['article_id'],
-        "title": art['metadata']['title'],
-        "author": art['metadata']['author'],
-        "date": art['metadata']['publication_date'].strftime('%Y-%m-%d') if art['metadata'].get('publication_date') else 'N/A',
-        "url": art.get('url', 'N/A'),
-        "source": art.get('source', 'N/A'),
-        "similarity_score": round(float(score), 3)
-      }
-      for art, _, score in ranked[:self.semantic_top_k]
+    query_embedding = yield cpu_call(self.embedder.embed_query, query)
+    hits = [
+      (passage_id, score)
+      for passage_id, score in (yield cpu_call(self.passage_index.search, query_embedding, self.passage_top_k))
       if score > 0.3
     ]
     
+    passages = {p['passage_id']: p for p in (yield db_call('find_passages', [passage_id for passage_id, _ in hits]))}
+    articles = {
+      a['article_id']: a
+      for a in (yield db_call(
+        'find_by_filter',
+        {"article_id": {"$in": list({p['article_id'] for p in passages.values()})}},
+        projection={'article_id': 1, 'metadata': 1, 'url': 1}
+      ))
+    }
+    
+    top_passages = []
+    for passage_id, score in hits:
+      passage = passages.get(passage_id)
+      article = articles.get(passage['article_id']) if passage else None
+      if article is None:
+        continue
+      top_passages.append({
+        **self._article_row(article),
+        "passage_id": passage_id,
+        "offsets": [passage['start'], passage['end']],
+        "text": passage['text'],
+        "similarity_score": round(float(score), 3)
+      })
+    
     return {
-      "total_found": len(top_articles),
-      "articles": top_articles
+      "total_found": len(top_passages),
+      "passages": top_passages
     }
   
-  def _tool_search_by_author(self, params: Dict) -> Dict:
+  def _tool_search_by_author(self, params: Dict):
     """Search by author"""
     author = params['author']
     
-    articles = self.db.find_by_filter(
+    articles = yield db_call(
+      'find_by_filter',
       {"metadata.author": {"$regex": author, "$options": "i"}},
       projection={'article_id': 1, 'metadata': 1, 'url': 1},
       limit=50
@@ -440,20 +753,11 @@ Hai accesso a vari strumenti per cercare e analizzare gli articoli. Usali in mod
     
     return {
       "total_found": len(articles),
-      "articles": [
-        {
-          "article_id": a['article_id'],
-          "title": a['metadata']['title'],
-          "author": a['metadata']['author'],
-          "date": a['metadata']['publication_date'].strftime('%Y-%m-%d') if a['metadata'].get('publication_date') else 'N/A',
-          "url": a.get('url', 'N/A')
-        }
-        for a in articles
-      ]
+      "articles": [self._article_row(a) for a in articles]
     }
   
-  def _tool_search_by_metadata(self, params: Dict) -> Dict:
-    """Search with metadata filters"""
+  def _build_metadata_filter(self, params: Dict) -> Dict:
+    """MongoDB filter from the author / date_from / date_to / categories tool parameters"""
     filters = {}
     
     if 'author' in params and params['author']:
@@ -472,54 +776,37 @@ Hai accesso a vari strumenti per cercare e analizzare gli articoli. Usali in mod
     if 'categories' in params and params['categories']:
       filters['metadata.categories'] = {"$in": params['categories']}
     
-    articles = self.db.find_by_filter(filters, limit=100)
+    return filters
+  
+  def _tool_search_by_metadata(self, params: Dict):
+    """Search with metadata filters"""
+    filters = self._build_metadata_filter(params)
+    
+    articles = yield db_call('find_by_filter', filters, limit=100)
     
     return {
       "total_found": len(articles),
       "filters_used": params,
-      "articles": [
-        {
-          "article_id": a['article_id'],
-          "title": a['metadata']['title'],
-          "author": a['metadata']['author'],
-          "date": a['metadata']['publication_date'].strftime('%Y-%m-%d') if a['metadata'].get('publication_date') else 'N/A'
-        }
-        for a in articles[:50]
-      ]
+      "articles": [self._article_row(a) for a in articles[:50]]
     }
   
-  def _tool_count_articles(self, params: Dict) -> Dict:
+  def _tool_count_articles(self, params: Dict):
     """Count articles"""
-    filters = {}
-    
-    if 'author' in params and params['author']:
-      filters['metadata.author'] = {"$regex": params['author'], "$options": "i"}
-    
-    if 'date_from' in params and params['date_from']:
-      if 'metadata.publication_date' not in filters:
-        filters['metadata.publication_date'] = {}
-      filters['metadata.publication_date']['$gte'] = datetime.fromisoformat(params['date_from'])
-    
-    if 'date_to' in params and params['date_to']:
-      if 'metadata.publication_date' not in filters:
-        filters['metadata.publication_date'] = {}
-      filters['metadata.publication_date']['$lte'] = datetime.fromisoformat(params['date_to'])
-    
-    if 'categories' in params and params['categories']:
-      filters['metadata.categories'] = {"$in": params['categories']}
+    filters = self._build_metadata_filter(params)
     
-    count = self.db.count_by_filter(filters)
+    count = yield db_call('count_by_filter', filters)
     
     return {
       "count": count,
       "filters_used": params
     }
   
-  def _tool_get_article_details(self, params: Dict) -> Dict:
+  def _tool_get_article_details(self, params: Dict):
     """Get full article content"""
     article_ids = params['article_ids']
     
-    articles = self.db.find_by_filter(
+    articles = yield db_call(
+      'find_by_filter',
       {"article_id": {"$in": article_ids}},
       projection={
         'article_id': 1,
@@ -533,15 +820,214 @@ Hai accesso a vari strumenti per cercare e analizzare gli articoli. Usali in mod
     return {
       "total_found": len(articles),
       "articles": [
-        {
-          "article_id": a['article_id'],
-          "title": a['metadata']['title'],
-          "author": a['metadata']['author'],
-          "date": a['metadata']['publication_date'].strftime('%Y-%m-%d') if a['metadata'].get('publication_date') else 'N/A',
-          "url": a.get('url', 'N/A'),
-          "source": a.get('source', 'N/A'),
-          "content": a['content']['full_text']
-        }
+        {**self._article_row(a), "source": a.get('source', 'N/A'), "content": a['content']['full_text']}
         for a in articles
       ]
     }
+
+
+class AgenticRAG(BaseAgenticRAG):
+  """Agentic RAG system - LLM decides everything"""
+  
+  def __init__(self):
+    """Initialize agentic RAG"""
+    super().__init__()
+    
+    self.llm = create_llm_client(self.config)
+    
+    # Chat history
+    self.conversation_history = []
+    
+    logger.info("✓ RAG Agentico pronto")
+  
+  def _generate(self, conversation: List[Dict], on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """
+    One LLM turn; with on_delta the text is passed to it as it is generated.
+    A turn calling tools may start with a preamble, which is not part of
+    the answer: on_delta(None) then tells to discard the text of the turn.
+    """
+    if on_delta is None:
+      return self.llm.generate_with_tools(conversation, self.tools)
+    
+    streamed = False
+    for event in self.llm.stream_with_tools(conversation, self.tools):
+      if event['type'] == 'text':
+        on_delta(event['text'])
+        streamed = True
+      else:
+        response = event['response']
+    
+    if streamed and response['tool_calls']:
+      on_delta(None)
+    return response
+  
+  def _check_corpus(self) -> Optional[int]:
+    """Read the corpus version (if a cache needs it) and switch to indexes rebuilt since they were loaded"""
+    corpus_version = None
+    if self.tool_cache is not None or self.answer_cache is not None:
+      corpus_version = self.db.get_corpus_version()
+      self._sync_tool_cache(corpus_version)
+    
+    # Ingestion publishes the indexes before bumping the version: read after it
+    self._reload_indexes_if_changed()
+    return corpus_version
+  
+  def _run_agent_loop(
+      self,
+      conversation: List[Dict],
+      max_iterations: int,
+      on_delta: Optional[Callable[[Optional[str]], None]] = None,
+      corpus_version: Optional[int] = None) -> Dict[str, Any]:
+    """Let the LLM call tools until it answers; the conversation ends with the user question"""
+    tool_results = []
+    usage_log = []
+    tool_tokens = 0
+    tool_cache_stats = {"hits": 0, "misses": 0}
+    user_query = conversation[-1]['content']  # excerpts of long texts are centered on the question
+    
+    for iteration in range(max_iterations):
+      logger.info(f"[Iterazione {iteration + 1}]")
+      self._log_prompt_size(conversation)
+      
+      response = self._generate(conversation, on_delta)
+      self._log_usage(iteration, response, usage_log)
+      
+      if not response['tool_calls']:
+        logger.info("✓ Risposta generata")
+        self._log_query_cache_stats()
+        return self._loop_result(response['content'], tool_results, iteration + 1, usage_log, tool_cache_stats)
+      
+      self._log_tool_calls(response['tool_calls'])
+      results = [
+        self._execute_tool(tool_call['name'], tool_call['parameters'], tool_cache_stats, corpus_version)
+        for tool_call in response['tool_calls']
+      ]
+      tool_tokens = self._append_tool_turn(conversation, response, results, tool_results, user_query, tool_tokens)
+    
+    return self._loop_result(self.ITERATION_LIMIT_ANSWER, tool_results, max_iterations, usage_log, tool_cache_stats)
+  
+  def query(self, user_query: str, max_iterations: int = 10, on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """
+    Single query mode - no conversation history
+    
+    Args:
+      user_query: Question of the user
+      max_iterations: Maximum number of LLM turns
+      on_delta: Called with each text fragment as the LLM generates it (streaming),
+        and with None when the text so far was a preamble to tool calls, to discard
+    """
+    
+    print('='*80)
+    
+    corpus_version = self._check_corpus()
+    
+    if self.answer_cache is not None:
+      query_embedding = self.embedder.embed_query(user_query)
+      cached = self._cached_answer(user_query, query_embedding, corpus_version)
+      if cached is not None:
+        if on_delta is not None:
+          on_delta(cached['answer'])
+        return cached
+    
+    conversation = [
+      {"role": "system", "content": self._get_system_prompt()},
+      {"role": "user", "content": user_query}
+    ]
+    
+    try:
+      result = self._run_agent_loop(conversation, max_iterations, on_delta, corpus_version)
+    except Exception as e:
+      logger.error(f"✗ Errore nel generare una conversazione: {e}")
+      sys.exit(1)
+    
+    if self.answer_cache is not None and result['answer'] != self.ITERATION_LIMIT_ANSWER:
+      self.answer_cache.put(user_query, query_embedding, result, corpus_version)
+    return result
+  
+  def chat(self, user_query: str, max_iterations: int = 10, on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """Chat mode - maintains conversation history (on_delta as in query)"""
+    
+    logger.info(f"Domanda: {user_query}")
+    
+    corpus_version = self._check_corpus()
+    
+    # Auto-compress history if needed
+    if self.auto_compress and len(self.conversation_history) > self.max_history_turns * 2:
+      logger.info("  Si comprime l'history della chat...")
+      if self.compression_strategy == 'summary':
+        self._compress_history_with_summary()
+      elif self.compression_strategy == 'truncate':
+        self._truncate_history()
+    
+    # Add user message to history
+    self.conversation_history.append({
+      "role": "user",
+      "content": user_query
+    })
+    
+    # Build conversation with system prompt + history
+    conversation = [
+      {"role": "system", "content": self._get_system_prompt()}
+    ] + self.conversation_history
+    
+    result = self._run_agent_loop(conversation, max_iterations, on_delta, corpus_version)
+    
+    # Only the final answer goes to the persistent history
+    self.conversation_history.append({
+      "role": "assistant",
+      "content": result['answer']
+    })
+    
+    return result
+  
+  def reset_chat(self):
+    """Reset conversation history"""
+    self.conversation_history = []
+    logger.info("✓ History della chat pulita")
+  
+  def get_chat_history(self) -> List[Dict]:
+    """Get current chat history"""
+    return self.conversation_history.copy()
+  
+  def _compress_history_with_summary(self):
+    """Compress old history with AI summary"""
+    keep_recent = 6  # Keep last 3 turns (6 messages)
+    
+    if len(self.conversation_history) <= keep_recent:
+      return
+    
+    old_messages = self.conversation_history[:-keep_recent]
+    recent_messages = self.conversation_history[-keep_recent:]
+    
+    try:
+      summary = self.llm.generate(self._summary_prompt(old_messages), max_tokens=200)
+      
+      self.conversation_history = [
+        {
+          "role": "system",
+          "content": f"[Contesto conversazione precedente: {summary}]"
+        }
+      ] + recent_messages
+      
+      logger.info(f"  ✓ History compressa: {len(old_messages)} messaggi → sommario")
+    
+    except Exception as e:
+      logger.info(f"  ⚠ Compressione fallita: {e}")
+      self.conversation_history = recent_messages
+  
+  def _truncate_history(self):
+    """Simple truncation without AI"""
+    keep = self.max_history_turns * 2
+    if len(self.conversation_history) > keep:
+      removed = len(self.conversation_history) - keep
+      self.conversation_history = self.conversation_history[-keep:]
+      logger.info(f"  ✓ History troncata: rimossi {removed} vecchi messaggi")
+  
+  def _execute_tool(
+      self,
+      tool_name: str,
+      parameters: Dict,
+      cache_stats: Optional[Dict[str, int]] = None,
+      corpus_version: Optional[int] = None) -> Dict[str, Any]:
+    """Execute a tool requested by the LLM, through the tool cache (cache_stats counts hits and misses)"""
+    return run_plan(self._tool_plan(tool_name, parameters, cache_stats, corpus_version), self.db)
@@ -0,0 +1,152 @@
+import time
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from rag_journal.index.bm25_index import tokenize
+from rag_journal.index.similarity import normalize_rows
+
+
+class SemanticAnswerCache:
+  """
+  Cache of the answers of single queries, keyed by query embedding.
+
+  A question is served from the cache when a cached question has cosine
+  similarity above the threshold and the same guard terms (the BM25
+  terms of the question: lowercased, stemmed, without stopwords), so that
+  "articoli di mario rossi nel 2023" never reuses the answer about
+  another author or year, whatever the capitalization. Each entry keeps the answer, the tool trace and the corpus
+  version it was computed on: when the corpus version changes (any
+  ingestion, including articles edited in place) all older entries are
+  dropped.
+  """
+
+  def __init__(self, dimension: int, max_entries: int = 2000, threshold: float = 0.95, ttl: Optional[float] = None):
+    """
+    Args:
+      dimension: Embedding dimension
+      max_entries: Maximum number of answers (least recently used are dropped)
+      threshold: Minimum cosine similarity between questions
+      ttl: Entry lifetime in seconds (None: no expiry)
+    """
+    self.threshold = threshold
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self.hits = 0
+    self.misses = 0
+
+    self.dimension = dimension
+    self._embeddings = np.zeros((max_entries, dimension), dtype=np.float32)
+    self._entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+    self._last_used = np.zeros(max_entries, dtype=np.float64)
+    self._corpus_version = None
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return sum(entry is not None for entry in self._entries)
+
+  @staticmethod
+  def guard_terms(question: str) -> frozenset:
+    """Content terms of a question, case-normalized"""
+    return frozenset(tokenize(question))
+
+  def _normalized(self, embedding: np.ndarray) -> np.ndarray:
+    """Unit-length embedding, checked against the cache dimension"""
+    vector = normalize_rows(embedding)[0]
+    if vector.shape[0] != self.dimension:
+      raise ValueError(
+        f"Query embedding dimension {vector.shape[0]} does not match answer cache dimension {self.dimension}"
+      )
+    return vector
+
+  def lookup(self, question: str, embedding: np.ndarray, corpus_version: int) -> Optional[Tuple[Dict[str, Any], float]]:
+    """
+    Most similar cached question above the threshold, answered on the current corpus version.
+
+    Returns:
+      (entry, similarity), or None
+    """
+    guard = self.guard_terms(question)
+    query = self._normalized(embedding)
+
+    with self._lock:
+      self._drop_stale(corpus_version)
+      scores = self._embeddings @ query
+      now = time.time()
+      for slot in np.argsort(-scores):
+        if scores[slot] < self.threshold:
+          break
+        entry = self._entries[slot]
+        if entry is None:
+          continue
+        if self.ttl and now - entry['created_at'] > self.ttl:
+          self._drop(slot)
+          continue
+        if entry['guard'] != guard:
+          continue
+        self._last_used[slot] = now
+        self.hits += 1
+        return entry, float(scores[slot])
+
+      self.misses += 1
+      return None
+
+  def put(self, question: str, embedding: np.ndarray, result: Dict[str, Any], corpus_version: int):
+    """
+    Store an answer.
+
+    Args:
+      question: User question
+      embedding: Query embedding
+      result: Result of the agent loop (answer, tool_calls, iterations)
+      corpus_version: Corpus version the answer was computed on
+    """
+    vector = self._normalized(embedding)
+
+    with self._lock:
+      self._drop_stale(corpus_version)
+      if corpus_version != self._corpus_version:
+        return # Computed on a corpus already replaced
+
+      free = [slot for slot, entry in enumerate(self._entries) if entry is None]
+      slot = free[0] if free else int(np.argmin(self._last_used))
+      self._embeddings[slot] = vector
+      self._entries[slot] = {
+        "question": question,
+        "guard": self.guard_terms(question),
+        "answer": result['answer'],
+        "tool_calls": result['tool_calls'],
+        "iterations": result['iterations'],
+        "corpus_version": corpus_version,
+        "created_at": time.time()
+      }
+      self._last_used[slot] = time.time()
+
+  def _drop_stale(self, corpus_version: int):
+    """Drop the entries of older corpus versions, the first time a newer version is seen"""
+    if self._corpus_version is not None and corpus_version <= self._corpus_version:
+      return
+    for slot, entry in enumerate(self._entries):
+      if entry is not None and entry['corpus_version'] != corpus_version:
+        self._drop(slot)
+    self._corpus_version = corpus_version
+
+  def _drop(self, slot: int):
+    self._entries[slot] = None
+    self._embeddings[slot] = 0.0
+    self._last_used[slot] = 0.0
+
+  def clear(self):
+    """Remove all entries (counters are kept)"""
+    with self._lock:
+      for slot in range(self.max_entries):
+        self._drop(slot)
+
+  def stats(self) -> Dict[str, Any]:
+    """Get hit/miss counters"""
+    lookups = self.hits + self.misses
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "size": len(self),
+      "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+    }
@@ -0,0 +1,221 @@
+import asyncio
+import weakref
+from typing import Callable, Dict, Any, List, Optional
+from rag_journal.database.async_mongodb_client import AsyncMongoDBClient
+from rag_journal.llm.async_llm_client import create_async_llm_client
+from rag_journal.rag.agentic_rag import BaseAgenticRAG
+from rag_journal.rag.session_store import create_session_store
+from rag_journal.rag.tool_plan import run_plan_async
+from rag_journal.utils.logger import logger
+
+
+class AsyncAgenticRAG(BaseAgenticRAG):
+  """
+  Asyncio variant of the agentic RAG system, for serving many users from one process.
+
+  LLM calls go through the async SDK clients and the MongoDB queries of
+  the tools through the async driver; CPU-bound work (query embeddings,
+  index search, re-ranking) runs in worker threads. All tool calls of one
+  LLM turn run concurrently. Chat histories are kept per session id in a
+  session store.
+  """
+
+  def __init__(self):
+    """Initialize async agentic RAG (indexes, embedder and tools as in AgenticRAG)"""
+    super().__init__()
+
+    self.llm = create_async_llm_client(self.config)
+    self.adb = AsyncMongoDBClient()
+
+    # Chat histories by session id; a lock per session serializes its turns,
+    # and is dropped as soon as no turn of the session holds or awaits it
+    self.session_store = create_session_store(self.config, self.adb.db)
+    self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    logger.info("✓ RAG Agentico asincrono pronto")
+
+  async def close(self):
+    """Release the MongoDB connections"""
+    await self.adb.close()
+
+  async def _generate(self, conversation: List[Dict], on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """
+    One LLM turn; with on_delta the text is passed to it as it is generated.
+    A turn calling tools may start with a preamble, which is not part of
+    the answer: on_delta(None) then tells to discard the text of the turn.
+    """
+    if on_delta is None:
+      return await self.llm.generate_with_tools(conversation, self.tools)
+
+    streamed = False
+    async for event in self.llm.stream_with_tools(conversation, self.tools):
+      if event['type'] == 'text':
+        on_delta(event['text'])
+        streamed = True
+      else:
+        response = event['response']
+
+    if streamed and response['tool_calls']:
+      on_delta(None)
+    return response
+
+  async def _check_corpus(self) -> Optional[int]:
+    """Read the corpus version (if a cache needs it) and switch to indexes rebuilt since they were loaded"""
+    corpus_version = None
+    if self.tool_cache is not None or self.answer_cache is not None:
+      corpus_version = await self.adb.get_corpus_version()
+      self._sync_tool_cache(corpus_version)
+
+    # Ingestion publishes the indexes before bumping the version: read after it
+    await asyncio.to_thread(self._reload_indexes_if_changed)
+    return corpus_version
+
+  async def _run_agent_loop(
+      self,
+      conversation: List[Dict],
+      max_iterations: int,
+      on_delta: Optional[Callable[[Optional[str]], None]] = None,
+      corpus_version: Optional[int] = None) -> Dict[str, Any]:
+    """Let the LLM call tools until it answers, running the tool calls of each turn concurrently"""
+    tool_results = []
+    usage_log = []
+    tool_tokens = 0
+    tool_cache_stats = {"hits": 0, "misses": 0}
+    user_query = conversation[-1]['content']  # excerpts of long texts are centered on the question
+
+    for iteration in range(max_iterations):
+      logger.info(f"[Iterazione {iteration + 1}]")
+      self._log_prompt_size(conversation)
+
+      response = await self._generate(conversation, on_delta)
+      self._log_usage(iteration, response, usage_log)
+
+      if not response['tool_calls']:
+        logger.info("✓ Risposta generata")
+        self._log_query_cache_stats()
+        return self._loop_result(response['content'], tool_results, iteration + 1, usage_log, tool_cache_stats)
+
+      self._log_tool_calls(response['tool_calls'])
+      results = await asyncio.gather(*(
+        self._execute_tool(tool_call['name'], tool_call['parameters'], tool_cache_stats, corpus_version)
+        for tool_call in response['tool_calls']
+      ))
+      tool_tokens = self._append_tool_turn(conversation, response, results, tool_results, user_query, tool_tokens)
+
+    return self._loop_result(self.ITERATION_LIMIT_ANSWER, tool_results, max_iterations, usage_log, tool_cache_stats)
+
+  async def query(
+      self,
+      user_query: str,
+      max_iterations: int = 10,
+      on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """Single query mode - no conversation history (on_delta receives the streamed text)"""
+    corpus_version = await self._check_corpus()
+
+    if self.answer_cache is not None:
+      query_embedding = await asyncio.to_thread(self.embedder.embed_query, user_query)
+      cached = self._cached_answer(user_query, query_embedding, corpus_version)
+      if cached is not None:
+        if on_delta is not None:
+          on_delta(cached['answer'])
+        return cached
+
+    conversation = [
+      {"role": "system", "content": self._get_system_prompt()},
+      {"role": "user", "content": user_query}
+    ]
+
+    result = await self._run_agent_loop(conversation, max_iterations, on_delta, corpus_version)
+
+    if self.answer_cache is not None and result['answer'] != self.ITERATION_LIMIT_ANSWER:
+      self.answer_cache.put(user_query, query_embedding, result, corpus_version)
+    return result
+
+  async def chat(
+      self,
+      session_id: str,
+      user_query: str,
+      max_iterations: int = 10,
+      on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """Chat mode - maintains one conversation history per session (on_delta receives the streamed text)"""
+    logger.info(f"[{session_id}] Domanda: {user_query}")
+
+    corpus_version = await self._check_corpus()
+
+    async with self._session_lock(session_id):
+      history = await self.session_store.get(session_id)
+
+      # Auto-compress history if needed
+      if self.auto_compress and len(history) > self.max_history_turns * 2:
+        logger.info(f"  [{session_id}] Si comprime l'history della chat...")
+        history = await self._compress_history(history)
+
+      history.append({
+        "role": "user",
+        "content": user_query
+      })
+
+      conversation = [
+        {"role": "system", "content": self._get_system_prompt()}
+      ] + history
+
+      result = await self._run_agent_loop(conversation, max_iterations, on_delta, corpus_version)
+
+      # Only the final answer goes to the persistent history
+      history.append({
+        "role": "assistant",
+        "content": result['answer']
+      })
+      await self.session_store.save(session_id, history)
+
+    return result
+
+  def _session_lock(self, session_id: str) -> asyncio.Lock:
+    """Lock of a session, kept alive only by the turns using it"""
+    lock = self._session_locks.get(session_id)
+    if lock is None:
+      lock = asyncio.Lock()
+      self._session_locks[session_id] = lock
+    return lock
+
+  async def reset_chat(self, session_id: str):
+    """Reset the conversation history of a session"""
+    await self.session_store.delete(session_id)
+
+  async def get_chat_history(self, session_id: str) -> List[Dict]:
+    """Get the conversation history of a session"""
+    return await self.session_store.get(session_id)
+
+  async def _compress_history(self, history: List[Dict]) -> List[Dict]:
+    """Return a compressed copy of a session history (summary or truncation)"""
+    if self.compression_strategy == 'truncate':
+      return history[-self.max_history_turns * 2:]
+
+    keep_recent = 6  # Keep last 3 turns (6 messages)
+    if self.compression_strategy != 'summary' or len(history) <= keep_recent:
+      return history
+
+    old_messages = history[:-keep_recent]
+    recent_messages = history[-keep_recent:]
+
+    try:
+      summary = await self.llm.generate(self._summary_prompt(old_messages), max_tokens=200)
+      return [
+        {
+          "role": "system",
+          "content": f"[Contesto conversazione precedente: {summary}]"
+        }
+      ] + recent_messages
+
+    except Exception as e:
+      logger.info(f"  ⚠ Compressione fallita: {e}")
+      return recent_messages
+
+  async def _execute_tool(
+      self,
+      tool_name: str,
+      parameters: Dict,
+      cache_stats: Optional[Dict[str, int]] = None,
+      corpus_version: Optional[int] = None) -> Dict[str, Any]:
+    """Execute a tool requested by the LLM, through the tool cache shared by all sessions"""
+    return await run_plan_async(self._tool_plan(tool_name, parameters, cache_stats, corpus_version), self.adb)
@@ -0,0 +1,42 @@
+from typing import Any, Callable, Dict, Optional
+from rag_journal.rag.async_agentic_rag import AsyncAgenticRAG
+from rag_journal.rag.query_router import BaseQueryRouter
+from rag_journal.rag.tool_plan import run_plan_async
+
+
+class AsyncQueryRouter(BaseQueryRouter):
+  """Query router in front of AsyncAgenticRAG: templates answered through the async MongoDB client"""
+
+  def __init__(self, rag: Optional[AsyncAgenticRAG] = None):
+    """
+    Args:
+      rag: Agent for the questions not answered by the router (created if None)
+    """
+    super().__init__(rag or AsyncAgenticRAG())
+    self.adb = self.rag.adb
+
+  async def route(self, user_query: str) -> Optional[Dict[str, Any]]:
+    """Intent and parameters of a structured question, None for the agent"""
+    return await run_plan_async(self._route_plan(user_query), self.adb)
+
+  async def _answer(self, route: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer a routed question from MongoDB"""
+    return await run_plan_async(self._answer_plan(route), self.adb)
+
+  async def query(
+      self,
+      user_query: str,
+      max_iterations: int = 10,
+      on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """Answer a question, from MongoDB if structured or through the agent (result as in QueryRouter.query)"""
+    route = await self.route(user_query)
+
+    if route is None:
+      result = await self.rag.query(user_query, max_iterations=max_iterations, on_delta=on_delta)
+      return {**result, "type": "agent", "route": None}
+
+    self._log_route(route)
+    result = await self._answer(route)
+    if on_delta is not None:
+      on_delta(result['answer'])
+    return {**result, "route": route, "tool_calls": [], "iterations": 0}
@@ -0,0 +1,410 @@
+import re
+import unicodedata
+import numpy as np
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from rag_journal.index.similarity import normalize_rows
+from rag_journal.rag.agentic_rag import AgenticRAG, BaseAgenticRAG
+from rag_journal.rag.tool_plan import cpu_call, db_call, run_plan
+from rag_journal.utils.logger import logger
+
+
+# Words that may appear in a structured question besides author, years and counts:
+# anything else (a topic, an unknown name) sends the question to the agent
+TEMPLATE_WORDS = frozenset("""
+quanti quante quanto numero conta contare totale complessivamente in tutto tutti
+articoli articolo pezzi pubblicati pubblicato pubblicate usciti uscito scritto scritti scritte firmato firmati
+ha hanno sono e stato stati ci c di da del dal dall dei degli della dello delle nel nei negli nella
+il lo la l i gli le un una tra fra al fino a partire prima dopo anno quest scorso
+elenca elencami mostra mostrami lista elenco quali che dammi vorrei vedere
+ultimi ultimo ultime ultima piu recenti recente suoi sue autore autrice giornalista
+""".split())
+
+# Words of questions the router cannot answer exactly (content, analysis, time spans
+# other than years, categories): always sent to the agent
+AGENT_WORDS = frozenset("""
+su sul sull sulla sulle sui sugli sullo riguardo riguardano riguarda parla parlano parlato tema temi argomento
+cosa come perche chi quale dice dicono pensa opinione categoria categorie
+anni mese mesi settimana settimane giorno giorni oggi ieri
+gennaio febbraio marzo aprile maggio giugno luglio agosto settembre ottobre novembre dicembre
+""".split())
+
+_COUNT = re.compile(r"\b(quanti|quante|numero|conta|contare|totale)\b")
+_LATEST = re.compile(r"\b(ultim[ioea]|piu recent[ie]|recenti)\b")
+_SINGLE_LATEST = re.compile(r"\b(ultimo|ultima|piu recente)\b")
+_LIST = re.compile(r"^(articoli|elenco)\b|\b(elenca|elencami|mostra|mostrami|lista|quali|dammi)\b")
+_YEAR = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_SMALL_NUMBER = re.compile(r"\b(\d{1,3})\b")
+
+# Examples of the intents for the nearest-centroid classifier
+INTENT_EXAMPLES = {
+  "count": [
+    "Quanti articoli ha scritto Mario Rossi nel 2023?",
+    "Quanti articoli sono stati pubblicati nel 2022?",
+    "Numero di articoli di Giulia Verdi",
+    "Quanti pezzi ha firmato questo giornalista quest'anno?",
+    "Mi dici quanti articoli ci sono in archivio?",
+    "Conta gli articoli usciti dal 2021"
+  ],
+  "list": [
+    "Elenca gli articoli di Mario Rossi",
+    "Quali articoli ha scritto Giulia Verdi nel 2023?",
+    "Mostrami gli articoli scritti da Luca Bianchi",
+    "Articoli di Anna Neri del 2022",
+    "Che articoli ha pubblicato questo autore?",
+    "Dammi la lista dei pezzi di Paolo Russo"
+  ],
+  "latest": [
+    "Quali sono gli ultimi articoli?",
+    "Mostrami gli articoli più recenti",
+    "Gli ultimi 5 articoli di Mario Rossi",
+    "Ultimi pezzi pubblicati",
+    "Articoli usciti di recente",
+    "L'ultimo articolo di Giulia Verdi"
+  ],
+  "agent": [
+    "Cosa dice Giulia Verdi sulla guerra in Ucraina?",
+    "Quali articoli parlano di energia rinnovabile?",
+    "Qual è il trend della politica energetica europea dal 2022?",
+    "Chi ha scritto più articoli sulla NATO?",
+    "Come è cambiata la narrativa sull'immigrazione?",
+    "Riassumi la posizione dei giornalisti sulle sanzioni alla Russia",
+    "Articoli su decarbonizzazione e cambiamento climatico",
+    "Confronta le opinioni sulla riforma fiscale"
+  ]
+}
+
+
+def _normalize(text: str) -> str:
+  """Lowercase, accents stripped, apostrophes and punctuation as spaces"""
+  text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+  return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+class IntentClassifier:
+  """Nearest-centroid classifier of questions, on the embedding model already loaded for search"""
+
+  def __init__(self, embedder, examples: Dict[str, List[str]], min_similarity: float = 0.6, min_margin: float = 0.05):
+    """
+    Args:
+      embedder: ArticleEmbedder
+      examples: Example questions by intent
+      min_similarity: Minimum similarity to the centroid of the predicted intent
+      min_margin: Minimum lead over the second intent
+    """
+    self.embedder = embedder
+    self.min_similarity = min_similarity
+    self.min_margin = min_margin
+    self.intents = list(examples)
+
+    centroids = []
+    for intent in self.intents:
+      embeddings = normalize_rows(self.embedder.embed_batch(examples[intent], show_progress_bar=False))
+      centroids.append(embeddings.mean(axis=0))
+    self.centroids = normalize_rows(np.array(centroids))
+
+  def predict(self, question: str) -> Tuple[Optional[str], float]:
+    """Predicted intent and its similarity; None if not confident"""
+    scores = self.centroids @ normalize_rows(self.embedder.embed_query(question))[0]
+    order = np.argsort(-scores)
+    best, second = scores[order[0]], scores[order[1]]
+    if best < self.min_similarity or best - second < self.min_margin:
+      return None, float(best)
+    return self.intents[order[0]], float(best)
+
+
+class BaseQueryRouter:
+  """
+  Fast path for simple structured questions.
+
+  Counting, listing by author and latest articles questions are
+  recognized by rules, or by the intent classifier when the rules do not
+  fire, and answered from indexed MongoDB queries with templates. Every
+  other or ambiguous question (a topic, an unknown name, two possible
+  authors) goes to the agent.
+
+  Routing and answering are tool plans (see tool_plan), run by
+  QueryRouter on MongoDBClient and by AsyncQueryRouter on the event loop.
+  """
+
+  def __init__(self, rag: BaseAgenticRAG):
+    """
+    Args:
+      rag: Agent for the questions not answered by the router
+    """
+    self.rag = rag
+
+    router_config = self.rag.config.get('router', {})
+    self.list_limit = router_config.get('list_limit', 20)
+    self.latest_limit = router_config.get('latest_limit', 10)
+
+    self.classifier = IntentClassifier(
+      self.rag.embedder,
+      INTENT_EXAMPLES,
+      min_similarity=router_config.get('classifier_min_similarity', 0.6),
+      min_margin=router_config.get('classifier_min_margin', 0.05)
+    ) if router_config.get('classifier', True) else None
+
+    self._authors: List[Tuple[str, Tuple[str, ...]]] = []
+    self._authors_version = None
+
+    logger.info("✓ Router delle domande pronto")
+
+  def _refresh_authors_plan(self):
+    """Reload the author names after an ingestion"""
+    corpus_version = yield db_call('get_corpus_version')
+    if corpus_version == self._authors_version:
+      return
+    authors = yield db_call('get_authors')
+    self._authors = [(author, tuple(_normalize(author).split())) for author in authors]
+    self._authors_version = corpus_version
+
+  def _find_author(self, tokens: List[str]) -> Tuple[Optional[str], set]:
+    """
+    Author named in a question: full name first, then a distinctive
+    part of it (e.g. the surname) shared by no other author.
+
+    Returns:
+      (author or None, positions of the question tokens naming the author)
+    """
+    matches = []
+    for author, name in self._authors:
+      for start in range(len(tokens) - len(name) + 1):
+        if name and tuple(tokens[start:start + len(name)]) == name:
+          matches.append((len(name), author, set(range(start, start + len(name)))))
+    if matches:
+      longest = max(length for length, _, _ in matches)
+      best = {(author, frozenset(positions)) for length, author, positions in matches if length == longest}
+      if len(best) == 1:
+        author, positions = best.pop()
+        return author, set(positions)
+      return None, set()
+
+    for position, token in enumerate(tokens):
+      if len(token) < 4 or token in TEMPLATE_WORDS:
+        continue
+      owners = {author for author, name in self._authors if token in name}
+      if len(owners) == 1:
+        return owners.pop(), {position}
+    return None, set()
+
+  @staticmethod
+  def _find_dates(text: str) -> Tuple[Optional[Tuple[Optional[int], Optional[int]]], set]:
+    """
+    Year range of a question: "nel 2023", "dal 2022", "dopo il 2021",
+    "fino al 2021", "prima del 2022", "tra il 2020 e il 2022",
+    "quest'anno", "l'anno scorso".
+
+    Returns:
+      ((first year, last year), years used), None for an unclear range
+    """
+    years = [int(y) for y in _YEAR.findall(text)]
+    current = datetime.now().year
+    if re.search(r"\bquest anno\b", text):
+      years.append(current)
+    if re.search(r"\banno scorso\b", text):
+      years.append(current - 1)
+
+    used = {str(y) for y in years}
+    if not years:
+      return (None, None), used
+    if len(years) == 2 and re.search(r"\b(tra|fra)\b", text):
+      return (min(years), max(years)), used
+    if len(years) > 1:
+      return None, used
+    if re.search(r"\b(dal|dall|a partire dal)\b", text):
+      return (years[0], None), used
+    if re.search(r"\bdopo\b", text):
+      return (years[0] + 1, None), used
+    if re.search(r"\bfino al\b", text):
+      return (None, years[0]), used
+    if re.search(r"\bprima\b", text):
+      return (None, years[0] - 1), used
+    return (years[0], years[0]), used
+
+  def _route_plan(self, user_query: str):
+    """
+    Intent and parameters of a structured question.
+
+    Returns:
+      {"intent", "source", "author", "years", "limit"}, or None for the agent
+    """
+    text = _normalize(user_query)
+    tokens = text.split()
+    if not tokens or AGENT_WORDS.intersection(tokens):
+      return None
+
+    yield from self._refresh_authors_plan()
+    author, author_positions = self._find_author(tokens)
+    years, used_numbers = self._find_dates(text)
+    if years is None:
+      return None
+
+    limit = None
+    if _LATEST.search(text):
+      number = _SMALL_NUMBER.search(text)
+      if number:
+        limit = int(number.group(1))
+        used_numbers.add(number.group(1))
+
+    residual = [
+      token for position, token in enumerate(tokens)
+      if position not in author_positions and token not in TEMPLATE_WORDS and token not in used_numbers
+    ]
+
+    # Anything outside the template (a topic, an unknown name) is for the agent
+    if residual:
+      return None
+
+    # Rules: an intent keyword
+    intent = None
+    if "articol" in text or "pezz" in text:
+      if _COUNT.search(text):
+        intent = "count"
+      elif _LATEST.search(text):
+        intent = "latest"
+      elif _LIST.search(text):
+        intent = "list"
+    source = "rules"
+
+    if intent is None:
+      if self.classifier is None:
+        return None
+      # Classifier: only picks the intent of template-only paraphrases
+      intent, _ = yield cpu_call(self.classifier.predict, user_query)
+      source = "classifier"
+      if intent in (None, "agent"):
+        return None
+
+    if intent == "list" and author is None and years == (None, None):
+      return None
+
+    # "L'ultimo articolo": one article, unless a count is given
+    if intent == "latest" and limit is None and _SINGLE_LATEST.search(text) and not re.search(r"\b(ultimi|ultime|recenti)\b", text):
+      limit = 1
+
+    return {
+      "intent": intent,
+      "source": source,
+      "author": author,
+      "years": years,
+      "limit": None if intent == "count" else limit or (self.latest_limit if intent == "latest" else self.list_limit)
+    }
+
+  @staticmethod
+  def _build_filter(route: Dict[str, Any]) -> Dict[str, Any]:
+    """MongoDB filter on the indexed author and publication date fields"""
+    filters = {}
+    if route['author']:
+      filters['metadata.author'] = route['author']
+    first, last = route['years']
+    if first or last:
+      filters['metadata.publication_date'] = {}
+      if first:
+        filters['metadata.publication_date']['$gte'] = datetime(first, 1, 1)
+      if last:
+        filters['metadata.publication_date']['$lt'] = datetime(last + 1, 1, 1)
+    return filters
+
+  @staticmethod
+  def _describe(route: Dict[str, Any]) -> str:
+    """Criteria of a question, as text: " di Mario Rossi nel 2023" """
+    description = f" di {route['author']}" if route['author'] else ""
+    first, last = route['years']
+    if first and first == last:
+      description += f" nel {first}"
+    elif first and last:
+      description += f" tra il {first} e il {last}"
+    elif first:
+      description += f" dal {first}"
+    elif last:
+      description += f" fino al {last}"
+    return description
+
+  def _answer_plan(self, route: Dict[str, Any]):
+    """Answer a routed question from MongoDB"""
+    filters = self._build_filter(route)
+    description = self._describe(route)
+
+    if route['intent'] == "count":
+      count = yield db_call('count_by_filter', filters)
+      return {
+        "type": "count",
+        "result": count,
+        "answer": f"Ho trovato {count} {'articolo' if count == 1 else 'articoli'}{description}."
+      }
+
+    count, articles = yield [
+      db_call('count_by_filter', filters),
+      db_call(
+        'find_latest',
+        filters,
+        projection={'article_id': 1, 'metadata': 1, 'url': 1, 'source': 1, 'number': 1},
+        limit=route['limit']
+      )
+    ]
+    if not articles:
+      answer = f"Non ho trovato articoli{description}."
+    else:
+      if route['intent'] == "latest":
+        header = "L'ultimo articolo" if len(articles) == 1 else f"Gli ultimi {len(articles)} articoli"
+      else:
+        header = f"Ecco {len(articles)} {'articolo' if len(articles) == 1 else 'articoli'}"
+      shown = header + description + (f" (su {count})" if count > len(articles) else "")
+      rows = [BaseAgenticRAG._article_row(art) for art in articles]
+      lines = [
+        f"{i}. {row['title']} - {row['author']}, {row['date']} ({row['url']})"
+        for i, row in enumerate(rows, 1)
+      ]
+      answer = f"{shown}:\n" + "\n".join(lines)
+
+    return {
+      "type": "list",
+      "result": articles,
+      "answer": answer
+    }
+
+  def _log_route(self, route: Dict[str, Any]):
+    logger.info(f"✓ Domanda instradata ({route['source']}): {route['intent']}{self._describe(route)}")
+
+
+class QueryRouter(BaseQueryRouter):
+  """Query router in front of AgenticRAG"""
+
+  def __init__(self, rag: Optional[AgenticRAG] = None):
+    """
+    Args:
+      rag: Agent for the questions not answered by the router (created if None)
+    """
+    super().__init__(rag or AgenticRAG())
+    self.db = self.rag.db
+
+  def route(self, user_query: str) -> Optional[Dict[str, Any]]:
+    """Intent and parameters of a structured question, None for the agent"""
+    return run_plan(self._route_plan(user_query), self.db)
+
+  def _answer(self, route: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer a routed question from MongoDB"""
+    return run_plan(self._answer_plan(route), self.db)
+
+  def query(
+      self,
+      user_query: str,
+      max_iterations: int = 10,
+      on_delta: Optional[Callable[[Optional[str]], None]] = None) -> Dict[str, Any]:
+    """
+    Answer a question, from MongoDB if structured or through the agent.
+    The result has the keys of AgenticRAG.query plus "type" ("count",
+    "list" or "agent") and "route".
+    """
+    route = self.route(user_query)
+
+    if route is None:
+      result = self.rag.query(user_query, max_iterations=max_iterations, on_delta=on_delta)
+      return {**result, "type": "agent", "route": None}
+
+    self._log_route(route)
+    result = self._answer(route)
+    if on_delta is not None:
+      on_delta(result['answer'])
+    return {**result, "route": route, "tool_calls": [], "iterations": 0}
@@ -0,0 +1,102 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from rag_journal.utils.lru_cache import LRUCache
+
+
+class SessionStore(ABC):
+  """Storage of chat histories by session id"""
+
+  @abstractmethod
+  async def get(self, session_id: str) -> List[Dict]:
+    """Get the history of a session (empty if unknown or expired)"""
+    pass
+
+  @abstractmethod
+  async def save(self, session_id: str, history: List[Dict]):
+    """Store the history of a session"""
+    pass
+
+  @abstractmethod
+  async def delete(self, session_id: str):
+    """Forget a session"""
+    pass
+
+
+class InMemorySessionStore(SessionStore):
+  """Process-local store: sessions are lost on restart and not shared by workers"""
+
+  def __init__(self, max_sessions: int = 10000, ttl: Optional[float] = None):
+    """
+    Args:
+      max_sessions: Maximum number of sessions (least recently used are dropped)
+      ttl: Session lifetime in seconds since its last turn (None: no expiry)
+    """
+    self.sessions = LRUCache(maxsize=max_sessions, ttl=ttl)
+
+  async def get(self, session_id: str) -> List[Dict]:
+    return list(self.sessions.get(session_id) or [])
+
+  async def save(self, session_id: str, history: List[Dict]):
+    self.sessions.put(session_id, list(history))
+
+  async def delete(self, session_id: str):
+    self.sessions.invalidate(session_id)
+
+
+class MongoSessionStore(SessionStore):
+  """MongoDB store, shared by all worker processes; expired sessions are removed by a TTL index"""
+
+  def __init__(self, db, collection_name: str = "sessions", ttl: Optional[float] = None):
+    """
+    Args:
+      db: Async database handle (AsyncMongoDBClient.db)
+      collection_name: Collection of the sessions
+      ttl: Session lifetime in seconds since its last turn (None: no expiry)
+    """
+    self.collection = db[collection_name]
+    self.ttl = ttl
+    self._indexed = False
+
+  async def _ensure_index(self):
+    if self._indexed:
+      return
+    if self.ttl:
+      await self.collection.create_index("updated_at", expireAfterSeconds=int(self.ttl))
+    self._indexed = True
+
+  async def get(self, session_id: str) -> List[Dict]:
+    doc = await self.collection.find_one({"_id": session_id})
+    if doc is None:
+      return []
+    # The TTL monitor runs about once a minute: skip sessions expired in between
+    if self.ttl and doc['updated_at'].replace(tzinfo=timezone.utc) < datetime.now(timezone.utc) - timedelta(seconds=self.ttl):
+      return []
+    return doc['history']
+
+  async def save(self, session_id: str, history: List[Dict]):
+    await self._ensure_index()
+    await self.collection.replace_one(
+      {"_id": session_id},
+      {"history": history, "updated_at": datetime.now(timezone.utc)},
+      upsert=True
+    )
+
+  async def delete(self, session_id: str):
+    await self.collection.delete_one({"_id": session_id})
+
+
+def create_session_store(config: Dict, db=None) -> SessionStore:
+  """Factory function to create the configured session store"""
+  server_config = config.get('server', {})
+  backend = server_config.get('session_store', 'memory')
+  ttl = server_config.get('session_ttl_seconds')
+
+  if backend == "memory":
+    return InMemorySessionStore(max_sessions=server_config.get('max_sessions', 10000), ttl=ttl)
+
+  elif backend == "mongodb":
+    return MongoSessionStore(db, server_config.get('sessions_collection_name', 'sessions'), ttl=ttl)
+
+  else:
+    raise ValueError(f"Unknown session store: {backend}. Use 'memory' or 'mongodb'")
@@ -0,0 +1,90 @@
+"""
+Tool plans: the tool bodies of the agent are written once, as generators
+that yield the work they need instead of doing it. A plan yields a DbCall
+(a read query, run on MongoDBClient or AsyncMongoDBClient, which share
+the method names), a CpuCall (embedding, index search, re-ranking) or a
+list of them (independent calls, run concurrently by the async runner),
+receives the results and finally returns the tool result:
+
+  def _tool_count_articles(self, params):
+    count = yield db_call('count_by_filter', self._build_metadata_filter(params))
+    return {"count": count}
+
+run_plan drives a plan synchronously, run_plan_async on the event loop.
+Exceptions raised by a call are thrown back into the plan.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Generator, NamedTuple, Tuple
+
+
+class DbCall(NamedTuple):
+  """MongoDB read: method name and arguments of the database client"""
+  method: str
+  args: Tuple
+  kwargs: Dict[str, Any]
+
+
+class CpuCall(NamedTuple):
+  """CPU-bound work: run inline, or in a worker thread by the async runner"""
+  function: Callable
+  args: Tuple
+  kwargs: Dict[str, Any]
+
+
+def db_call(method: str, *args, **kwargs) -> DbCall:
+  return DbCall(method, args, kwargs)
+
+
+def cpu_call(function: Callable, *args, **kwargs) -> CpuCall:
+  return CpuCall(function, args, kwargs)
+
+
+def _run_call(call, db) -> Any:
+  if isinstance(call, DbCall):
+    return getattr(db, call.method)(*call.args, **call.kwargs)
+  return call.function(*call.args, **call.kwargs)
+
+
+async def _run_call_async(call, db) -> Any:
+  if isinstance(call, DbCall):
+    return await getattr(db, call.method)(*call.args, **call.kwargs)
+  return await asyncio.to_thread(call.function, *call.args, **call.kwargs)
+
+
+def run_plan(plan: Generator, db) -> Any:
+  """Run a plan with a MongoDBClient, one call after another"""
+  result, error = None, None
+  while True:
+    try:
+      request = plan.throw(error) if error is not None else plan.send(result)
+    except StopIteration as stop:
+      return stop.value
+
+    result, error = None, None
+    try:
+      if isinstance(request, list):
+        result = [_run_call(call, db) for call in request]
+      else:
+        result = _run_call(request, db)
+    except Exception as e:
+      error = e
+
+
+async def run_plan_async(plan: Generator, db) -> Any:
+  """Run a plan with an AsyncMongoDBClient, the calls of a list concurrently"""
+  result, error = None, None
+  while True:
+    try:
+      request = plan.throw(error) if error is not None else plan.send(result)
+    except StopIteration as stop:
+      return stop.value
+
+    result, error = None, None
+    try:
+      if isinstance(request, list):
+        result = list(await asyncio.gather(*(_run_call_async(call, db) for call in request)))
+      else:
+        result = await _run_call_async(request, db)
+    except Exception as e:
+      error = e
@@ -0,0 +1,240 @@
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from rag_journal.index.bm25_index import tokenize
+from rag_journal.utils.logger import logger
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+class TokenCounter:
+  """
+  Count tokens with tiktoken, or with the tokenizer of the embedding model
+  when tiktoken (or its encoding file) is not available.
+  """
+
+  def __init__(self, encoding: str = "o200k_base", fallback_tokenizer=None):
+    """
+    Args:
+      encoding: tiktoken encoding ("o200k_base": gpt-4o, close enough for other providers)
+      fallback_tokenizer: Hugging Face tokenizer (e.g. ArticleEmbedder.model.tokenizer)
+    """
+    try:
+      import tiktoken
+      self._encoding = tiktoken.get_encoding(encoding)
+      self._tokenizer = None
+      self.name = f"tiktoken/{encoding}"
+    except Exception as e:
+      if fallback_tokenizer is None:
+        raise
+      logger.info(f"  ⚠ tiktoken non disponibile ({e}): si usa il tokenizer del modello di embedding")
+      self._encoding = None
+      self._tokenizer = fallback_tokenizer
+      self.name = getattr(fallback_tokenizer, 'name_or_path', 'embedding tokenizer')
+
+  def count(self, text: str) -> int:
+    """Number of tokens of a text"""
+    if self._encoding is not None:
+      return len(self._encoding.encode(text, disallowed_special=()))
+    return len(self._tokenizer.encode(text, add_special_tokens=False))
+
+
+class ToolResultSerializer:
+  """
+  Serialize tool results for the LLM within a token budget.
+
+  Lists of rows (articles, passages) are encoded as one table with the
+  column names given once; full article texts are replaced by excerpts
+  around the query terms; when a result still exceeds the budget its
+  last rows are dropped and a "truncated" entry tells the model what is
+  missing and how to get it.
+  """
+
+  # Long text fields of the rows, replaced by excerpts
+  TEXT_FIELDS = ("content",)
+
+  def __init__(
+      self,
+      counter: TokenCounter,
+      max_tokens_per_call: int = 3000,
+      max_tokens_per_conversation: int = 12000,
+      excerpt_tokens: int = 400):
+    """
+    Args:
+      counter: Token counter
+      max_tokens_per_call: Budget of one tool result
+      max_tokens_per_conversation: Budget of all tool results of one question
+      excerpt_tokens: Maximum size of the excerpt of one article text
+    """
+    self.counter = counter
+    self.max_tokens_per_call = max_tokens_per_call
+    self.max_tokens_per_conversation = max_tokens_per_conversation
+    self.excerpt_tokens = excerpt_tokens
+
+  @staticmethod
+  def dumps(value: Any) -> str:
+    """Compact JSON"""
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":"))
+
+  def budget(self, used_tokens: int) -> int:
+    """Budget of the next tool result, given the tokens already used in the conversation"""
+    return max(0, min(self.max_tokens_per_call, self.max_tokens_per_conversation - used_tokens))
+
+  def serialize(self, result: Dict, query: str = "", max_tokens: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Serialize a tool result.
+
+    Args:
+      result: Tool result
+      query: User question, for the excerpts of long texts
+      max_tokens: Token budget (default: max_tokens_per_call)
+
+    Returns:
+      Serialized result and its number of tokens
+    """
+    max_tokens = self.max_tokens_per_call if max_tokens is None else max_tokens
+
+    table_key = self._table_key(result)
+    if table_key is None:
+      text = self.dumps(result)
+      tokens = self.counter.count(text)
+      if tokens <= max_tokens:
+        return text, tokens
+      return self._exhausted(max_tokens)
+
+    rows = result[table_key]
+    rows = self._excerpt_rows(rows, query, max_tokens)
+
+    def encode(n_rows: int) -> str:
+      compact = {k: v for k, v in result.items() if k != table_key}
+      compact[table_key] = self._table(rows[:n_rows])
+      if n_rows < len(rows):
+        compact['truncated'] = self._truncation(table_key, rows, n_rows)
+      return self.dumps(compact)
+
+    text = encode(len(rows))
+    tokens = self.counter.count(text)
+    if tokens <= max_tokens:
+      return text, tokens
+
+    # Largest number of rows within the budget (binary search)
+    low, high = 0, len(rows) - 1
+    best = None
+    while low <= high:
+      middle = (low + high) // 2
+      candidate = encode(middle)
+      candidate_tokens = self.counter.count(candidate)
+      if candidate_tokens <= max_tokens:
+        best = (candidate, candidate_tokens)
+        low = middle + 1
+      else:
+        high = middle - 1
+
+    return best if best is not None else self._exhausted(max_tokens)
+
+  @staticmethod
+  def _table_key(result: Dict) -> Optional[str]:
+    """Key of the list of rows of a result, if any"""
+    for key, value in result.items():
+      if isinstance(value, list) and value and all(isinstance(row, dict) for row in value):
+        return key
+    return None
+
+  @staticmethod
+  def _table(rows: List[Dict]) -> Dict:
+    """Rows as column names plus value lists"""
+    columns = []
+    for row in rows:
+      for key in row:
+        if key not in columns:
+          columns.append(key)
+    return {
+      "columns": columns,
+      "rows": [[row.get(column) for column in columns] for row in rows]
+    }
+
+  @staticmethod
+  def _truncation(table_key: str, rows: List[Dict], n_rows: int) -> Dict:
+    """What was left out, and how to get it"""
+    omitted = rows[n_rows:]
+    truncation = {"rows_shown": n_rows, "rows_total": len(rows)}
+    omitted_ids = [row['article_id'] for row in omitted if 'article_id' in row]
+    if omitted_ids:
+      truncation['omitted_article_ids'] = list(dict.fromkeys(omitted_ids))[:50]
+    if any('content' in row for row in rows):
+      truncation['hint'] = "Result cut to fit the context: call get_article_details again on the omitted ids if needed"
+    else:
+      truncation['hint'] = (
+        f"Result cut to fit the context: {len(omitted)} {table_key} omitted. Narrow the search "
+        "(filters, dates, more specific query) or use get_article_details on the ids shown"
+      )
+    return truncation
+
+  def _excerpt_rows(self, rows: List[Dict], query: str, max_tokens: int) -> List[Dict]:
+    """Rows with long texts replaced by excerpts around the query terms"""
+    long_rows = [row for row in rows if any(isinstance(row.get(field), str) for field in self.TEXT_FIELDS)]
+    if not long_rows:
+      return rows
+
+    # Share the budget among the texts, leaving room for the other fields
+    per_text = max(50, min(self.excerpt_tokens, int(max_tokens * 0.8) // len(long_rows)))
+    query_terms = set(tokenize(query))
+
+    excerpted = []
+    for row in rows:
+      row = dict(row)
+      for field in self.TEXT_FIELDS:
+        if isinstance(row.get(field), str):
+          row[field] = self.excerpt(row[field], query_terms, per_text)
+      excerpted.append(row)
+    return excerpted
+
+  def excerpt(self, text: str, query_terms: set, max_tokens: int) -> str:
+    """
+    Sentences of a text within max_tokens: the lead sentence, then the
+    sentences with most query terms; gaps are marked with "[…]"
+    """
+    if self.counter.count(text) <= max_tokens:
+      return text
+
+    sentences = [s for s in _SENTENCE_END.split(text) if s.strip()]
+    scores = [len(query_terms.intersection(tokenize(s))) for s in sentences]
+
+    # Lead first, then by number of query terms (earlier sentences on ties)
+    order = [0] + sorted(range(1, len(sentences)), key=lambda i: (-scores[i], i))
+
+    chosen, used = [], 0
+    for i in order:
+      tokens = self.counter.count(sentences[i])
+      if used + tokens > max_tokens:
+        if not chosen:
+          # A single sentence over budget: cut it on words
+          words = sentences[i].split()
+          chosen.append(i)
+          sentences[i] = " ".join(words[:max(1, len(words) * max_tokens // tokens)])
+          used = max_tokens
+        continue
+      chosen.append(i)
+      used += tokens
+
+    parts, previous = [], None
+    for i in sorted(chosen):
+      if previous is not None and i != previous + 1:
+        parts.append("[…]")
+      parts.append(sentences[i])
+      previous = i
+    if previous != len(sentences) - 1:
+      parts.append("[…]")
+    return " ".join(parts)
+
+  def _exhausted(self, max_tokens: int) -> Tuple[str, int]:
+    """Placeholder for a result that does not fit at all"""
+    text = self.dumps({
+      "truncated": {"rows_shown": 0},
+      "message": (
+        f"Result omitted: over the remaining budget of {max_tokens} tokens. "
+        "Answer with the information already retrieved, or ask for fewer, more specific results"
+      )
+    })
+    return text, self.counter.count(text)
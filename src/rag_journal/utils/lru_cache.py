@@ -0,0 +1,83 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+  """Thread-safe bounded LRU cache with optional TTL and hit/miss counters"""
+
+  _MISSING = object()
+
+  def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+    """
+    Args:
+      maxsize: Maximum number of entries (least recently used are evicted)
+      ttl: Entry lifetime in seconds (None: no expiry)
+    """
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._data)
+
+  def __contains__(self, key: Hashable) -> bool:
+    return self._lookup(key) is not self._MISSING
+
+  def _lookup(self, key: Hashable) -> Any:
+    """Return the live value for key, or _MISSING (does not update counters)"""
+    with self._lock:
+      entry = self._data.get(key)
+      if entry is None:
+        return self._MISSING
+      value, expires_at = entry
+      if expires_at is not None and time.monotonic() > expires_at:
+        del self._data[key]
+        return self._MISSING
+      self._data.move_to_end(key)
+      return value
+
+  def get(self, key: Hashable, default: Any = None) -> Any:
+    """Get a value, counting the lookup as a hit or a miss"""
+    value = self._lookup(key)
+    with self._lock:
+      if value is self._MISSING:
+        self.misses += 1
+        return default
+      self.hits += 1
+      return value
+
+  def put(self, key: Hashable, value: Any):
+    """Store a value, evicting the least recently used entries if full"""
+    if self.maxsize <= 0:
+      return
+    expires_at = time.monotonic() + self.ttl if self.ttl else None
+    with self._lock:
+      self._data[key] = (value, expires_at)
+      self._data.move_to_end(key)
+      while len(self._data) > self.maxsize:
+        self._data.popitem(last=False)
+
+  def invalidate(self, key: Hashable):
+    """Remove a single entry"""
+    with self._lock:
+      self._data.pop(key, None)
+
+  def clear(self):
+    """Remove all entries (counters are kept)"""
+    with self._lock:
+      self._data.clear()
+
+  def stats(self) -> Dict[str, Any]:
+    """Get hit/miss counters"""
+    lookups = self.hits + self.misses
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "size": len(self._data),
+      "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+    }